@@ -1,8 +1,15 @@
 import os
 import locale
 import json
+import logging
 import time
 import threading
+import re
+import base64
+import hashlib
+import csv
+import io
+from collections import OrderedDict
 from datetime import datetime
 from functools import wraps
 from flask import Flask, request, jsonify, render_template, Response, send_from_directory, url_for, session, redirect, make_response
@@ -12,20 +19,28 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from werkzeug.middleware.proxy_fix import ProxyFix
 from urllib.parse import quote
+from markupsafe import escape
 from flask_caching import Cache
 
-# --- INTEGRAÇÃO GOOGLE SHEETS ---
-try:
-    import gspread
-    from oauth2client.service_account import ServiceAccountCredentials
-except ImportError:
-    gspread = None
-    print("--> Aviso: Biblioteca gspread não encontrada. Planilhas desativadas.")
-
 # --- IMPORTS LOCAIS ---
+from services.atualizador import AtualizadorBackground
+from services.planilhas import EscritorPlanilhas, criar_backend
+from services.metricas import metricas
 try:
     from constants import UFS_SIGLAS, REGIOES, REGEX_BANCAS
-    from services.scraper import raspar_dados_online, filtrar_concursos, extrair_link_final
+    from services.scraper import raspar_incremental, filtrar_concursos, paginar_concursos
+    from services.indice import obter_indice
+    from services.ranking import BOOSTS
+    from services.sugestoes import obter_sugestoes, MAX_SUGESTOES
+    from services.snapshot import RepositorioSnapshots, versao_de, catalogo_em_memoria
+    from services.incremental import EstadoRaspagem, calcular_diff, diff_vazio
+    from services.cache_busca import CacheResultados, RespostaCacheada, chave_busca
+    from services.links import ResolvedorLinks, LINKS_PRE_RESOLVER
+    from services.alertas import RepositorioAssinaturas, MotorAlertas, criar_remetente
+    from services.sitemap import Sitemaps, lastmod
+    from services.armazem_sqlite import ArmazemSQLite
+    from services.leads import RegistroLeads
+    from services.compartilhado import armazem_compartilhado, AvisosLimiter  # registra o storage sqlite:// do limiter
 except ImportError:
     UFS_SIGLAS = []
     REGIOES = {}
@@ -43,27 +58,71 @@ ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'admin123')
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_port=1)
 Compress(app)
 
-# Configuração do Cache
-cache = Cache(app, config={
-    'CACHE_TYPE': 'SimpleCache',
-    'CACHE_DEFAULT_TIMEOUT': 300
-})
+# Snapshot binário dos concursos: um worker publica, todos mapeiam em memória.
+# Em produção aponte para um diretório em RAM (ex.: /dev/shm/concurso-ideal)
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR') or os.path.join(basedir, 'dados')
+
+# Contadores do limiter e cache de páginas valem para todos os workers (senão o
+# limite real seria N x o configurado e o cache.clear() só limparia um worker):
+# REDIS_URL usa o Redis; sem ele, um SQLite no SNAPSHOT_DIR (ESTADO_COMPARTILHADO
+# troca o arquivo; 'memoria' volta ao estado por processo)
+REDIS_URL = os.environ.get('REDIS_URL')
+ESTADO_COMPARTILHADO = os.environ.get('ESTADO_COMPARTILHADO') or os.path.join(SNAPSHOT_DIR, 'compartilhado.db')
+if REDIS_URL:
+    try: import redis  # noqa: F401  (opcional: só entra com REDIS_URL)
+    except ImportError:
+        print("--> Aviso: REDIS_URL definido sem o pacote redis instalado. Usando o SQLite compartilhado.")
+        REDIS_URL = None
+if REDIS_URL:
+    CONFIG_CACHE, STORAGE_LIMITER = {'CACHE_TYPE': 'RedisCache', 'CACHE_REDIS_URL': REDIS_URL}, REDIS_URL
+elif ESTADO_COMPARTILHADO == 'memoria':
+    CONFIG_CACHE, STORAGE_LIMITER = {'CACHE_TYPE': 'SimpleCache'}, "memory://"
+else:
+    ESTADO_COMPARTILHADO = os.path.abspath(ESTADO_COMPARTILHADO)
+    CONFIG_CACHE = {'CACHE_TYPE': 'services.compartilhado.CacheSQLite', 'CACHE_SQLITE_ARQUIVO': ESTADO_COMPARTILHADO}
+    STORAGE_LIMITER = f"sqlite://{ESTADO_COMPARTILHADO}"
 
-# Configuração do Limiter
+# Configuração do Cache
+cache = Cache(app, config=dict(CONFIG_CACHE, CACHE_DEFAULT_TIMEOUT=300))
+
+# Configuração do Limiter. LIMITER_FALLBACK diz o que fazer se o storage cair:
+#   'memoria' (padrão) segue contando em memória, por worker, até ele voltar;
+#   'liberar' deixa os requests passarem sem limite; 'erro' responde 500.
+LIMITER_FALLBACK = os.environ.get('LIMITER_FALLBACK', 'memoria')
+if LIMITER_FALLBACK not in ('memoria', 'liberar', 'erro'):
+    print(f"--> Aviso: LIMITER_FALLBACK={LIMITER_FALLBACK} desconhecido. Usando 'memoria'.")
+    LIMITER_FALLBACK = 'memoria'
 limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=["2000 per day", "200 per minute"],
-    storage_uri="memory://"
+    storage_uri=STORAGE_LIMITER,
+    in_memory_fallback_enabled=LIMITER_FALLBACK == 'memoria',
+    swallow_errors=LIMITER_FALLBACK != 'erro'
 )
+avisos_limiter = AvisosLimiter()  # queda e volta do storage aparecem no log do app
+limiter.logger.addHandler(avisos_limiter)
+limiter.logger.setLevel(logging.INFO)
 
 CORS(app)
 
-# Persistência Local
-DB_FILE = os.path.join(basedir, 'concursos.json')
+# Persistência Local (leads.txt é o formato antigo: importado uma vez para o leads.db)
 LEADS_FILE = os.path.join(basedir, 'leads.txt')
-CACHE_TIMEOUT = 3600 
-CACHE_MEMORIA = { "timestamp": 0, "dados": [] }
+CACHE_TIMEOUT = int(os.environ.get('CACHE_TIMEOUT') or 900)  # com GET condicional, conferir a fonte é barato
+CACHE_MEMORIA = { "timestamp": 0, "dados": [], "versao": "" }
+VERSOES_RECENTES = OrderedDict()  # versao -> dados, para cursores emitidos antes de um refresh
+MAX_VERSOES_RECENTES = 3
+
+# Respostas prontas das buscas populares (chave inclui a versão dos dados)
+cache_busca = CacheResultados(max_itens=int(os.environ.get('CACHE_BUSCA_ITENS', 512)))
+# Endereço canônico do site (o mesmo do <link rel="canonical">): sitemaps, robots.txt e links
+# de e-mail saem sempre com ele, nunca com o Host de quem fez o request
+SITE_URL = os.environ.get('SITE_URL', 'https://concurso-app-2.onrender.com').rstrip('/')
+# Sitemaps dos termos em gzip, um conjunto por versão dos dados
+sitemaps = Sitemaps(SITE_URL, urls_por_arquivo=int(os.environ.get('SITEMAP_URLS_POR_ARQUIVO', 10000)))
+
+metricas.diretorio = SNAPSHOT_DIR  # histogramas de cada worker, somados no /admin/metrics
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')  # Bearer para o Prometheus coletar sem sessão
 
 # --- DECORATOR DE SEGURANÇA ---
 def login_required(f):
@@ -75,110 +134,230 @@ def login_required(f):
     return decorated_function
 
 # --- FUNÇÕES AUXILIARES ---
-def get_gspread_client():
-    if not gspread: return None
-    creds_json = os.environ.get('GOOGLE_CREDENTIALS_JSON')
-    if not creds_json: return None
-    try:
-        creds_dict = json.loads(creds_json)
-        scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        return gspread.authorize(creds)
-    except Exception as e:
-        print(f"--> [GSPREAD ERROR] {e}")
-        return None
+# Todas as gravações no Sheets passam por um único escritor em lote
+escritor_planilhas = EscritorPlanilhas(criar_backend(basedir))
+# Leads (um por e-mail) e buscas do site num SQLite local, compartilhado pelos workers
+registro_leads = RegistroLeads(os.environ.get('LEADS_DB') or os.path.join(basedir, 'leads.db'), arquivo_legado=LEADS_FILE)
 
 def salvar_lead_sheets(email):
-    client = get_gspread_client()
-    if not client: return
-    try:
-        sheet = client.open("Leads Concurso Ideal").sheet1
-        data_hora = time.strftime('%d/%m/%Y %H:%M:%S')
-        sheet.append_row([data_hora, email])
-    except: pass
+    data_hora = time.strftime('%d/%m/%Y %H:%M:%S')
+    escritor_planilhas.enfileirar(None, [data_hora, email])
+
+def campos_busca(payload):
+    # Garante que todos os campos sejam strings para evitar erro
+    return [
+        str(payload.get('palavra_chave', '')), 
+        str(payload.get('salario_minimo', '')), 
+        ", ".join(payload.get('regioes', [])), 
+        ", ".join(payload.get('ufs', [])), 
+        ", ".join(payload.get('niveis', [])),
+        str(payload.get('excluir_palavra', '')),
+        str(payload.get('banca', ''))
+    ]
 
 def salvar_busca_completa_sheets(payload):
-    client = get_gspread_client()
-    if not client: return
-    try:
-        try: sheet = client.open("Leads Concurso Ideal").worksheet("Termos")
-        except: sheet = client.open("Leads Concurso Ideal").sheet1
-        
-        data_hora = time.strftime('%d/%m/%Y %H:%M:%S')
-        # Garante que todos os campos sejam strings para evitar erro
-        linha = [
-            data_hora, 
-            str(payload.get('palavra_chave', '')), 
-            str(payload.get('salario_minimo', '')), 
-            ", ".join(payload.get('regioes', [])), 
-            ", ".join(payload.get('ufs', [])), 
-            ", ".join(payload.get('niveis', [])),
-            str(payload.get('excluir_palavra', ''))
-        ]
-        sheet.append_row(linha)
-    except: pass
+    data_hora = time.strftime('%d/%m/%Y %H:%M:%S')
+    escritor_planilhas.enfileirar("Termos", [data_hora] + campos_busca(payload))
 
 def salvar_report_sheets(texto_erro):
-    client = get_gspread_client()
-    if not client: return
-    try:
-        try: sheet = client.open("Leads Concurso Ideal").worksheet("Report")
-        except: sheet = client.open("Leads Concurso Ideal").sheet1
-        sheet.append_row([time.strftime('%d/%m/%Y %H:%M:%S'), "ERRO REPORTADO", texto_erro])
-    except: pass
+    escritor_planilhas.enfileirar("Report", [time.strftime('%d/%m/%Y %H:%M:%S'), "ERRO REPORTADO", texto_erro])
+
+# Buscas salvas: ficam ao lado do leads.txt (o SNAPSHOT_DIR pode ser volátil)
+assinaturas = RepositorioAssinaturas(os.environ.get('ALERTAS_ASSINATURAS') or os.path.join(basedir, 'alertas.jsonl'))
+motor_alertas = MotorAlertas(assinaturas, criar_remetente(basedir), url_base=SITE_URL)
 
 # --- DADOS ---
-def obter_dados(force=False):
+INTERVALO_RETENTATIVA = 300  # espera após uma raspagem que falhou
+ESTADO_ARQUIVO = { "mtime": 0, "ultima_falha": 0, "verificado": 0 }
+LOCK_PARTIDA = threading.Lock()
+
+FILTROS_VAZIOS = (0.0, [], [], [], [], [])
+
+def publicar_dados(dados, timestamp):
+    """Troca o snapshot em memória de uma vez (leitores nunca veem estado misto)."""
     global CACHE_MEMORIA
-    agora = time.time()
+    with metricas.medir('indice'):
+        obter_indice(dados)  # monta o índice de busca fora do caminho do request
+    versao = versao_de(timestamp)
+    # Facetas da busca vazia (a tela inicial) já saem prontas com o snapshot
+    cache_busca.guardar(chave_busca(versao, FILTROS_VAZIOS, 'facetas'),
+                        codificar_json(obter_indice(dados).facetas(*FILTROS_VAZIOS)))
+    VERSOES_RECENTES[versao] = dados
+    while len(VERSOES_RECENTES) > MAX_VERSOES_RECENTES: VERSOES_RECENTES.popitem(last=False)
+    cache_busca.manter_versoes(set(VERSOES_RECENTES))
+    CACHE_MEMORIA = { "timestamp": timestamp, "dados": dados, "versao": versao }
+    # Os sitemaps ficam prontos antes do primeiro robô
+    threading.Thread(target=sitemaps.obter, args=(versao, dados, timestamp), daemon=True).start()
+
+repositorio = RepositorioSnapshots(SNAPSHOT_DIR)
+# Catálogo em SQLite (opcional): histórico por link e, com BUSCA_SQL=1, a busca sem ordem de relevância
+armazem = ArmazemSQLite(os.environ['ARMAZEM_SQLITE']) if os.environ.get('ARMAZEM_SQLITE') else None
+BUSCA_SQL = os.environ.get('BUSCA_SQL') == '1'
+
+def carregar_arquivo():
+    """Mapeia o snapshot publicado; retorna (timestamp, dados) ou None."""
+    if not os.path.exists(repositorio.ponteiro): return None
+    try:
+        mtime = os.path.getmtime(repositorio.ponteiro)
+        snap = repositorio.abrir_atual()
+    except Exception as e:
+        print(f"--> [SNAPSHOT] Falha ao mapear: {e}")
+        return None
+    if snap is None: return None
+    ESTADO_ARQUIVO["mtime"] = mtime
+    return snap.timestamp, snap
+
+def carregar_armazem():
+    """Sem snapshot no disco, a última raspagem gravada no SQLite; (timestamp, dados) ou None."""
+    if armazem is None: return None
+    try:
+        carregado = armazem.carregar()
+    except Exception as e:
+        print(f"--> [ARMAZEM] Falha ao carregar: {e}")
+        return None
+    if not carregado: return None
+    timestamp, dados = carregado
+    return timestamp, salvar_arquivo(dados, timestamp) or catalogo_em_memoria(dados, timestamp)
 
-    def hidratar_cache(dados):
-        for item in dados:
-            if isinstance(item.get('tokens'), list):
-                item['tokens'] = set(item['tokens'])
-            if isinstance(item.get('niveis'), list):
-                item['niveis'] = set(item['niveis'])
-        return dados
+def gravar_armazem(dados, timestamp):
+    if armazem is None: return
+    try:
+        with metricas.medir('armazem'):
+            r = armazem.gravar(dados, timestamp)
+        print(f"--> [ARMAZEM] +{r['novos']} ~{r['alterados']} ={r['revistos']}")
+    except Exception as e:
+        print(f"--> [ARMAZEM] Falha ao gravar: {e}")
 
-    if not force and CACHE_MEMORIA["dados"] and (agora - CACHE_MEMORIA["timestamp"] < CACHE_TIMEOUT):
-        return CACHE_MEMORIA["dados"]
+def salvar_arquivo(dados, timestamp):
+    """Publica a raspagem (gravação atômica) e devolve o snapshot já mapeado."""
+    try:
+        snap = repositorio.publicar(dados, timestamp)
+        ESTADO_ARQUIVO["mtime"] = os.path.getmtime(repositorio.ponteiro)
+        return snap
+    except Exception as e:
+        print(f"--> [SNAPSHOT] Falha ao publicar: {e}")
+        return None
 
-    if not force and os.path.exists(DB_FILE):
-        try:
-            with open(DB_FILE, 'r', encoding='utf-8') as f:
-                conteudo = json.load(f)
-                if agora - conteudo.get('timestamp', 0) < CACHE_TIMEOUT:
-                    CACHE_MEMORIA["dados"] = hidratar_cache(conteudo.get('dados', []))
-                    CACHE_MEMORIA["timestamp"] = conteudo.get('timestamp', 0)
-                    return CACHE_MEMORIA["dados"]
-        except: pass
+estado_raspagem = EstadoRaspagem(os.path.join(SNAPSHOT_DIR, 'raspagem.json'))
+# Edital/inscrição de cada concurso: cache persistente, os primeiros da lista já resolvidos após cada raspagem
+resolvedor_links = ResolvedorLinks(os.path.join(SNAPSHOT_DIR, 'links.json'))
 
-    novos_dados = raspar_dados_online()
-    if novos_dados:
-        dados_json = []
-        for item in novos_dados:
-            copia = item.copy()
-            copia['tokens'] = list(copia['tokens'])
-            copia['niveis'] = list(copia['niveis'])
-            dados_json.append(copia)
+def idade_dados(agora):
+    """Segundos desde a última conferência da fonte (um 304 conta como conferência)."""
+    return agora - max(CACHE_MEMORIA["timestamp"], ESTADO_ARQUIVO["verificado"])
 
-        try:
-            with open(DB_FILE, 'w', encoding='utf-8') as f:
-                json.dump({"timestamp": agora, "dados": dados_json}, f, ensure_ascii=False)
-        except: pass
-        
-        CACHE_MEMORIA["dados"] = hidratar_cache(novos_dados)
-        CACHE_MEMORIA["timestamp"] = agora
-        return CACHE_MEMORIA["dados"]
-    
-    return CACHE_MEMORIA.get("dados", [])
+def atualizar_dados(force=False):
+    """Roda sob o lock single-flight. Se outro worker já raspou, só recarrega o arquivo."""
+    agora = time.time()
+    carregado = carregar_arquivo()
+    if carregado and carregado[0] > CACHE_MEMORIA["timestamp"]:
+        publicar_dados(carregado[1], carregado[0])
+    ESTADO_ARQUIVO["verificado"] = estado_raspagem.carregar().verificado_em
+    estado_raspagem.liberar()
+    if not force and carregado and idade_dados(agora) < CACHE_TIMEOUT: return
+
+    anteriores, versao_anterior = CACHE_MEMORIA["dados"], CACHE_MEMORIA["versao"]
+    novos_dados = raspar_incremental(estado_raspagem)
+    ESTADO_ARQUIVO["verificado"] = estado_raspagem.verificado_em
+    if novos_dados is None: return  # 304: a versão publicada continua valendo
+    if not novos_dados:
+        ESTADO_ARQUIVO["ultima_falha"] = agora
+        return
+
+    diff = calcular_diff(anteriores, novos_dados)
+    if anteriores and diff_vazio(diff):
+        print("--> [SCRAPER] Nenhum concurso mudou; versão atual mantida.")
+        return
+    # Em memória fica sempre o catálogo compacto, nunca a lista de dicts da raspagem
+    publicado = salvar_arquivo(novos_dados, agora) or catalogo_em_memoria(novos_dados, agora)
+    del novos_dados
+    publicar_dados(publicado, agora)
+    gravar_armazem(publicado, agora)  # ainda sob o lock: um escritor só, entre todos os workers
+    diff.update(versao=versao_de(agora), anterior=versao_anterior or None, gerado_em=agora)
+    try:
+        repositorio.gravar_diff(diff)
+    except Exception as e:
+        print(f"--> [SNAPSHOT] Falha ao gravar diff: {e}")
+    print(f"--> [SCRAPER] Diff: +{len(diff['adicionados'])} -{len(diff['removidos'])} ~{len(diff['alterados'])}")
+    links = publicado.colunas['link']
+    resolvedor_links.pre_resolver_em_fundo(links[i] for i in range(min(LINKS_PRE_RESOLVER, len(links))))
+    if versao_anterior and diff['adicionados']:  # a primeira raspagem não é "novidade"
+        posicao = posicoes_por_link(publicado)
+        novos = [dict(publicado[posicao[l]]) for l in diff['adicionados'] if l in posicao]
+        threading.Thread(target=enviar_alertas, args=(novos,), name='alertas', daemon=True).start()
+
+def enviar_alertas(novos):
+    try: motor_alertas.processar(novos)
+    except Exception as e: print(f"--> [ALERTAS] Falha: {e}")
+
+def posicoes_por_link(todos):
+    col = getattr(todos, 'colunas', None)
+    links = col['link'] if col is not None else [item['link'] for item in todos]
+    return {links[i]: i for i in range(len(links))}
+
+def precisa_atualizar():
+    agora = time.time()
+    try:
+        if os.path.getmtime(repositorio.ponteiro) > ESTADO_ARQUIVO["mtime"]: return True
+    except OSError: pass
+    expirado = idade_dados(agora) >= CACHE_TIMEOUT
+    return expirado and agora - ESTADO_ARQUIVO["ultima_falha"] >= INTERVALO_RETENTATIVA
+
+atualizador = AtualizadorBackground(atualizar_dados, precisa_atualizar,
+                                    arquivo_lock=os.path.join(SNAPSHOT_DIR, 'concursos.lock'))
+
+def obter_dados(force=False):
+    """Nunca raspa no caminho do request, exceto na partida a frio sem nenhum snapshot."""
+    t0 = time.perf_counter()
+    dados, origem = _obter_dados(force)
+    metricas.observar('obter_dados', time.perf_counter() - t0, origem=origem)
+    return dados
+
+def _obter_dados(force):
+    """Retorna (dados, origem): 'memoria', 'arquivo' ou 'raspagem' (a que bloqueou o request)."""
+    if force:
+        atualizador.executar(force=True, bloquear=True)
+        return CACHE_MEMORIA["dados"], 'raspagem'
+
+    atualizador.iniciar()
+    estado = CACHE_MEMORIA
+    if estado["dados"]:
+        if idade_dados(time.time()) >= CACHE_TIMEOUT: atualizador.solicitar()
+        return estado["dados"], 'memoria'
+
+    # Partida a frio: serve o arquivo (mesmo velho) ou, sem ele, espera a primeira raspagem
+    origem = 'memoria'
+    with LOCK_PARTIDA:
+        if not CACHE_MEMORIA["dados"]:
+            carregado = carregar_arquivo() or carregar_armazem()
+            if carregado and carregado[1]:
+                publicar_dados(carregado[1], carregado[0])
+                atualizador.solicitar()
+                origem = 'arquivo'
+            elif time.time() - ESTADO_ARQUIVO["ultima_falha"] >= INTERVALO_RETENTATIVA:
+                atualizador.executar(bloquear=True)
+                origem = 'raspagem'
+    return CACHE_MEMORIA["dados"], origem
 
 # --- ROTAS ---
+@app.before_request
+def iniciar_metricas():
+    metricas.iniciar_request()
+
 @app.after_request
 def add_header(response):
+    rota = request.url_rule.rule if request.url_rule else 'sem_rota'  # nunca o path cru: cardinalidade
+    server_timing = metricas.finalizar_request(rota=rota, metodo=request.method, status=response.status_code)
+    if server_timing and (request.path.startswith('/api/') or request.path == '/'):
+        response.headers['Server-Timing'] = server_timing
+    metricas.gravar()
     if request.path.startswith('/static'):
         response.cache_control.max_age = 31536000
         response.cache_control.public = True
+        if request.path.endswith('/sw.js'):
+            # O service worker precisa ser revalidado e controlar o site inteiro
+            response.cache_control.max_age = 0
+            response.headers['Service-Worker-Allowed'] = '/'
     return response
 
 @app.route('/ir')
@@ -187,41 +366,90 @@ def redirecionar_externo():
     tipo = request.args.get('tipo', 'edital')
     if not target_url: return redirect('/')
     try:
-        final_url = extrair_link_final(target_url, tipo)
+        final_url = resolvedor_links.resolver(target_url, tipo)
         return redirect(final_url)
     except:
         return redirect(target_url)
 
-@app.route('/')
-def index():
-    query = request.args.get('q')
-    dados_brutos = obter_dados()
-    schema_jobs = []
-    hoje_iso = datetime.now().strftime('%Y-%m-%d')
-    
-    for item in dados_brutos[:40]:
+# --- PÁGINA INICIAL ---
+# O HTML só muda com o snapshot: sai pronto uma vez por versão (e por dia, que
+# entra no JSON-LD) e fica num espaço só dele, fora do LRU das buscas. Os links
+# saem com o SITE_URL, então o Host do request não cria variantes. Com ?q= só o
+# título e a descrição mudam: vêm de um molde com marcas, trocadas por request.
+MARCA_TITULO, MARCA_DESCRICAO = '\ue000titulo\ue000', '\ue000descricao\ue000'
+CACHE_CONTROL_INICIAL = 'public, max-age=60, s-maxage=300, stale-while-revalidate=3600'
+
+def assinatura_templates(*nomes):
+    """Hash dos templates da página: um deploy que muda o HTML muda o ETag."""
+    h = hashlib.sha1()
+    for nome in nomes:
         try:
-            data_fim_iso = datetime.strptime(item.get('data_fim', ''), '%d/%m/%Y').strftime('%Y-%m-%d')
-        except:
-            data_fim_iso = None 
-
-        job = {
-            "titulo": item.get('texto'),
-            "data_postagem": hoje_iso,
-            "validade": data_fim_iso,
-            "local": item.get('uf', 'BR'),
-            "salario": item.get('salario_num', 0),
-            "url": url_for('redirecionar_externo', url=item.get('link'), tipo='edital', _external=True)
+            with open(os.path.join(basedir, 'templates', nome), 'rb') as f: h.update(f.read())
+        except OSError: pass
+    return h.hexdigest()[:12]
+
+ASSINATURA_INICIAL = assinatura_templates('base.html', 'index.html')
+
+def schema_jobs(dados, hoje):
+    """JSON-LD (ItemList de JobPosting) dos 40 primeiros concursos, pronto para o <script>."""
+    itens = []
+    for posicao, item in enumerate(dados[:40], 1):
+        titulo, local = item.get('texto'), item.get('uf', 'BR')
+        vaga = {
+            "@type": "JobPosting",
+            "title": titulo,
+            "description": f"Concurso Público: {titulo}. Local: {local}. Confira edital.",
+            "datePosted": hoje.strftime('%Y-%m-%d'),
         }
-        schema_jobs.append(job)
+        try: vaga["validThrough"] = datetime.strptime(item.get('data_fim', ''), '%d/%m/%Y').strftime('%Y-%m-%d')
+        except: pass
+        vaga["jobLocation"] = {"@type": "Place", "address": {"@type": "PostalAddress", "addressRegion": local, "addressCountry": "BR"}}
+        vaga["baseSalary"] = {"@type": "MonetaryAmount", "currency": "BRL",
+                              "value": {"@type": "QuantitativeValue", "value": item.get('salario_num', 0), "unitText": "MONTH"}}
+        vaga["url"] = SITE_URL + url_for('redirecionar_externo', url=item.get('link'), tipo='edital')
+        itens.append({"@type": "ListItem", "position": posicao, "item": vaga})
+    corpo = {"@context": "https://schema.org", "@type": "ItemList", "itemListElement": itens}
+    return json.dumps(corpo, ensure_ascii=False).replace('</', '<\\/')  # nada fecha o <script> antes da hora
+
+PAGINA_INICIAL = (None, None, None)  # (versao, dia), HTML padrão, molde: trocados juntos
+LOCK_PAGINA_INICIAL = threading.Lock()
+
+def pagina_inicial(versao, dados, query):
+    """RespostaCacheada com o HTML da home; com `query`, montada do molde (não vai para cache nenhum)."""
+    global PAGINA_INICIAL
+    chave = (versao, datetime.now().strftime('%Y-%m-%d'))
+    atual, padrao, molde = PAGINA_INICIAL
+    if atual != chave:
+        with LOCK_PAGINA_INICIAL:  # versão nova: um request renderiza, os outros esperam por ela
+            atual, padrao, molde = PAGINA_INICIAL
+            if atual != chave:
+                with metricas.medir('pagina_inicial'):
+                    jobs = schema_jobs(dados, datetime.now())
+                    padrao = RespostaCacheada(render_template('index.html', schema_jobs=jobs).encode('utf-8'))
+                    molde = RespostaCacheada(render_template(
+                        'index.html', meta_title=MARCA_TITULO, meta_description=MARCA_DESCRICAO, schema_jobs=jobs).encode('utf-8'))
+                PAGINA_INICIAL = (chave, padrao, molde)
+    if query is None: return padrao
+    # ?q= arbitrária não é guardada: trocar duas marcas custa pouco
+    titulo = escape(f"Concurso: {query} | CONCURSO IDEAL")
+    descricao = escape(f"Veja vagas, salários e editais para {query} no Concurso Ideal.")
+    corpo = molde.corpo.replace(MARCA_TITULO.encode('utf-8'), titulo.encode('utf-8'))
+    return RespostaCacheada(corpo.replace(MARCA_DESCRICAO.encode('utf-8'), descricao.encode('utf-8')))
 
-    meta_title = f"Concurso: {query} | CONCURSO IDEAL" if query else None
-    meta_desc = f"Veja vagas, salários e editais para {query} no Concurso Ideal." if query else None
-        
-    return render_template('index.html', 
-                           meta_title=meta_title, 
-                           meta_description=meta_desc, 
-                           schema_jobs=schema_jobs)
+@app.route('/')
+def index():
+    query = request.args.get('q') or None
+    obter_dados()
+    estado = CACHE_MEMORIA
+    chave = (ASSINATURA_INICIAL, datetime.now().strftime('%Y-%m-%d'), query)
+    etag = f"{estado['versao']}-{hashlib.sha1(repr(chave).encode('utf-8')).hexdigest()[:16]}"
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = resposta_cacheada(pagina_inicial(estado["versao"], estado["dados"], query), 'text/html')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = CACHE_CONTROL_INICIAL
+    return resp
 
 # Rotas Estáticas com Cache
 @app.route('/sobre')
@@ -259,77 +487,168 @@ def admin_logout():
 @app.route('/admin')
 @login_required
 def admin_panel():
-    leads = []
-    if os.path.exists(LEADS_FILE):
-        try:
-            with open(LEADS_FILE, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if ' - ' in line:
-                        parts = line.strip().split(' - ')
-                        leads.append({'data': parts[0], 'email': parts[1]})
-        except: pass
-    
+    # Uma página de cada lista por vez, andando pelo id (?leads_antes= / ?buscas_antes=)
+    def antes(nome):
+        try: return int(request.args[nome])
+        except (KeyError, ValueError): return None
+    leads, proximos_leads = registro_leads.pagina_leads(antes('leads_antes'))
+    registro_leads.descarregar()  # as buscas ainda na fila deste worker já aparecem
+    buscas, proximas_buscas = registro_leads.pagina_buscas(antes('buscas_antes'))
+
     dados = CACHE_MEMORIA.get('dados', [])
     ts = CACHE_MEMORIA.get('timestamp', 0)
     idade = int((time.time() - ts) / 60) if ts > 0 else 0
 
     return render_template('admin.html', 
-                           leads=reversed(leads), 
-                           total_leads=len(leads), 
+                           leads=leads,
+                           proximos_leads=proximos_leads,
+                           total_leads=registro_leads.total_leads(),
+                           buscas=buscas,
+                           proximas_buscas=proximas_buscas,
+                           total_buscas=registro_leads.total_buscas(),
                            total_concursos=len(dados), 
-                           cache_age=idade)
+                           cache_age=idade,
+                           cache_busca=cache_busca.estatisticas(),
+                           planilhas=escritor_planilhas.estatisticas(),
+                           links=resolvedor_links.estatisticas(),
+                           alertas=motor_alertas.estatisticas(),
+                           armazem=armazem.estatisticas() if armazem else None)
 
 @app.route('/admin/download_leads')
 @login_required
-def download_leads():
-    if not os.path.exists(LEADS_FILE): return "Vazio", 404
-    with open(LEADS_FILE, 'r', encoding='utf-8') as f: content = f.read()
-    response = make_response("Data,Email\n" + content.replace(' - ', ','))
-    response.headers["Content-Disposition"] = "attachment; filename=leads.csv"
-    response.headers["Content-type"] = "text/csv"
+def download_leads(): return csv_em_fluxo(registro_leads.exportar_leads(), 'leads.csv')
+
+@app.route('/admin/download_buscas')
+@login_required
+def download_buscas():
+    registro_leads.descarregar()
+    return csv_em_fluxo(registro_leads.exportar_buscas(), 'buscas.csv')
+
+def csv_em_fluxo(linhas, nome, por_pedaco=500):
+    """CSV enviado aos pedaços enquanto as linhas saem do banco: a exportação nunca fica inteira na memória."""
+    def gerar():
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for n, linha in enumerate(linhas, 1):
+            escritor.writerow(linha)
+            if n % por_pedaco == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    response = Response(gerar(), mimetype='text/csv')
+    response.headers["Content-Disposition"] = f"attachment; filename={nome}"
     return response
 
+@app.route('/admin/metrics')
+@limiter.exempt
+def admin_metrics():
+    """Histogramas de todos os workers no formato do Prometheus (sessão de admin ou Bearer METRICAS_TOKEN)."""
+    autorizado = session.get('logged_in') or (
+        METRICAS_TOKEN and request.headers.get('Authorization') == f'Bearer {METRICAS_TOKEN}')
+    if not autorizado: return redirect('/admin/login')
+    metricas.gravar(forcar=True)
+    ts = CACHE_MEMORIA.get('timestamp', 0)
+    medidores = {
+        'concursos': len(CACHE_MEMORIA.get('dados', [])),
+        'idade_dados_seconds': round(time.time() - ts, 1) if ts else 0,
+        'cache_busca_itens': cache_busca.estatisticas()['itens'],
+        'planilhas_na_fila': escritor_planilhas.estatisticas()['na_fila'],
+    }
+    return Response(metricas.prometheus(medidores), mimetype='text/plain; version=0.0.4')
+
 @app.route('/admin/force_update')
 @login_required
 def force_update():
-    obter_dados(force=True)
-    cache.clear() 
+    atualizador.solicitar(force=True)
+    cache.clear()  # com o backend compartilhado, limpa o de todos os workers
     return redirect('/admin')
 
 # SEO & Utils
 @app.route('/robots.txt')
 @cache.cached(timeout=86400)
-def robots(): return Response("User-agent: *\nAllow: /", mimetype="text/plain")
+def robots(): return Response(f"User-agent: *\nAllow: /\nSitemap: {SITE_URL}/sitemap.xml\n", mimetype="text/plain")
 
 @app.route('/ads.txt')
 @cache.cached(timeout=86400)
 def ads_txt(): return send_from_directory(basedir, 'ads.txt')
 
+# --- SITEMAPS ---
+# Índice em /sitemap.xml; páginas fixas e termos (?q=) em arquivos separados.
+# Os de termos saem prontos em gzip por versão dos dados: robô não busca nem raspa.
+PAGINAS_SITEMAP = [('index', 'index.html', 'daily', '1.0'), ('sobre', 'sobre.html', 'monthly', '0.8'),
+                   ('contato', 'contato.html', 'monthly', '0.8'), ('termos', 'termos.html', 'yearly', '0.5'),
+                   ('privacidade', 'privacidade.html', 'yearly', '0.5')]
+CACHE_CONTROL_SITEMAP = 'public, max-age=3600'
+
+def dados_sem_raspar():
+    """Estado publicado (memória ou arquivo); None se ainda não há dados. Nunca espera raspagem."""
+    if not CACHE_MEMORIA["dados"] and LOCK_PARTIDA.acquire(blocking=False):
+        try:
+            if not CACHE_MEMORIA["dados"]:
+                carregado = carregar_arquivo()
+                if carregado and carregado[1]:
+                    publicar_dados(carregado[1], carregado[0])
+                    atualizador.solicitar()
+        finally:
+            LOCK_PARTIDA.release()
+    estado = CACHE_MEMORIA
+    return estado if estado["dados"] else None
+
+def sitemaps_atuais():
+    estado = dados_sem_raspar()
+    if estado is None: return None
+    return sitemaps.obter(estado["versao"], estado["dados"], estado["timestamp"])
+
+def resposta_sitemap(corpo, etag, mimetype='application/xml'):
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(corpo, mimetype=mimetype)
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = CACHE_CONTROL_SITEMAP
+    return resp
+
+def sem_dados_ainda():
+    resp = Response('Sitemap em preparação', status=503, mimetype='text/plain')
+    resp.headers['Retry-After'] = '120'
+    return resp
+
+def mtime_template(nome):
+    try: return os.path.getmtime(os.path.join(basedir, 'templates', nome))
+    except OSError: return time.time()
+
 @app.route('/sitemap.xml')
-@cache.cached(timeout=3600)
 def sitemap():
-    xml_content = ['<?xml version="1.0" encoding="UTF-8"?>']
-    xml_content.append('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
-    
-    estaticas = [('index', 'daily', '1.0'), ('sobre', 'monthly', '0.8'), ('contato', 'monthly', '0.8'), ('termos', 'yearly', '0.5'), ('privacidade', 'yearly', '0.5')]
-    
-    for endpoint, freq, prio in estaticas:
+    conjunto = sitemaps_atuais()
+    if conjunto is None: return sem_dados_ainda()
+    mtime_paginas = max(mtime_template(t) for _, t, _, _ in PAGINAS_SITEMAP)
+    paginas = (f"{conjunto.base}/sitemap-paginas.xml", mtime_paginas)
+    # O corpo só depende da versão, do número de partes e do lastmod das páginas fixas (a base é fixa)
+    return resposta_sitemap(conjunto.indice([paginas]),
+                            f"{conjunto.versao}-{len(conjunto.partes)}-{int(mtime_paginas)}-{ASSINATURA_INICIAL}")
+
+@app.route('/sitemap-paginas.xml')
+@cache.cached(timeout=3600)
+def sitemap_paginas():
+    linhas = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for endpoint, template, freq, prio in PAGINAS_SITEMAP:
         try:
-            url = url_for(endpoint, _external=True)
-            xml_content.append(f'<url><loc>{url}</loc><changefreq>{freq}</changefreq><priority>{prio}</priority></url>')
+            url = SITE_URL + url_for(endpoint)
+            mod = lastmod(max(mtime_template(template), CACHE_MEMORIA["timestamp"] if endpoint == 'index' else 0))
+            linhas.append(f'<url><loc>{url}</loc><lastmod>{mod}</lastmod><changefreq>{freq}</changefreq><priority>{prio}</priority></url>')
         except: pass
-    
-    dados = obter_dados()
-    urls_adicionadas = set()
-    for item in dados:
-        termo_limpo = item['texto'].split('-')[0].strip()
-        if len(termo_limpo) > 4 and termo_limpo not in urls_adicionadas:
-            urls_adicionadas.add(termo_limpo)
-            link_dinamico = url_for('index', _external=True) + f"?q={quote(termo_limpo)}"
-            xml_content.append(f'<url><loc>{link_dinamico}</loc><changefreq>daily</changefreq><priority>0.7</priority></url>')
-            
-    xml_content.append('</urlset>')
-    return Response('\n'.join(xml_content), mimetype="application/xml")
+    linhas.append('</urlset>')
+    return Response('\n'.join(linhas), mimetype="application/xml")
+
+@app.route('/sitemap-termos-<int:parte>.xml.gz')
+def sitemap_termos(parte):
+    conjunto = sitemaps_atuais()
+    if conjunto is None: return sem_dados_ainda()
+    if parte >= len(conjunto.partes): return Response('Parte inexistente', status=404, mimetype='text/plain')
+    resp = resposta_sitemap(conjunto.partes[parte], f"{conjunto.versao}-termos-{parte}", 'application/gzip')
+    resp.last_modified = conjunto.timestamp
+    return resp
 
 @app.route('/ping')
 @limiter.exempt
@@ -341,56 +660,266 @@ def ping():
 @limiter.limit("20 per minute") 
 def api_link_profundo():
     data = request.json or {}
-    return jsonify({'url': extrair_link_final(data.get('url', ''), data.get('tipo', 'edital'))})
+    url = data.get('url', '')
+    return jsonify({'url': resolvedor_links.resolver(url, data.get('tipo', 'edital')) if url else url})
 
-@app.route('/api/buscar', methods=['POST'])
-@limiter.limit("60 per minute")
-def api_buscar():
-    data = request.json or {}
-    
+# --- PAGINAÇÃO ---
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 100
+
+def codificar_cursor(versao, inicio):
+    return base64.urlsafe_b64encode(f"{versao}:{inicio}".encode()).decode().rstrip('=')
+
+def decodificar_cursor(cursor):
+    """Retorna (versao, inicio) ou None se o cursor for inválido."""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        versao, inicio = bruto.rsplit(':', 1)
+        return versao, max(0, int(inicio))
+    except: return None
+
+def extrair_filtros(data):
+    """Normaliza o payload da busca em (s_min, palavras, ufs, excluir, niveis, bancas)."""
     # Tratamento de Salário
     try: 
-        import re
         s_raw = str(data.get('salario_minimo', ''))
         s_clean = re.sub(r'[^\d,]', '', s_raw)
         s_min = float(s_clean.replace(',', '.')) if s_clean else 0.0
     except: s_min = 0.0
 
-    # Coleta de Filtros
     palavras = [p.strip() for p in data.get('palavra_chave', '').split(',') if p.strip()]
     excluir = [p.strip() for p in data.get('excluir_palavra', '').split(',') if p.strip()]
+    bancas = [p.strip() for p in data.get('banca', '').split(',') if p.strip()]
+
+    # Expande Regiões para UFs
+    ufs_set = set(data.get('ufs', []))
+    for reg in data.get('regioes', []):
+        if reg == 'Nacional': ufs_set.add('Nacional/Outro')
+        elif reg in REGIOES: ufs_set.update(REGIOES[reg])
+    return s_min, palavras, list(ufs_set), excluir, data.get('niveis', []), bancas
+
+def versao_do_repositorio(versao):
+    """Snapshot de uma versão que este worker ainda não tem em VERSOES_RECENTES.
+
+    Os workers trocam de versão em momentos diferentes (o atualizador confere
+    a cada 30s): um cursor emitido por quem já publicou a versão nova pode
+    chegar aqui antes da troca. O diretório guarda as mesmas MANTER versões.
+    """
+    snap = repositorio.abrir_versao(versao)
+    if snap is None: return None
+    snap = VERSOES_RECENTES.setdefault(versao, snap)  # o mesmo objeto a cada página: o índice é reaproveitado
+    while len(VERSOES_RECENTES) > MAX_VERSOES_RECENTES: VERSOES_RECENTES.popitem(last=False)
+    return snap
+
+def extrair_ordem(data):
+    """None (ordem da lista) ou a tupla de boosts da busca por relevância (ordem=relevancia)."""
+    if data.get('ordem') != 'relevancia': return None
+    boosts = data.get('boost') or []
+    if isinstance(boosts, str): boosts = boosts.split(',')
+    return tuple(sorted({b.strip() for b in boosts} & set(BOOSTS)))
+
+def codificar_json(obj):
+    with metricas.medir('json'):
+        return app.json.dumps(obj).encode('utf-8')
+
+def resposta_cacheada(item, mimetype='application/json'):
+    """Serve o corpo pronto do cache, já comprimido se o cliente aceitar gzip."""
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        resp = Response(item.gzip(), mimetype=mimetype)
+        resp.headers['Content-Encoding'] = 'gzip'  # Flask-Compress não recomprime
+    else:
+        resp = Response(item.corpo, mimetype=mimetype)
+    resp.vary.add('Accept-Encoding')
+    return resp
+
+# Cabeçalhos da busca via GET: os dados só mudam quando o scraper publica outra versão
+CACHE_CONTROL_BUSCA = 'public, max-age=300, s-maxage=600, stale-while-revalidate=3600'
+
+def payload_da_query(args):
+    """Converte a query string canônica (a mesma que o front grava via pushState) no payload da busca."""
+    def lista(nome): return sorted(v for v in args.get(nome, '').split(',') if v)
+    data = {
+        'palavra_chave': args.get('q', ''),
+        'salario_minimo': args.get('salario', ''),
+        'excluir_palavra': args.get('excluir', ''),
+        'banca': args.get('banca', ''),
+        'ufs': lista('uf'),
+        'regioes': lista('regiao'),
+        'niveis': lista('nivel'),
+    }
+    if args.get('ordem'): data['ordem'] = args.get('ordem')
+    if args.get('boost'): data['boost'] = args.get('boost')
+    if 'limit' in args: data['limit'] = args.get('limit')
+    if 'cursor' in args: data['cursor'] = args.get('cursor')
+    return data
+
+def etag_busca(chave):
+    """ETag forte: muda se e somente se a versão dos dados ou os filtros canônicos mudarem."""
+    return f"{chave[0]}-{hashlib.sha1(repr(chave[1:]).encode('utf-8')).hexdigest()[:16]}"
+
+@app.route('/api/buscar', methods=['GET', 'POST'])
+@limiter.limit("60 per minute")
+def api_buscar():
+    via_get = request.method == 'GET'
+    data = payload_da_query(request.args) if via_get else (request.json or {})
+    cursor = data.get('cursor')
+    paginado = cursor is not None or data.get('limit') is not None
+
+    filtros = extrair_filtros(data)
+    ordem = extrair_ordem(data)
+
+    # Verifica se há busca ativa para salvar no Sheets (só na primeira página)
     ufs_list = data.get('ufs', [])
     regioes_list = data.get('regioes', [])
     niveis_list = data.get('niveis', [])
+    tem_filtro = any([data.get('palavra_chave'), data.get('salario_minimo'), ufs_list, regioes_list, filtros[3], niveis_list, filtros[5]])
     
-    # Verifica se há busca ativa para salvar no Sheets
-    tem_filtro = any([data.get('palavra_chave'), data.get('salario_minimo'), ufs_list, regioes_list, excluir, niveis_list])
-    
-    if tem_filtro:
+    if tem_filtro and not cursor:
         payload_sheets = {
             'palavra_chave': data.get('palavra_chave', ''),
             'salario_minimo': data.get('salario_minimo', ''),
             'regioes': regioes_list,
             'ufs': ufs_list,
             'niveis': niveis_list,
-            'excluir_palavra': data.get('excluir_palavra', '')
+            'excluir_palavra': data.get('excluir_palavra', ''),
+            'banca': data.get('banca', '')
         }
-        # Dispara thread separada para não travar a resposta
-        threading.Thread(target=salvar_busca_completa_sheets, args=(payload_sheets,)).start()
+        # Só enfileira: o envio (Sheets) e a gravação local acontecem em lote, fora do request
+        salvar_busca_completa_sheets(payload_sheets)
+        registro_leads.registrar_busca(campos_busca(payload_sheets))
+
+    obter_dados()
+    estado = CACHE_MEMORIA
+    todos, versao = estado["dados"], estado["versao"]
+    pagina = None
+
+    if paginado:
+        try: limite = min(max(int(data.get('limit') or LIMITE_PADRAO), 1), LIMITE_MAXIMO)
+        except (TypeError, ValueError): limite = LIMITE_PADRAO
+
+        # O cursor prende a paginação à versão dos dados em que a busca começou
+        inicio = 0
+        if cursor:
+            decodificado = decodificar_cursor(cursor)
+            if not decodificado: return jsonify({'error': 'Cursor inválido'}), 400
+            versao, inicio = decodificado
+            todos = VERSOES_RECENTES.get(versao) or versao_do_repositorio(versao)
+            if todos is None: return jsonify({'error': 'Cursor expirado', 'versao': estado["versao"]}), 410
+        pagina = (inicio, limite)
+
+    chave = chave_busca(versao, filtros, pagina, ordem)
+
+    # 304 sai antes de qualquer busca ou serialização
+    etag = etag_busca(chave) if via_get else None
+    if etag and request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = CACHE_CONTROL_BUSCA
+        return resp
+
+    item = cache_busca.obter(chave)
+    if item is None:
+        # Com BUSCA_SQL, o filtro roda no SQLite se ele tem a mesma versão (relevância continua no índice)
+        if BUSCA_SQL and armazem and ordem is None and armazem.versao() == versao: todos = armazem
+        if pagina is None:
+            # Contrato antigo: lista completa
+            with metricas.medir('busca', modo='lista'):
+                corpo = filtrar_concursos(todos, *filtros, ordem=ordem)
+        else:
+            with metricas.medir('busca', modo='pagina' if ordem is None else 'relevancia'):
+                total, itens = paginar_concursos(todos, *filtros, inicio=inicio, limite=limite, ordem=ordem)
+            fim = inicio + len(itens)
+            corpo = {
+                'itens': itens,
+                'total': total,
+                'versao': versao,
+                'cursor': codificar_cursor(versao, fim) if fim < total else None
+            }
+        item = cache_busca.guardar(chave, codificar_json(corpo))
+
+    resp = resposta_cacheada(item)
+    if etag:
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = CACHE_CONTROL_BUSCA
+    return resp
+
+@app.route('/api/facetas')
+@limiter.limit("60 per minute")
+def api_facetas():
+    """Contagens por UF, região, nível e faixa de salário para os filtros da query (mesma de /api/buscar)."""
+    filtros = extrair_filtros(payload_da_query(request.args))
+    obter_dados()
+    estado = CACHE_MEMORIA
+    chave = chave_busca(estado["versao"], filtros, 'facetas')
+    etag = etag_busca(chave)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        item = cache_busca.obter(chave)
+        if item is None:
+            with metricas.medir('busca', modo='facetas'):
+                facetas = obter_indice(estado["dados"]).facetas(*filtros)
+            item = cache_busca.guardar(chave, codificar_json(facetas))
+        resp = resposta_cacheada(item)
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = CACHE_CONTROL_BUSCA
+    return resp
+
+@app.route('/api/sugestoes')
+@limiter.limit("240 per minute")  # chamada a cada tecla (com debounce no front)
+def api_sugestoes():
+    """Completações do que está sendo digitado na busca: palavras, cargos e bancas, com quantos concursos têm cada um."""
+    prefixo = request.args.get('prefix', '')[:100]
+    try: limite = min(max(int(request.args.get('limit') or MAX_SUGESTOES), 1), MAX_SUGESTOES)
+    except ValueError: limite = MAX_SUGESTOES
+    obter_dados()
+    estado = CACHE_MEMORIA
+    etag = f"{estado['versao']}-sug-{hashlib.sha1(f'{limite}|{prefixo}'.encode('utf-8')).hexdigest()[:16]}"
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        with metricas.medir('busca', modo='sugestoes'):
+            sugestoes = obter_sugestoes(obter_indice(estado["dados"])).sugerir(prefixo, limite)
+        resp = Response(codificar_json({'prefix': prefixo, 'sugestoes': sugestoes, 'versao': estado["versao"]}),
+                        mimetype='application/json')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = CACHE_CONTROL_BUSCA
+    return resp
+
+@app.route('/api/novidades')
+@limiter.limit("60 per minute")
+def api_novidades():
+    """O que entrou, saiu ou mudou na versão atual em relação à anterior."""
+    obter_dados()
+    estado = CACHE_MEMORIA
+    todos, versao = estado["dados"], estado["versao"]
+    etag = f"{versao}-novidades"
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+
+    chave = (versao, 'novidades')
+    item = cache_busca.obter(chave)
+    if item is None:
+        diff = repositorio.ler_diff(versao)
+        if diff is None: return jsonify({'error': 'Sem diff para esta versão', 'versao': versao}), 404
+        indice = obter_indice(todos)
+        posicao = posicoes_por_link(todos)
+        def linhas(links): return [indice.linha(posicao[l]) for l in links if l in posicao]
+        corpo = {
+            'versao': versao,
+            'anterior': diff.get('anterior'),
+            'adicionados': linhas(diff['adicionados']),
+            'alterados': linhas(diff['alterados']),
+            'removidos': diff['removidos'],
+        }
+        item = cache_busca.guardar(chave, codificar_json(corpo))
 
-    # Expande Regiões para UFs
-    ufs_set = set(ufs_list)
-    for reg in regioes_list:
-        if reg == 'Nacional': ufs_set.add('Nacional/Outro')
-        elif reg in REGIOES: ufs_set.update(REGIOES[reg])
-    
-    # Executa Filtro
-    todos = obter_dados()
-    
-    # Chamada corrigida (sem quebras de linha que causam SyntaxError)
-    res = filtrar_concursos(todos, s_min, palavras, list(ufs_set), excluir, niveis_list)
-    
-    return jsonify(res)
+    resp = resposta_cacheada(item)
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = CACHE_CONTROL_BUSCA
+    return resp
 
 @app.route('/api/reportar', methods=['POST'])
 @limiter.limit("10 per minute")
@@ -398,7 +927,7 @@ def api_reportar():
     data = request.json or {}
     texto = data.get('texto', '').strip()
     if texto:
-        threading.Thread(target=salvar_report_sheets, args=(texto,)).start()
+        salvar_report_sheets(texto)
     return jsonify({'message': 'Reportado'})
 
 @app.route('/api/newsletter', methods=['POST'])
@@ -408,15 +937,52 @@ def api_newsletter():
     email = data.get('email', '').strip()
     if not email or '@' not in email: return jsonify({'error': 'E-mail inválido'}), 400
     
-    # Salva localmente e no Sheets
-    try:
-        with open(LEADS_FILE, 'a', encoding='utf-8') as f:
-            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {email}\n")
-    except: pass
-    
-    threading.Thread(target=salvar_lead_sheets, args=(email,)).start()
+    # Salva localmente e, se o e-mail é novo, no Sheets
+    try: novo = registro_leads.cadastrar(email)
+    except Exception as e:
+        print(f"--> [LEADS] Falha ao gravar: {e}")
+        novo = True  # sem o banco, o Sheets ainda guarda o lead
+    if novo: salvar_lead_sheets(email)
+    # Alerta da busca atual só se a pessoa marcou a opção (e ainda passa pela confirmação por e-mail)
+    if data.get('alerta') is True and isinstance(data.get('filtros'), dict):
+        try: criar_alerta(email, data['filtros'])
+        except ValueError: pass  # busca sem filtros: fica só o cadastro na newsletter
     return jsonify({'message': 'Sucesso!'})
 
+def criar_alerta(email, payload):
+    """Salva a busca como alerta pendente e manda o link de confirmação; ValueError se a busca não filtra nada."""
+    a, nova = assinaturas.assinar(email, extrair_filtros(payload))
+    if nova:
+        try: motor_alertas.pedir_confirmacao(a)
+        except Exception as e: print(f"--> [ALERTAS] Falha ao pedir confirmação para {a.email}: {e}")
+    return a
+
+@app.route('/api/alertas', methods=['POST'])
+@limiter.limit("5 per minute")
+def api_alertas():
+    """Salva a busca (mesmo payload do /api/buscar) como alerta para o e-mail, após confirmação."""
+    data = request.json or {}
+    email = data.get('email', '').strip()
+    if not email or '@' not in email: return jsonify({'error': 'E-mail inválido'}), 400
+    try: criar_alerta(email, data)
+    except ValueError: return jsonify({'error': 'Escolha ao menos um filtro para o alerta'}), 400
+    # O token só vai por e-mail: quem pediu precisa ser dono da caixa para confirmar ou cancelar
+    return jsonify({'message': 'Enviamos um link de confirmação para o seu e-mail.'})
+
+@app.route('/api/alertas/confirmar')
+@limiter.limit("20 per minute")
+def api_alertas_confirmar():
+    if not assinaturas.confirmar(request.args.get('token', '')):
+        return jsonify({'error': 'Alerta não encontrado'}), 404
+    return jsonify({'message': 'Alerta confirmado!'})
+
+@app.route('/api/alertas/cancelar')
+@limiter.limit("20 per minute")
+def api_alertas_cancelar():
+    if not assinaturas.cancelar(request.args.get('token', '')):
+        return jsonify({'error': 'Alerta não encontrado'}), 404
+    return jsonify({'message': 'Alerta cancelado.'})
+
 if __name__ == '__main__':
     try: locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
     except: pass
@@ -0,0 +1,119 @@
+"""Custo do estado compartilhado entre workers: contadores do limiter e cache de páginas.
+
+Uso: python benchmarks/bench_compartilhado.py [--operacoes 20000] [--processos 4] [--sem-salvar]
+                                              [--comparar resultados/compartilhado-....json]
+
+Backends: memory:// e SimpleCache (o que cada worker tinha antes, por processo),
+o SQLite de services/compartilhado.py (num diretório temporário em /dev/shm,
+se existir, como em produção) e o Redis, se REDIS_URL estiver definido.
+
+  hit        um FixedWindowRateLimiter.hit, o que o flask-limiter faz por limite
+             aplicado em cada request
+  cache_get  cache.get de uma página guardada (~20 KB), como o @cache.cached
+  cache_set  cache.set da mesma página
+  disputa    `--processos` processos batendo no mesmo contador ao mesmo tempo:
+             latência por hit, vazão somada e se a contagem final fechou
+             (nenhum incremento perdido)
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from comum import percentis, salvar_resultado, comparar
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from flask_caching.backends.simplecache import SimpleCache
+from services.compartilhado import CacheSQLite
+
+PAGINA = ('<p>' + 'concurso ' * 2000 + '</p>').encode('utf-8')  # ~20 KB, o tamanho de /sobre
+
+
+def backends(diretorio):
+    """(nome, storage_uri do limiter, fábrica do cache) de cada backend disponível aqui."""
+    arquivo = os.path.join(diretorio, 'compartilhado.db')
+    lista = [('memoria', 'memory://', lambda: SimpleCache()),
+             ('sqlite', f'sqlite://{arquivo}', lambda: CacheSQLite(arquivo))]
+    if os.environ.get('REDIS_URL'):
+        from flask_caching.backends.rediscache import RedisCache
+        lista.append(('redis', os.environ['REDIS_URL'], lambda: RedisCache.factory(
+            None, {'CACHE_REDIS_URL': os.environ['REDIS_URL']}, [], {})))
+    return lista
+
+
+def medir_operacao(funcao, n):
+    tempos = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        funcao(i)
+        tempos.append(time.perf_counter() - t0)
+    return percentis(tempos)
+
+
+def _disputar(uri, n, chave, fila):
+    limitador, limite = FixedWindowRateLimiter(storage_from_string(uri)), parse('1000000000 per hour')
+    tempos = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        limitador.hit(limite, chave)
+        tempos.append(time.perf_counter() - t0)
+    fila.put(tempos)
+
+
+def medir_disputa(uri, processos, n):
+    chave = f'disputa-{time.time()}'
+    fila = multiprocessing.Queue()
+    ps = [multiprocessing.Process(target=_disputar, args=(uri, n, chave, fila)) for _ in range(processos)]
+    t0 = time.perf_counter()
+    for p in ps: p.start()
+    tempos = [t for _ in ps for t in fila.get()]
+    for p in ps: p.join()
+    segundos = time.perf_counter() - t0
+    contagem = storage_from_string(uri).get(parse('1000000000 per hour').key_for(chave))
+    return dict(percentis(tempos), hits_por_s=round(processos * n / segundos), contagem=contagem,
+                esperado=processos * n)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--operacoes', type=int, default=20000)
+    ap.add_argument('--processos', type=int, default=4)
+    ap.add_argument('--comparar')
+    ap.add_argument('--sem-salvar', action='store_true')
+    args = ap.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix='bench-compartilhado-', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    resultado = {}
+    try:
+        for nome, uri, fabrica in backends(diretorio):
+            limitador, limite = FixedWindowRateLimiter(storage_from_string(uri)), parse('60 per minute')
+            cache = fabrica()
+            cache.set('pagina', PAGINA, timeout=3600)
+            r = resultado[nome] = {
+                'hit': medir_operacao(lambda i: limitador.hit(limite, f'ip-{i % 500}'), args.operacoes),
+                'cache_get': medir_operacao(lambda i: cache.get('pagina'), args.operacoes),
+                'cache_set': medir_operacao(lambda i: cache.set(f'pagina-{i % 100}', PAGINA, timeout=3600),
+                                            args.operacoes // 4),
+            }
+            if nome != 'memoria':  # memory:// é por processo: não há o que disputar
+                r['disputa'] = medir_disputa(uri, args.processos, args.operacoes // args.processos)
+            print(f"--> [BENCH] {nome}")
+            for etapa, valores in r.items():
+                extra = f"  {valores['hits_por_s']}/s, contagem {valores['contagem']}/{valores['esperado']}" \
+                    if 'contagem' in valores else ''
+                print(f"    {etapa:<10} p50 {valores['p50_ms']:>7.3f} ms  p99 {valores['p99_ms']:>7.3f} ms{extra}")
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    if args.comparar: comparar(resultado, args.comparar)
+    if not args.sem_salvar: salvar_resultado('compartilhado', resultado)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Memória por concurso: lista de dicts (antes) x catálogo compacto (depois).
+
+Uso: python benchmarks/bench_memoria.py [arquivo.html] [--tamanhos 1000,10000]
+
+"antes" é o que ficava em CACHE_MEMORIA: a lista de dicts da raspagem mais
+o índice de busca com uma linha de saída pronta por concurso. "depois" é o
+catálogo compacto (mesmo formato do snapshot) com o índice anexado. Tudo
+medido com tracemalloc; o catálogo é contado inteiro no heap, como se não
+houvesse arquivo mapeado (no servidor o snapshot fica no page cache,
+compartilhado entre os workers).
+"""
+import os
+import sys
+import argparse
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from comum import FIXTURE, catalogo_sintetico
+from services.listagem import extrair_blocos
+from services.scraper import enriquecer_blocos
+from services.indice import IndiceBusca, linha_saida
+from services.snapshot import catalogo_em_memoria
+
+
+def medir(funcao):
+    """Bytes que continuam alocados depois de `funcao()` (o resultado é mantido vivo)."""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    resultado = funcao()
+    usado = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return usado, resultado
+
+
+def antes(lista):
+    # Cópia profunda: mede a lista como a raspagem entregava (strings e sets próprios de cada item)
+    copia = [dict(item, tokens=set(item['tokens']), niveis=set(item['niveis']), bancas=set(item['bancas']),
+                  texto=''.join(item['texto']), texto_normalized=''.join(item['texto_normalized']),
+                  uf=str(item['uf']), data_fim=str(item['data_fim']), salario_formatado=str(item['salario_formatado']))
+             for item in lista]
+    indice = IndiceBusca(copia)
+    linhas = [linha_saida(item) for item in copia]  # o índice antigo montava todas as linhas de saída
+    return copia, indice, linhas
+
+
+def depois(lista):
+    catalogo = catalogo_em_memoria(lista, 0.0)
+    return catalogo, IndiceBusca(catalogo)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('arquivo', nargs='?', default=FIXTURE)
+    ap.add_argument('--tamanhos', default='1000,10000')
+    args = ap.parse_args()
+
+    with open(args.arquivo, encoding='utf-8') as f:
+        blocos = extrair_blocos(f.read())
+    hoje = datetime.now().date()
+    print(f"--> [BENCH] Memória por concurso ({len(blocos)} blocos na página)")
+    print(f"    {'concursos':>10} {'antes':>12} {'depois':>12} {'redução':>8}")
+    for n in [int(t) for t in args.tamanhos.split(',') if t.strip()]:
+        lista = enriquecer_blocos(catalogo_sintetico(blocos, n), hoje)[0]
+        if not lista: continue
+        b_antes, _ = medir(lambda: antes(lista))
+        b_depois, _ = medir(lambda: depois(lista))
+        total = len(lista)
+        print(f"    {total:>10} {b_antes / total:>10.0f} B {b_depois / total:>10.0f} B {b_antes / b_depois:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Tempo de parsing da página de listagem: laço antigo x extrair_blocos (cada parser).
+
+Uso: python benchmarks/bench_parser.py [arquivo.html] [--repeticoes N]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from services.listagem import extrair_blocos
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pciconcursos.html')
+
+
+def blocos_antigos(html, parser='html.parser'):
+    """Laço original: get_text em toda div com classe, dedup do link depois."""
+    soup = BeautifulSoup(html, parser)
+    saida, links_processados = [], set()
+    for item in soup.find_all('div', attrs={'class': True}):
+        try:
+            link_tag = item.find('a')
+            if not link_tag: continue
+            texto = item.get_text(" ", strip=True)
+            link = link_tag['href']
+            if link in links_processados or len(texto) < 20: continue
+            if not link.startswith('http') and not link.startswith('/'): continue
+            links_processados.add(link)
+            saida.append((texto, link))
+        except: continue
+    return saida
+
+
+def medir(funcao, html, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao(html)
+        tempos.append(time.perf_counter() - t0)
+    return min(tempos), resultado
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('arquivo', nargs='?', default=FIXTURE)
+    ap.add_argument('--repeticoes', type=int, default=5)
+    args = ap.parse_args()
+
+    with open(args.arquivo, encoding='utf-8') as f:
+        html = f.read()
+
+    parsers = ['stream', 'html.parser']
+    try:
+        import lxml  # noqa: F401
+        parsers.append('lxml')
+    except ImportError:
+        pass
+
+    print(f"--> [BENCH] {os.path.basename(args.arquivo)}: {len(html) / 1024:.0f} KiB, melhor de {args.repeticoes}")
+    t_antes, ref = medir(blocos_antigos, html, args.repeticoes)
+    print(f"    antes  (html.parser): {t_antes * 1000:8.1f} ms  {len(ref)} blocos")
+    for parser in parsers:
+        t, blocos = medir(lambda h: extrair_blocos(h, parser), html, args.repeticoes)
+        igual = 'idêntico' if blocos == ref else 'DIFERENTE do html.parser'
+        print(f"    depois ({parser}): {t * 1000:8.1f} ms  {len(blocos)} blocos  {t_antes / t:4.1f}x  {igual}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Suíte de benchmarks do caminho dos dados: parse, enriquecimento, índice, busca e snapshot.
+
+Uso: python benchmarks/bench_suite.py [--tamanhos 1000,10000,100000] [--consultas 500]
+                                      [--comparar resultados/suite-....json] [--sem-salvar]
+
+Para cada tamanho de catálogo sintético (ver comum.py):
+  parse          extrair_blocos numa página com todos os concursos
+  enriquecimento enriquecer_blocos (montar_registro de cada bloco)
+  snapshot       serializar + publicar no disco, e mapear de volta (como um worker que sobe)
+  indice         IndiceBusca novo montado da lista de dicts (o custo que o serializar
+                 paga) e anexado ao catálogo mapeado (o que um worker paga ao abrir o
+                 snapshot, já que as seções do índice vêm prontas nele)
+  busca          latência de paginar_concursos (primeira página), da mesma página por
+                 relevância (com boosts de salário e prazo) e de filtrar_concursos (lista
+                 completa) para a mistura de consultas, sem cache de respostas
+  sugestoes      /api/sugestoes sem HTTP: cada prefixo das palavras da mistura, como
+                 quem digita letra por letra
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from comum import (blocos_fixture, catalogo_sintetico, html_listagem, sortear_consultas, percentis,
+                   salvar_resultado, comparar)
+from services.listagem import extrair_blocos
+from services.scraper import enriquecer_blocos, filtrar_concursos, paginar_concursos
+from services.snapshot import RepositorioSnapshots, serializar
+from services.indice import IndiceBusca, obter_indice
+from services.sugestoes import obter_sugestoes
+
+
+def cronometrar(funcao, *args):
+    t0 = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - t0, resultado
+
+
+def medir_tamanho(blocos_base, n, consultas, diretorio):
+    r = {}
+    blocos = catalogo_sintetico(blocos_base, n)
+    html = html_listagem(blocos)
+    t, extraidos = cronometrar(extrair_blocos, html)
+    r['parse'] = {'segundos': round(t, 4), 'blocos': len(extraidos), 'mb_por_s': round(len(html) / t / 1e6, 2)}
+    del html
+
+    t, (lista, _, _) = cronometrar(enriquecer_blocos, extraidos, datetime.now().date())
+    r['enriquecimento'] = {'segundos': round(t, 4), 'concursos': len(lista), 'us_por_concurso': round(t / len(lista) * 1e6, 2)}
+
+    t_idx, _ = cronometrar(IndiceBusca, lista)  # sempre um índice novo: obter_indice poderia vir do cache
+    t_ser, conteudo = cronometrar(serializar, lista, time.time())
+    repositorio = RepositorioSnapshots(diretorio)
+    t_pub, _ = cronometrar(repositorio.publicar, lista, time.time())
+    del lista
+    t_abrir, catalogo = cronometrar(RepositorioSnapshots(diretorio).abrir_atual)
+    t_anexar, _ = cronometrar(IndiceBusca, catalogo)
+    obter_indice(catalogo)  # fica em cache para as buscas abaixo
+    r['snapshot'] = {'serializar_s': round(t_ser, 4), 'publicar_s': round(t_pub, 4), 'abrir_s': round(t_abrir, 5),
+                     'bytes_por_concurso': round(len(conteudo) / len(catalogo), 1)}
+    r['indice'] = {'segundos': round(t_idx, 4), 'anexar_s': round(t_anexar, 5),
+                   'pronto_para_servir_s': round(t_abrir + t_anexar, 4)}
+
+    pagina, relevancia, lista_completa, totais = [], [], [], 0
+    for filtros in consultas:
+        t, (total, _) = cronometrar(lambda: paginar_concursos(catalogo, *filtros, inicio=0, limite=20))
+        pagina.append(t)
+        totais += total
+    for filtros in consultas:
+        t, _ = cronometrar(lambda: paginar_concursos(catalogo, *filtros, inicio=0, limite=20, ordem=('prazo', 'salario')))
+        relevancia.append(t)
+    for filtros in consultas[:max(20, len(consultas) // 10)]:
+        t, _ = cronometrar(filtrar_concursos, catalogo, *filtros)
+        lista_completa.append(t)
+    sugestoes = obter_sugestoes(obter_indice(catalogo))
+    prefixos = [f[1][0][:n] for f in consultas if f[1] for n in range(1, len(f[1][0]) + 1)]
+    tempos = []
+    for prefixo in prefixos:
+        t, _ = cronometrar(sugestoes.sugerir, prefixo, 8)
+        tempos.append(t)
+    r['sugestoes'] = percentis(tempos)
+    r['busca'] = {'pagina': percentis(pagina), 'relevancia': percentis(relevancia), 'lista_completa': percentis(lista_completa),
+                  'resultados_medios': round(totais / len(consultas), 1)}
+    return r
+
+
+def imprimir(n, r):
+    print(f"--> [BENCH] {n} concursos")
+    print(f"    parse          {r['parse']['segundos'] * 1000:9.1f} ms  ({r['parse']['mb_por_s']} MB/s)")
+    print(f"    enriquecimento {r['enriquecimento']['segundos'] * 1000:9.1f} ms  ({r['enriquecimento']['us_por_concurso']} us/concurso)")
+    s = r['snapshot']
+    print(f"    snapshot       {s['publicar_s'] * 1000:9.1f} ms publicar, {s['abrir_s'] * 1000:.2f} ms abrir, "
+          f"{s['bytes_por_concurso']} B/concurso")
+    print(f"    indice         {r['indice']['segundos'] * 1000:9.1f} ms montar, {r['indice']['anexar_s'] * 1000:.2f} ms anexar")
+    for modo in ('pagina', 'relevancia', 'lista_completa'):
+        p = r['busca'][modo]
+        print(f"    busca {modo:<14} p50 {p['p50_ms']:.3f} ms  p90 {p['p90_ms']:.3f} ms  p99 {p['p99_ms']:.3f} ms  (n={p['n']})")
+    p = r['sugestoes']
+    print(f"    sugestoes      p50 {p['p50_ms']:.3f} ms  p90 {p['p90_ms']:.3f} ms  p99 {p['p99_ms']:.3f} ms  (n={p['n']})")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tamanhos', default='1000,10000,100000')
+    ap.add_argument('--consultas', type=int, default=500)
+    ap.add_argument('--comparar', help='resultado JSON de uma execução anterior')
+    ap.add_argument('--sem-salvar', action='store_true')
+    args = ap.parse_args()
+
+    blocos_base = blocos_fixture()
+    consultas = sortear_consultas(args.consultas)
+    resultado = {'consultas': args.consultas, 'tamanhos': {}}
+    for n in [int(t) for t in args.tamanhos.split(',') if t.strip()]:
+        diretorio = tempfile.mkdtemp(prefix='bench-snapshot-')
+        try:
+            r = resultado['tamanhos'][str(n)] = medir_tamanho(blocos_base, n, consultas, diretorio)
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
+        imprimir(n, r)
+
+    if not args.sem_salvar: salvar_resultado('suite', resultado)
+    if args.comparar: comparar(resultado, args.comparar)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Teste de carga: /api/buscar, / e /sitemap.xml contra o app Flask, sem tocar a rede.
+
+Uso: python benchmarks/carga.py [--concursos 10000] [--clientes 8] [--duracao 20]
+                                [--mistura buscar=70,index=20,sitemap=10] [--atraso-fonte 50]
+                                [--alvo http://127.0.0.1:8000] [--comparar resultados/carga-....json]
+
+Sobe no mesmo processo:
+  - a fonte falsa: servidor_fixture servindo páginas sintéticas com `--concursos`
+    concursos (PCI_URLS aponta para ela), com ETag/304 e latência opcional;
+  - um gspread falso (mesma API que o BackendGspread usa), com latência por lote,
+    para as buscas registradas no Sheets passarem pelo escritor em lote de verdade;
+  - o app num servidor WSGI com threads, SNAPSHOT_DIR temporário e limiter desligado
+    (todo o tráfego vem de um IP só).
+
+Com --alvo o app não sobe: a carga vai para um servidor já rodando (ex.: gunicorn
+com PCI_URLS apontando para `python benchmarks/servidor_fixture.py`).
+O resultado (percentis por rota, vazão, erros, métricas do servidor) vai para
+benchmarks/resultados/carga-<data>.json.
+"""
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from comum import blocos_fixture, catalogo_sintetico, escrever_paginas, sortear_consultas, query_de, percentis, \
+    salvar_resultado, comparar
+from servidor_fixture import iniciar_servidor
+
+TOKEN_METRICAS = 'carga'
+
+
+# --- GSPREAD FALSO ---
+class _AbaFalsa:
+    def __init__(self, planilha, nome):
+        self.planilha, self.nome = planilha, nome
+
+    def append_rows(self, linhas, value_input_option=None):
+        time.sleep(self.planilha.latencia)
+        with self.planilha.lock:
+            self.planilha.linhas[self.nome] = self.planilha.linhas.get(self.nome, 0) + len(linhas)
+            self.planilha.lotes += 1
+
+
+class _PlanilhaFalsa:
+    def __init__(self, latencia):
+        self.latencia = latencia
+        self.lock = threading.Lock()
+        self.linhas, self.lotes = {}, 0
+        self.sheet1 = _AbaFalsa(self, 'sheet1')
+
+    def worksheet(self, nome): return _AbaFalsa(self, nome)
+
+
+class GspreadFalso:
+    """Faz o papel do módulo gspread: authorize(creds).open(nome) -> planilha em memória."""
+
+    def __init__(self, latencia=0.3):
+        self.planilha = _PlanilhaFalsa(latencia)
+
+    def authorize(self, creds): return self
+
+    def open(self, nome): return self.planilha
+
+
+class _CredenciaisFalsas:
+    @staticmethod
+    def from_json_keyfile_dict(dados, escopo): return object()
+
+
+def subir_app(url_fonte, latencia_planilha):
+    """Importa o app já apontado para a fonte falsa e o serve numa thread; retorna (app, url)."""
+    base = tempfile.mkdtemp(prefix='carga-')
+    os.environ['PCI_URLS'] = url_fonte
+    os.environ['SNAPSHOT_DIR'] = os.path.join(base, 'dados')
+    os.environ['METRICAS_TOKEN'] = TOKEN_METRICAS
+    os.environ['ALERTAS_ASSINATURAS'] = os.path.join(base, 'alertas.jsonl')
+    os.environ['ALERTAS_ARQUIVO'] = os.path.join(base, 'alertas_enviados.jsonl')
+    from werkzeug.serving import make_server
+    from services import planilhas
+    import app as modulo_app
+
+    planilhas.gspread = GspreadFalso(latencia_planilha)
+    planilhas.ServiceAccountCredentials = _CredenciaisFalsas
+    modulo_app.escritor_planilhas.backend = planilhas.BackendGspread('{}')
+    modulo_app.limiter.enabled = False
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # uma linha de log por requisição pesa na medida
+    servidor = make_server('127.0.0.1', 0, modulo_app.app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return modulo_app, f"http://127.0.0.1:{servidor.server_port}"
+
+
+def requisicoes(mistura, semente):
+    """(rota, caminho) sem fim, sorteados pela mistura; as buscas seguem a mistura de consultas."""
+    rotas, pesos = zip(*mistura.items())
+    sorteio = random.Random(semente)
+    consultas = sortear_consultas(1000, semente)
+    while True:
+        rota = sorteio.choices(rotas, weights=pesos)[0]
+        if rota == 'buscar':
+            yield rota, '/api/buscar?' + urlencode(dict(query_de(sorteio.choice(consultas)), limit=20))
+        elif rota == 'index':
+            yield rota, '/'
+        else:
+            yield rota, '/sitemap.xml'
+
+
+def cliente(url, fila, prazo, tempos, status, lock):
+    sessao = requests.Session()
+    locais, contagem = {}, {}
+    for rota, caminho in fila:
+        if time.perf_counter() >= prazo: break
+        t0 = time.perf_counter()
+        try:
+            codigo = sessao.get(url + caminho, timeout=60).status_code
+        except Exception:
+            codigo = 'erro'
+        locais.setdefault(rota, []).append(time.perf_counter() - t0)
+        contagem[f"{rota}:{codigo}"] = contagem.get(f"{rota}:{codigo}", 0) + 1
+    with lock:
+        for rota, lista in locais.items(): tempos.setdefault(rota, []).extend(lista)
+        for chave, n in contagem.items(): status[chave] = status.get(chave, 0) + n
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--concursos', type=int, default=10000)
+    ap.add_argument('--por-pagina', type=int, default=2000)
+    ap.add_argument('--clientes', type=int, default=8)
+    ap.add_argument('--duracao', type=float, default=20.0, help='segundos de carga')
+    ap.add_argument('--mistura', default='buscar=70,index=20,sitemap=10')
+    ap.add_argument('--atraso-fonte', type=int, default=50, help='latência da fonte falsa, em ms')
+    ap.add_argument('--latencia-planilha', type=float, default=0.3, help='segundos por append_rows do gspread falso')
+    ap.add_argument('--alvo', help='URL de um servidor já rodando (não sobe o app)')
+    ap.add_argument('--comparar')
+    ap.add_argument('--sem-salvar', action='store_true')
+    args = ap.parse_args()
+    mistura = {k: int(v) for k, v in (p.split('=') for p in args.mistura.split(','))}
+
+    modulo_app = None
+    if args.alvo:
+        url = args.alvo.rstrip('/')
+    else:
+        diretorio = tempfile.mkdtemp(prefix='carga-fonte-')
+        nomes = escrever_paginas(diretorio, catalogo_sintetico(blocos_fixture(), args.concursos), args.por_pagina)
+        fonte, url_fonte = iniciar_servidor(diretorio, atraso_ms=args.atraso_fonte)
+        modulo_app, url = subir_app(','.join(url_fonte + n for n in nomes), args.latencia_planilha)
+        print(f"--> [CARGA] Fonte falsa: {len(nomes)} página(s) com {args.concursos} concursos em {url_fonte}")
+
+    t0 = time.perf_counter()
+    requests.get(url + '/api/buscar?limit=1', timeout=600)  # partida a frio: primeira raspagem/mapeamento
+    partida = time.perf_counter() - t0
+    print(f"--> [CARGA] App em {url}, pronto em {partida:.2f}s. {args.clientes} clientes por {args.duracao:.0f}s...")
+
+    tempos, status, lock = {}, {}, threading.Lock()
+    prazo = time.perf_counter() + args.duracao
+    threads = []
+    for k in range(args.clientes):
+        threads.append(threading.Thread(target=cliente, args=(url, requisicoes(mistura, k), prazo, tempos, status, lock)))
+    inicio = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    decorrido = time.perf_counter() - inicio
+
+    total = sum(len(v) for v in tempos.values())
+    resultado = {
+        'parametros': {k: v for k, v in vars(args).items() if k not in ('comparar', 'sem_salvar')},
+        'partida_a_frio_s': round(partida, 3),
+        'requisicoes': total,
+        'vazao_rps': round(total / decorrido, 1),
+        'rotas': {rota: percentis(lista) for rota, lista in tempos.items()},
+        'status': status,
+    }
+    if modulo_app is not None:
+        resultado['planilhas'] = modulo_app.escritor_planilhas.estatisticas()
+        resultado['fonte'] = {'gets': sum(fonte.contadores.values())}
+    try:
+        resultado['metricas_servidor'] = requests.get(url + '/admin/metrics', timeout=30,
+                                                      headers={'Authorization': f'Bearer {TOKEN_METRICAS}'}).text
+    except Exception:
+        pass
+
+    print(f"--> [CARGA] {total} requisições em {decorrido:.1f}s = {resultado['vazao_rps']} req/s")
+    for rota, p in resultado['rotas'].items():
+        print(f"    {rota:<8} n={p['n']:<7} p50 {p['p50_ms']:8.2f} ms  p90 {p['p90_ms']:8.2f} ms  p99 {p['p99_ms']:8.2f} ms")
+    print(f"    status: {status}")
+
+    if not args.sem_salvar: salvar_resultado('carga', resultado)
+    if args.comparar: comparar(resultado, args.comparar)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Peças comuns dos benchmarks: catálogos sintéticos, mistura de consultas e arquivos de resultado.
+
+Os catálogos de 1k/10k/100k concursos saem dos blocos da página salva em
+fixtures/ (texto e link únicos por cópia), então passam pelo mesmo
+enriquecimento da raspagem real. Os resultados vão para
+benchmarks/resultados/<nome>-<data>.json; `comparar` mostra a variação
+contra uma execução anterior.
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import subprocess
+from html import escape
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from services.listagem import extrair_blocos
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pciconcursos.html')
+RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+
+# Mistura de consultas (peso, filtros na forma de extrair_filtros):
+# a tela inicial e buscas de uma palavra dominam, combinações são raras.
+MISTURA_CONSULTAS = [
+    (20, (0.0, [], [], [], [], [])),
+    (10, (0.0, ['medico'], [], [], [], [])),
+    (8, (0.0, ['professor'], [], [], [], [])),
+    (6, (0.0, ['enfermeiro'], [], [], [], [])),
+    (6, (0.0, ['policia'], [], [], [], [])),
+    (5, (0.0, ['tecnico', 'analista'], [], [], [], [])),
+    (5, (0.0, [], ['SP'], [], [], [])),
+    (4, (0.0, [], ['RJ', 'MG', 'ES', 'SP'], [], [], [])),
+    (4, (5000.0, [], [], [], [], [])),
+    (4, (0.0, [], [], [], ['superior'], [])),
+    (3, (0.0, [], [], [], [], ['fgv'])),
+    (3, (3000.0, ['administrativo'], ['SP'], [], ['medio'], [])),
+    (2, (0.0, ['prefeitura'], [], ['estagio', 'temporario'], [], [])),
+    (2, (10000.0, ['auditor', 'fiscal'], [], [], ['superior'], ['cebraspe'])),
+    (1, (0.0, ['guarda municipal'], ['Nacional/Outro'], [], [], [])),
+    (1, (0.0, ['xyzinexistente'], [], [], [], [])),
+]
+
+
+def blocos_fixture(arquivo=FIXTURE):
+    with open(arquivo, encoding='utf-8') as f:
+        return extrair_blocos(f.read())
+
+
+def catalogo_sintetico(blocos, n):
+    """`n` blocos a partir dos da página, com texto e link únicos."""
+    saida = []
+    for k in range(n):
+        texto, link = blocos[k % len(blocos)]
+        saida.append((f"{texto} ({k})", f"{link}?k={k}"))
+    return saida
+
+
+def html_listagem(blocos):
+    """Página mínima que o extrator lê de volta como os mesmos (texto, link)."""
+    partes = ['<html><head><meta charset="utf-8"></head><body>']
+    for texto, link in blocos:
+        partes.append(f'<div class="ca"><a href="{escape(link)}">{escape(texto)}</a></div>')
+    partes.append('</body></html>')
+    return '\n'.join(partes)
+
+
+def escrever_paginas(diretorio, blocos, por_pagina=2000):
+    """Divide `blocos` em páginas HTML no diretório; retorna os nomes dos arquivos."""
+    os.makedirs(diretorio, exist_ok=True)
+    nomes = []
+    for i in range(0, max(len(blocos), 1), por_pagina):
+        nome = f"listagem-{i // por_pagina:03d}.html"
+        with open(os.path.join(diretorio, nome), 'w', encoding='utf-8') as f:
+            f.write(html_listagem(blocos[i:i + por_pagina]))
+        nomes.append(nome)
+    return nomes
+
+
+def sortear_consultas(n, semente=42):
+    """`n` filtros sorteados da mistura (sempre a mesma sequência para a mesma semente)."""
+    pesos, consultas = zip(*MISTURA_CONSULTAS)
+    return random.Random(semente).choices(consultas, weights=pesos, k=n)
+
+
+def query_de(filtros):
+    """Filtros -> query string de /api/buscar (a mesma que o front monta)."""
+    s_min, palavras, ufs, excluir, niveis, bancas = filtros
+    pares = {'q': ','.join(palavras), 'salario': str(int(s_min)) if s_min else '', 'uf': ','.join(ufs),
+             'excluir': ','.join(excluir), 'nivel': ','.join(niveis), 'banca': ','.join(bancas)}
+    return {k: v for k, v in pares.items() if v}
+
+
+def percentis(tempos):
+    """Segundos -> resumo em ms (p50/p90/p99/máx/média)."""
+    if not tempos: return {}
+    ordenados = sorted(tempos)
+    def p(q): return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))] * 1000
+    return {'n': len(ordenados), 'p50_ms': round(p(0.50), 3), 'p90_ms': round(p(0.90), 3),
+            'p99_ms': round(p(0.99), 3), 'max_ms': round(ordenados[-1] * 1000, 3),
+            'media_ms': round(sum(ordenados) / len(ordenados) * 1000, 3)}
+
+
+def metadados():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                text=True, timeout=10).stdout.strip()
+    except Exception:
+        commit = ''
+    return {'data': time.strftime('%Y-%m-%d %H:%M:%S'), 'commit': commit, 'python': platform.python_version(),
+            'maquina': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def salvar_resultado(nome, resultado, arquivo=None):
+    os.makedirs(RESULTADOS, exist_ok=True)
+    arquivo = arquivo or os.path.join(RESULTADOS, f"{nome}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        json.dump(dict(resultado, meta=metadados()), f, ensure_ascii=False, indent=2)
+    print(f"--> [BENCH] Resultado salvo em {arquivo}")
+    return arquivo
+
+
+def _folhas(obj, prefixo=''):
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k != 'meta': yield from _folhas(v, f"{prefixo}{k}.")
+    elif isinstance(obj, (int, float)) and not isinstance(obj, bool):
+        yield prefixo.rstrip('.'), obj
+
+
+def comparar(atual, arquivo_anterior):
+    """Imprime a variação de cada número em relação a uma execução salva."""
+    with open(arquivo_anterior, encoding='utf-8') as f:
+        anterior = dict(_folhas(json.load(f)))
+    print(f"--> [BENCH] Comparando com {arquivo_anterior}")
+    for chave, valor in _folhas(atual):
+        antes = anterior.get(chave)
+        if antes is None: continue
+        variacao = f"{(valor - antes) / antes * 100:+7.1f}%" if antes else '      -'
+        print(f"    {chave:<55} {antes:>12.3f} -> {valor:>12.3f}  {variacao}")
@@ -0,0 +1,83 @@
+"""Servidor HTTP local que faz o papel dos sites raspados (páginas de benchmarks/fixtures).
+
+Responde com ETag/Last-Modified e 304 para GET condicional, com latência
+opcional, então serve para exercitar o scraper inteiro sem tocar a rede:
+
+    python benchmarks/servidor_fixture.py --porta 8765 --atraso 200
+    PCI_URLS=http://127.0.0.1:8765/pciconcursos.html python app.py
+
+Cada porta é um "host" diferente para o limite por host do scraper. De
+outro script: `servidor, url = iniciar_servidor(diretorio, porta=0)`.
+"""
+import os
+import sys
+import time
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    diretorio = FIXTURES
+    atraso = 0.0
+    contadores = None
+
+    def do_GET(self):
+        caminho = os.path.normpath(os.path.join(self.diretorio, self.path.split('?')[0].lstrip('/')))
+        if not caminho.startswith(self.diretorio) or not os.path.isfile(caminho):
+            self.send_error(404)
+            return
+        if self.atraso: time.sleep(self.atraso)
+        with open(caminho, 'rb') as f: corpo = f.read()
+        etag = '"%s"' % hashlib.sha1(corpo).hexdigest()[:16]
+        with self.server.lock:
+            self.contadores[self.path] = self.contadores.get(self.path, 0) + 1
+        if etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(os.path.getmtime(caminho), usegmt=True))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args): pass
+
+
+def iniciar_servidor(diretorio=FIXTURES, porta=0, atraso_ms=0):
+    """Sobe o servidor numa thread; retorna (servidor, url base). `servidor.contadores`: GETs por caminho."""
+    manipulador = type('Manipulador', (_Manipulador,), {
+        'diretorio': os.path.abspath(diretorio), 'atraso': atraso_ms / 1000.0, 'contadores': {}})
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), manipulador)
+    servidor.daemon_threads = True
+    servidor.lock = threading.Lock()
+    servidor.contadores = manipulador.contadores
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--diretorio', default=FIXTURES)
+    ap.add_argument('--porta', type=int, default=8765)
+    ap.add_argument('--atraso', type=int, default=0, help='latência por resposta, em ms')
+    args = ap.parse_args()
+    servidor, url = iniciar_servidor(args.diretorio, args.porta, args.atraso)
+    print(f"Servindo {args.diretorio} em {url}")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,409 @@
+import os
+import json
+import time
+import secrets
+import smtplib
+import threading
+from contextlib import contextmanager
+from email.message import EmailMessage
+
+from services.texto import normalizar_texto
+from services.indice import REGEX_PALAVRA, SIGLAS_INDEXADAS, UF_NACIONAL, linha_saida
+
+# fcntl só existe em Unix; no Windows a trava do arquivo fica restrita ao processo
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MAX_ITENS_POR_AVISO = 20
+PRAZO_CONFIRMACAO = 7 * 24 * 3600  # assinatura não confirmada some na compactação depois disso
+
+
+# --- ASSINATURAS ---
+def normalizar_email(email): return (email or '').strip().lower()
+
+
+class Assinatura:
+    """Uma busca salva, já com os filtros na forma canônica da busca (extrair_filtros)."""
+
+    __slots__ = ('id', 'email', 'token', 'sal_min', 'palavras', 'ufs', 'excluir', 'niveis', 'bancas',
+                 'confirmada', 'criada')
+
+    def __init__(self, id, email, token, filtros, confirmada=False, criada=0.0):
+        s_min, palavras, ufs, excluir, niveis, bancas = filtros
+        self.id, self.email, self.token = id, normalizar_email(email), token
+        self.confirmada, self.criada = confirmada, criada
+        self.sal_min = float(s_min or 0)
+        self.palavras = sorted({normalizar_texto(p) for p in palavras})
+        self.ufs = frozenset(ufs)
+        self.excluir = frozenset(normalizar_texto(p) for p in excluir)
+        self.niveis = frozenset(niveis or ())
+        self.bancas = frozenset(normalizar_texto(b) for b in bancas)
+
+    def chave(self):
+        """(e-mail, filtros canônicos): a mesma busca salva duas vezes pelo mesmo e-mail é uma assinatura só."""
+        return (self.email, self.sal_min, tuple(self.palavras), tuple(sorted(self.ufs)), tuple(sorted(self.excluir)),
+                tuple(sorted(self.niveis)), tuple(sorted(self.bancas)))
+
+    def vazia(self):
+        """Sem nenhum filtro que restrinja (só exclusões também contam como vazia): casaria com tudo."""
+        return not (self.sal_min > 0 or (self.palavras and '' not in self.palavras) or self.ufs or self.niveis or self.bancas)
+
+    def registro(self):
+        return {'op': 'assinar', 'id': self.id, 'email': self.email, 'token': self.token, 'em': self.criada,
+                'confirmada': self.confirmada,
+                'filtros': [self.sal_min, self.palavras, sorted(self.ufs), sorted(self.excluir), sorted(self.niveis),
+                            sorted(self.bancas)]}
+
+    def casa(self, item):
+        """Mesma semântica do IndiceBusca.buscar_ids, para um concurso só."""
+        if self.sal_min > 0 and item['salario_num'] < self.sal_min: return False
+        if self.palavras and '' not in self.palavras:
+            texto_norm = item['texto_normalized']
+            if not any(p in texto_norm for p in self.palavras): return False
+        if self.ufs:
+            uf, texto = item['uf'], item['texto']
+            if uf != UF_NACIONAL and not any(s == uf or s in texto for s in self.ufs): return False
+        if self.niveis and not self.niveis & item['niveis']: return False
+        if self.bancas and not self.bancas & item['bancas']: return False
+        if self.excluir and self.excluir & item['tokens']: return False
+        return True
+
+
+class RepositorioAssinaturas:
+    """Assinaturas num JSONL só de acréscimo (assinar / confirmar / cancelar), compartilhado pelos workers.
+
+    Cada worker lê só as linhas novas desde a última leitura; se o arquivo
+    foi trocado pela compactação, relê do início. Acréscimos seguram um lock
+    compartilhado no arquivo `.lock` ao lado e a compactação, o exclusivo:
+    nenhuma linha escrita durante a reescrita se perde.
+
+    Só assinaturas confirmadas (pelo link enviado ao e-mail) chegam aos
+    `ouvintes`, e portanto ao percolador que decide os envios.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.ativas = {}       # id -> Assinatura (confirmadas ou não)
+        self.por_token = {}    # token -> id
+        self.por_chave = {}    # Assinatura.chave() -> id
+        self.linhas = 0        # linhas lidas do arquivo atual (a compactação olha o desperdício)
+        self._offset = 0
+        self._inode = None
+        self._lock = threading.Lock()
+        self._lock_arquivo = threading.Lock()  # sem fcntl: a trava vale só entre as threads do processo
+        self.ouvintes = []     # callbacks (evento, assinatura) para manter índices em dia
+
+    def _avisar(self, evento, a):
+        for ouvinte in self.ouvintes: ouvinte(evento, a)
+
+    def _aplicar(self, registro):
+        op = registro.get('op')
+        if op == 'assinar':
+            a = Assinatura(registro['id'], registro['email'], registro['token'], registro['filtros'],
+                           registro.get('confirmada', False), registro.get('em', 0.0))
+            if a.chave() in self.por_chave: return  # dois workers gravaram a mesma busca: vale a primeira linha
+            self.ativas[a.id] = a
+            self.por_token[a.token] = a.id
+            self.por_chave[a.chave()] = a.id
+            if a.confirmada: self._avisar('assinar', a)
+        elif op == 'confirmar':
+            a = self.ativas.get(self.por_token.get(registro.get('token')))
+            if a is not None and not a.confirmada:
+                a.confirmada = True
+                self._avisar('assinar', a)
+        elif op == 'cancelar':
+            a = self.ativas.pop(self.por_token.pop(registro.get('token'), None), None)
+            if a is not None:
+                self.por_chave.pop(a.chave(), None)
+                if a.confirmada: self._avisar('cancelar', a)
+
+    def carregar(self):
+        with self._lock:
+            try: st = os.stat(self.caminho)
+            except OSError: return self
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                for a in self.ativas.values():
+                    if a.confirmada: self._avisar('cancelar', a)
+                self.ativas, self.por_token, self.por_chave = {}, {}, {}
+                self._offset, self.linhas, self._inode = 0, 0, st.st_ino
+            if st.st_size == self._offset: return self
+            with open(self.caminho, 'rb') as f:
+                f.seek(self._offset)
+                for linha in f:
+                    if not linha.endswith(b'\n'): break  # linha ainda sendo escrita por outro worker
+                    self._offset += len(linha)
+                    self.linhas += 1
+                    try: self._aplicar(json.loads(linha))
+                    except: pass
+        return self
+
+    @contextmanager
+    def _trava(self, exclusiva):
+        """Anexos pegam a trava compartilhada; a compactação, a exclusiva (nada é anexado durante a troca)."""
+        if not fcntl:
+            with self._lock_arquivo: yield
+            return
+        fd = os.open(self.caminho + '.lock', os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusiva else fcntl.LOCK_SH)
+            yield
+        finally: os.close(fd)
+
+    def _anexar(self, registro):
+        linha = (json.dumps(registro, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._trava(exclusiva=False):
+            fd = os.open(self.caminho, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try: os.write(fd, linha)  # uma escrita com O_APPEND: linhas de workers diferentes não se misturam
+            finally: os.close(fd)
+        self.carregar()
+
+    def assinar(self, email, filtros):
+        """Salva a busca `filtros` (tupla canônica) para `email`, ainda sem confirmação.
+
+        Retorna (assinatura, nova); a mesma busca já salva pelo mesmo e-mail
+        devolve a existente. ValueError se os filtros não restringem nada.
+        """
+        a = Assinatura(secrets.token_hex(8), email, secrets.token_urlsafe(16), filtros, criada=time.time())
+        if a.vazia(): raise ValueError('Assinatura sem filtros')
+        self.carregar()
+        existente = self.por_chave.get(a.chave())
+        if existente is not None: return self.ativas[existente], False
+        self._anexar(a.registro())
+        vencedora = self.ativas[self.por_chave[a.chave()]]
+        return vencedora, vencedora.id == a.id
+
+    def confirmar(self, token):
+        self.carregar()
+        a = self.ativas.get(self.por_token.get(token))
+        if a is None: return False
+        if not a.confirmada: self._anexar({'op': 'confirmar', 'token': token, 'em': time.time()})
+        return True
+
+    def cancelar(self, token):
+        self.carregar()
+        if token not in self.por_token: return False
+        self._anexar({'op': 'cancelar', 'token': token, 'em': time.time()})
+        return True
+
+    def desperdicio(self):
+        """Linhas do arquivo que a compactação eliminaria."""
+        return self.linhas - len(self.ativas)
+
+    def compactar(self, agora=None):
+        """Reescreve o arquivo só com as assinaturas vivas (uma linha cada), trocando-o de uma vez.
+
+        Assinaturas não confirmadas há mais de PRAZO_CONFIRMACAO ficam de fora.
+        Retorna quantas linhas o arquivo perdeu.
+        """
+        agora = agora or time.time()
+        with self._trava(exclusiva=True):
+            self.carregar()
+            antes = self.linhas
+            vivas = [a for a in self.ativas.values() if a.confirmada or agora - a.criada < PRAZO_CONFIRMACAO]
+            temporario = f"{self.caminho}.{os.getpid()}.tmp"
+            with open(temporario, 'w', encoding='utf-8') as f:
+                for a in vivas: f.write(json.dumps(a.registro(), ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.caminho)
+            self.carregar()
+        print(f"--> [ALERTAS] Assinaturas compactadas: {antes} -> {self.linhas} linhas")
+        return antes - self.linhas
+
+
+# --- ÍNDICE REVERSO (PERCOLADOR) ---
+class Percolador:
+    """Índice das assinaturas: dado um concurso, quais buscas salvas ele satisfaz.
+
+    Cada assinatura entra no índice por uma "âncora" só, a do filtro mais
+    seletivo que ela tiver: um trigrama de cada palavra-chave (casamento
+    parcial, como na busca), as bancas, as UFs ou os níveis; sem nenhum
+    desses, vai para a lista geral. Um concurso consulta só as âncoras que
+    ele tem e as candidatas são confirmadas com `Assinatura.casa`, então o
+    custo por concurso depende das assinaturas candidatas, não do total.
+    """
+
+    def __init__(self):
+        self.chaves = {}       # âncora -> set(ids)
+        self.ancoras = {}      # id -> âncoras usadas
+        self.assinaturas = {}
+        self.uf_qualquer = set()  # ancoradas por UF: concurso Nacional/Outro casa com todas
+
+    @staticmethod
+    def _ancoras(a):
+        if a.palavras and '' not in a.palavras:
+            chaves = []
+            for p in a.palavras:
+                pedacos = REGEX_PALAVRA.findall(p)
+                if not pedacos: return [('*',)]  # só pontuação: varredura no texto, como na busca
+                maior = max(pedacos, key=len)
+                chaves.append(('p', maior[:3]))
+            return chaves
+        if a.bancas: return [('b', b) for b in a.bancas]
+        if a.ufs:
+            if not a.ufs <= set(SIGLAS_INDEXADAS): return [('*',)]
+            return [('u', uf) for uf in a.ufs]
+        if a.niveis: return [('n', n) for n in a.niveis]
+        return [('*',)]
+
+    def adicionar(self, a):
+        self.remover(a)
+        ancoras = self._ancoras(a)
+        for chave in ancoras: self.chaves.setdefault(chave, set()).add(a.id)
+        if ancoras[0][0] == 'u': self.uf_qualquer.add(a.id)
+        self.ancoras[a.id] = ancoras
+        self.assinaturas[a.id] = a
+
+    def remover(self, a):
+        for chave in self.ancoras.pop(a.id, ()):
+            ids = self.chaves.get(chave)
+            if ids is not None:
+                ids.discard(a.id)
+                if not ids: del self.chaves[chave]
+        self.uf_qualquer.discard(a.id)
+        self.assinaturas.pop(a.id, None)
+
+    def ouvir(self, evento, a):
+        if evento == 'assinar': self.adicionar(a)
+        else: self.remover(a)
+
+    def candidatos(self, item):
+        chaves = self.chaves
+        ids = set(chaves.get(('*',), ()))
+        for tok in item['tokens']:
+            for n in (1, 2, 3):
+                for j in range(len(tok) - n + 1):
+                    achados = chaves.get(('p', tok[j:j + n]))
+                    if achados: ids |= achados
+        for b in item['bancas']:
+            ids |= chaves.get(('b', b), set())
+        if item['uf'] == UF_NACIONAL:
+            ids |= self.uf_qualquer
+        else:
+            texto = item['texto']
+            for s in SIGLAS_INDEXADAS:
+                if s == item['uf'] or s in texto: ids |= chaves.get(('u', s), set())
+        for n in item['niveis']:
+            ids |= chaves.get(('n', n), set())
+        return ids
+
+    def casar(self, item):
+        """Ids das assinaturas que o concurso satisfaz."""
+        return [i for i in self.candidatos(item) if self.assinaturas[i].casa(item)]
+
+
+# --- ENVIO ---
+class RemetenteArquivo:
+    """Stub offline: cada aviso vira uma linha JSON num arquivo (caixa de saída local)."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+    def enviar(self, email, assunto, corpo):
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'para': email, 'assunto': assunto, 'corpo': corpo, 'em': time.time()}, ensure_ascii=False) + '\n')
+
+
+class RemetenteSMTP:
+    """SMTP simples (ALERTAS_SMTP=host:porta). Para testar, aponte para um servidor SMTP de depuração local."""
+
+    def __init__(self, servidor, remetente, usuario=None, senha=None):
+        host, _, porta = servidor.partition(':')
+        self.host, self.porta = host, int(porta or 25)
+        self.remetente, self.usuario, self.senha = remetente, usuario, senha
+
+    def enviar(self, email, assunto, corpo):
+        msg = EmailMessage()
+        msg['From'], msg['To'], msg['Subject'] = self.remetente, email, assunto
+        msg.set_content(corpo)
+        with smtplib.SMTP(self.host, self.porta, timeout=10) as smtp:
+            if self.usuario:
+                smtp.starttls()
+                smtp.login(self.usuario, self.senha)
+            smtp.send_message(msg)
+
+
+def criar_remetente(basedir):
+    """ALERTAS_SMTP usa SMTP; senão os avisos vão para ALERTAS_ARQUIVO (padrão: alertas_enviados.jsonl)."""
+    servidor = os.environ.get('ALERTAS_SMTP')
+    if servidor:
+        return RemetenteSMTP(servidor, os.environ.get('ALERTAS_REMETENTE', 'concursoideal@icloud.com'),
+                             os.environ.get('ALERTAS_SMTP_USUARIO'), os.environ.get('ALERTAS_SMTP_SENHA'))
+    return RemetenteArquivo(os.environ.get('ALERTAS_ARQUIVO') or os.path.join(basedir, 'alertas_enviados.jsonl'))
+
+
+# --- MOTOR ---
+class MotorAlertas:
+    """Casa os concursos novos de cada raspagem com as assinaturas confirmadas e envia um aviso por e-mail.
+
+    `url_base` é a raiz absoluta do site (ex.: https://dominio), usada nos
+    links de confirmação e cancelamento que vão nos e-mails.
+    """
+
+    def __init__(self, repositorio, remetente, url_base):
+        self.repositorio = repositorio
+        self.remetente = remetente
+        self.url_base = url_base.rstrip('/')
+        self.percolador = Percolador()
+        repositorio.ouvintes.append(self.percolador.ouvir)
+        self.enviados = 0
+        self.falhas = 0
+
+    def url_confirmar(self, token): return f"{self.url_base}/api/alertas/confirmar?token={token}"
+
+    def url_cancelar(self, token): return f"{self.url_base}/api/alertas/cancelar?token={token}"
+
+    def pedir_confirmacao(self, a):
+        """E-mail com o link que ativa a assinatura; nada é enviado a ela antes disso."""
+        filtros = [f"palavras: {', '.join(a.palavras)}" if a.palavras else '',
+                   f"salário a partir de R$ {a.sal_min:,.2f}" if a.sal_min > 0 else '',
+                   f"UFs: {', '.join(sorted(a.ufs))}" if a.ufs else '',
+                   f"níveis: {', '.join(sorted(a.niveis))}" if a.niveis else '',
+                   f"bancas: {', '.join(sorted(a.bancas))}" if a.bancas else '']
+        corpo = (f"Recebemos um pedido de alerta para a busca ({'; '.join(f for f in filtros if f)}).\n\n"
+                 f"Para começar a receber os avisos, confirme: {self.url_confirmar(a.token)}\n\n"
+                 f"Se não foi você, ignore este e-mail.")
+        self.remetente.enviar(a.email, "Confirme seu alerta de concursos", corpo)
+
+    def casar(self, itens):
+        """{id da assinatura: [itens]} para os concursos `itens`."""
+        self.repositorio.carregar()
+        por_assinatura = {}
+        for item in itens:
+            for i in self.percolador.casar(item):
+                por_assinatura.setdefault(i, []).append(item)
+        return por_assinatura
+
+    def processar(self, itens):
+        """Roda o percolador nos concursos adicionados e envia os avisos. Retorna quantos e-mails saíram."""
+        t0 = time.time()
+        por_assinatura = self.casar(itens)
+        enviados = 0
+        for i, achados in por_assinatura.items():
+            a = self.percolador.assinaturas[i]
+            linhas = [linha_saida(item) for item in achados[:MAX_ITENS_POR_AVISO]]
+            corpo = '\n\n'.join(f"{l['Informações do Concurso']}\n{l['Salário']} · {l['UF']} · até {l['Data Fim Inscrição']}\n{l['Link']}"
+                                for l in linhas)
+            if len(achados) > MAX_ITENS_POR_AVISO: corpo += f"\n\n... e mais {len(achados) - MAX_ITENS_POR_AVISO} concursos."
+            corpo += f"\n\nPara cancelar este alerta: {self.url_cancelar(a.token)}"
+            try:
+                self.remetente.enviar(a.email, f"🔔 {len(achados)} concurso(s) novo(s) na sua busca", corpo)
+                enviados += 1
+            except Exception as e:
+                self.falhas += 1
+                print(f"--> [ALERTAS] Falha ao enviar para {a.email}: {e}")
+        self.enviados += enviados
+        print(f"--> [ALERTAS] {len(itens)} concursos novos x {len(self.percolador.assinaturas)} assinaturas: "
+              f"{enviados} avisos em {time.time() - t0:.2f}s")
+        # Cancelamentos e confirmações só acrescentam linhas: de vez em quando o arquivo é reescrito
+        if self.repositorio.desperdicio() > max(1000, len(self.repositorio.ativas)):
+            try: self.repositorio.compactar()
+            except Exception as e: print(f"--> [ALERTAS] Falha ao compactar assinaturas: {e}")
+        return enviados
+
+    def estatisticas(self):
+        return {'assinaturas': len(self.percolador.assinaturas),
+                'pendentes': len(self.repositorio.ativas) - len(self.percolador.assinaturas),
+                'enviados': self.enviados, 'falhas': self.falhas}
@@ -0,0 +1,251 @@
+import json
+import sqlite3
+import threading
+
+from services.texto import normalizar_texto
+from services.indice import SIGLAS_INDEXADAS, UF_NACIONAL, NIVEIS, linha_saida
+from services.snapshot import versao_de
+
+# --- ESQUEMA ---
+# `posicao` é a ordem do concurso na última raspagem (salário decrescente);
+# NULL = saiu da lista. Quem sai continua na tabela com primeiro/último visto.
+# UF, nível e banca ficam em tabelas (chave, id) sem rowid: cada filtro é uma
+# busca por intervalo no índice primário. O FTS5 com tokenizer trigram casa
+# pedaços de palavra, a mesma semântica de substring da busca em memória.
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS concursos (
+    id INTEGER PRIMARY KEY,
+    link TEXT NOT NULL UNIQUE,
+    texto TEXT NOT NULL,
+    texto_normalized TEXT NOT NULL,
+    tokens TEXT NOT NULL,
+    niveis TEXT NOT NULL,
+    bancas TEXT NOT NULL,
+    data_fim TEXT,
+    salario_num REAL NOT NULL,
+    salario_formatado TEXT,
+    uf TEXT,
+    posicao INTEGER,
+    primeiro_visto REAL NOT NULL,
+    ultimo_visto REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS concursos_posicao ON concursos(posicao) WHERE posicao IS NOT NULL;
+CREATE INDEX IF NOT EXISTS concursos_salario ON concursos(salario_num, posicao) WHERE posicao IS NOT NULL;
+CREATE INDEX IF NOT EXISTS concursos_ultimo_visto ON concursos(ultimo_visto);
+CREATE TABLE IF NOT EXISTS concurso_uf (sigla TEXT NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (sigla, id)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS concurso_nivel (nivel TEXT NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (nivel, id)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS concurso_banca (banca TEXT NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (banca, id)) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS busca USING fts5(
+    texto_normalized, content='concursos', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS busca_ai AFTER INSERT ON concursos BEGIN
+    INSERT INTO busca(rowid, texto_normalized) VALUES (new.id, new.texto_normalized);
+END;
+CREATE TRIGGER IF NOT EXISTS busca_au AFTER UPDATE OF texto_normalized ON concursos
+WHEN old.texto_normalized IS NOT new.texto_normalized BEGIN
+    INSERT INTO busca(busca, rowid, texto_normalized) VALUES ('delete', old.id, old.texto_normalized);
+    INSERT INTO busca(rowid, texto_normalized) VALUES (new.id, new.texto_normalized);
+END;
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT NOT NULL);
+"""
+COLUNAS_LINHA = 'c.salario_formatado, c.uf, c.data_fim, c.texto, c.link, c.bancas'
+MIN_TRIGRAMA = 3  # pedaço menor que um trigrama não usa o FTS: instr() direto
+
+
+def conectar(caminho, timeout=30.0):
+    """Conexão em modo WAL, autocommit (transações explícitas) e espera pelo lock de escrita."""
+    con = sqlite3.connect(caminho, timeout=timeout, isolation_level=None, check_same_thread=False)
+    con.execute('PRAGMA journal_mode=WAL')
+    con.execute('PRAGMA synchronous=NORMAL')  # no WAL, seguro contra queda do processo
+    con.execute(f'PRAGMA busy_timeout={int(timeout * 1000)}')
+    return con
+
+def _lista(valores): return ','.join(sorted(valores or ()))
+
+def _conjunto(texto): return set(texto.split(',')) if texto else set()
+
+def _siglas_de(item):
+    """Mesma regra do índice em memória: a UF do item ou a sigla aparecendo no texto."""
+    uf, texto = item['uf'], item['texto']
+    return [s for s in SIGLAS_INDEXADAS if uf == s or (s != UF_NACIONAL and s in texto)]
+
+
+class ArmazemSQLite:
+    """Catálogo em SQLite (WAL): histórico por link e busca com os filtros em SQL.
+
+    Um escritor por vez (a raspagem, que já roda sob o lock single-flight)
+    e qualquer número de leitores, inclusive em outros workers: no WAL quem
+    lê vê sempre a última transação confirmada e não bloqueia quem escreve.
+    Cada thread usa sua própria conexão.
+    """
+
+    def __init__(self, caminho, timeout=30.0):
+        self.caminho = caminho
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock_escrita = threading.Lock()
+        with self._conexao() as con:
+            con.executescript(ESQUEMA)
+
+    def _conexao(self):
+        con = getattr(self._local, 'con', None)
+        if con is None: con = self._local.con = conectar(self.caminho, self.timeout)
+        return con
+
+    # --- ESCRITA ---
+    def gravar(self, dados, timestamp):
+        """Upsert da raspagem inteira por link; quem não veio nela perde a posição (fica no histórico)."""
+        with self._lock_escrita:
+            con = self._conexao()
+            existentes = {link: (id_, texto) for id_, link, texto in
+                          con.execute('SELECT id, link, texto_normalized FROM concursos')}
+            novos, alterados, vistos, links = [], [], [], set()
+            for posicao, item in enumerate(dados):
+                if item['link'] in links: continue
+                links.add(item['link'])
+                registro = (item['texto'], item['texto_normalized'], ' ' + ' '.join(sorted(item['tokens'])) + ' ',
+                            _lista(item['niveis']), _lista(item.get('bancas')), item['data_fim'],
+                            float(item['salario_num'] or 0), item['salario_formatado'], item['uf'], posicao)
+                atual = existentes.get(item['link'])
+                if atual is None:
+                    novos.append((item['link'],) + registro + (timestamp, timestamp))
+                elif atual[1] != item['texto_normalized']:
+                    alterados.append(registro + (timestamp, atual[0]))
+                else:
+                    vistos.append((posicao, timestamp, atual[0]))
+            con.execute('BEGIN IMMEDIATE')
+            try:
+                con.execute('UPDATE concursos SET posicao = NULL WHERE posicao IS NOT NULL')
+                con.executemany('UPDATE concursos SET posicao = ?, ultimo_visto = ? WHERE id = ?', vistos)
+                con.executemany('UPDATE concursos SET texto = ?, texto_normalized = ?, tokens = ?, niveis = ?, bancas = ?, '
+                                'data_fim = ?, salario_num = ?, salario_formatado = ?, uf = ?, posicao = ?, '
+                                'ultimo_visto = ? WHERE id = ?', alterados)
+                con.executemany('INSERT INTO concursos (link, texto, texto_normalized, tokens, niveis, bancas, data_fim, '
+                                'salario_num, salario_formatado, uf, posicao, primeiro_visto, ultimo_visto) '
+                                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', novos)
+                # Filtros só de quem entrou ou mudou: quem foi apenas revisto mantém as linhas
+                refeitos = [a[-1] for a in alterados]
+                if refeitos:  # uma varredura por tabela (o id não é o começo da chave)
+                    for tabela in ('concurso_uf', 'concurso_nivel', 'concurso_banca'):
+                        con.execute(f'DELETE FROM {tabela} WHERE id IN (SELECT value FROM json_each(?))',
+                                    (json.dumps(refeitos),))
+                refeitos += [r[0] for r in con.execute('SELECT id FROM concursos WHERE link IN (SELECT value FROM json_each(?))',
+                                                       (json.dumps([n[0] for n in novos]),))]
+                linhas = con.execute('SELECT id, uf, texto, niveis, bancas FROM concursos WHERE id IN '
+                                     '(SELECT value FROM json_each(?))', (json.dumps(refeitos),)).fetchall()
+                con.executemany('INSERT OR IGNORE INTO concurso_uf VALUES (?, ?)',
+                                [(s, id_) for id_, uf, texto, _, _ in linhas for s in _siglas_de({'uf': uf, 'texto': texto})])
+                con.executemany('INSERT OR IGNORE INTO concurso_nivel VALUES (?, ?)',
+                                [(n, id_) for id_, _, _, niveis, _ in linhas for n in _conjunto(niveis)])
+                con.executemany('INSERT OR IGNORE INTO concurso_banca VALUES (?, ?)',
+                                [(b, id_) for id_, _, _, _, bancas in linhas for b in _conjunto(bancas)])
+                con.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                                [('versao', versao_de(timestamp)), ('timestamp', repr(timestamp))])
+                con.execute('COMMIT')
+            except:
+                con.execute('ROLLBACK')
+                raise
+            return {'novos': len(novos), 'alterados': len(alterados), 'revistos': len(vistos)}
+
+    # --- LEITURA ---
+    def _meta(self, chave):
+        linha = self._conexao().execute('SELECT valor FROM meta WHERE chave = ?', (chave,)).fetchone()
+        return linha[0] if linha else None
+
+    def versao(self):
+        """Versão (versao_de do timestamp) da última raspagem gravada, ou None."""
+        return self._meta('versao')
+
+    def carregar(self):
+        """(timestamp, lista de dicts) dos concursos da última raspagem, na ordem dela; None se vazio."""
+        timestamp = self._meta('timestamp')
+        if timestamp is None: return None
+        dados = []
+        for (texto, texto_norm, tokens, niveis, bancas, data_fim, salario, salario_fmt, uf, link) in self._conexao().execute(
+                'SELECT texto, texto_normalized, tokens, niveis, bancas, data_fim, salario_num, salario_formatado, uf, link '
+                'FROM concursos WHERE posicao IS NOT NULL ORDER BY posicao'):
+            dados.append({'texto': texto, 'texto_normalized': texto_norm, 'tokens': set(tokens.split()),
+                          'niveis': _conjunto(niveis), 'bancas': _conjunto(bancas), 'link': link, 'data_fim': data_fim,
+                          'salario_num': salario, 'salario_formatado': salario_fmt, 'uf': uf})
+        return (float(timestamp), dados) if dados else None
+
+    def _where(self, sal_min, chaves, ufs, excluir, niveis_filtro, bancas_filtro):
+        """(cláusula WHERE, parâmetros, se há filtro além do salário), com a semântica do IndiceBusca.buscar_ids."""
+        where, params = ['c.posicao IS NOT NULL'], []
+        if sal_min > 0:
+            where.append('c.salario_num >= ?')
+            params.append(float(sal_min))
+        so_salario = len(where)
+        if ufs:
+            conhecidas = [uf for uf in set(ufs) if uf in SIGLAS_INDEXADAS]
+            partes = [f"c.id IN (SELECT id FROM concurso_uf WHERE sigla IN ({','.join('?' * (len(conhecidas) + 1))}))"]
+            params += conhecidas + [UF_NACIONAL]  # nacional entra em qualquer filtro de UF
+            for uf in set(ufs) - set(conhecidas):
+                partes.append('c.uf = ? OR instr(c.texto, ?) > 0')
+                params += [uf, uf]
+            where.append('(' + ' OR '.join(partes) + ')')
+        if niveis_filtro:
+            validos = [n for n in set(niveis_filtro) if n in NIVEIS]
+            where.append(f"c.id IN (SELECT id FROM concurso_nivel WHERE nivel IN ({','.join('?' * len(validos)) or 'NULL'}))")
+            params += validos
+        if bancas_filtro:
+            bancas = sorted({normalizar_texto(b) for b in bancas_filtro})
+            where.append(f"c.id IN (SELECT id FROM concurso_banca WHERE banca IN ({','.join('?' * len(bancas))}))")
+            params += bancas
+        chaves_norm = sorted({normalizar_texto(k) for k in chaves or ()})
+        if chaves_norm and '' not in chaves_norm:
+            partes = []
+            for chave in chaves_norm:
+                if len(chave) >= MIN_TRIGRAMA:
+                    # O FTS acha os candidatos; instr() confirma (espaços e pontuação contam)
+                    partes.append('(c.id IN (SELECT rowid FROM busca WHERE busca MATCH ?) AND instr(c.texto_normalized, ?) > 0)')
+                    params += ['"' + chave.replace('"', '""') + '"', chave]
+                else:
+                    partes.append('instr(c.texto_normalized, ?) > 0')
+                    params.append(chave)
+            where.append('(' + ' OR '.join(partes) + ')')
+        for palavra in sorted({normalizar_texto(p) for p in excluir or ()}):
+            if not palavra or palavra.split() != [palavra]: continue  # token nunca é vazio nem tem espaço
+            where.append("instr(c.tokens, ' ' || ? || ' ') = 0")
+            params.append(palavra)
+        return ' AND '.join(where), params, len(where) > so_salario
+
+    def consultar(self, sal_min, chaves, ufs, excluir, niveis_filtro=None, bancas_filtro=None, inicio=0, limite=None):
+        """(total, linhas de saída) na ordem da raspagem; `limite` None = todas a partir de `inicio`."""
+        where, params, filtrado = self._where(sal_min, chaves, ufs, excluir, niveis_filtro, bancas_filtro)
+        con = self._conexao()
+        pagina = params + [-1 if limite is None else limite, inicio]
+        if not filtrado:
+            # Só salário: o índice parcial conta e pagina sem tocar nas linhas de fora
+            total = con.execute(f'SELECT count(*) FROM concursos c WHERE {where}', params).fetchone()[0]
+            linhas = con.execute(f'SELECT {COLUNAS_LINHA} FROM concursos c WHERE {where} ORDER BY c.posicao '
+                                 'LIMIT ? OFFSET ?', pagina).fetchall()
+        else:
+            # Com filtros: o WHERE é avaliado uma vez só, contando junto (count() OVER), e a
+            # ordenação leva só (posicao, id); as colunas de texto vêm depois, só as da página
+            ids = con.execute(f'SELECT count(*) OVER (), c.id FROM concursos c WHERE {where} '
+                              'ORDER BY c.posicao LIMIT ? OFFSET ?', pagina).fetchall()
+            if ids:
+                total = ids[0][0]
+                linhas = con.execute(f'SELECT {COLUNAS_LINHA} FROM concursos c WHERE c.id IN '
+                                     '(SELECT value FROM json_each(?)) ORDER BY c.posicao',
+                                     (json.dumps([i for _, i in ids]),)).fetchall()
+            else:
+                linhas = []
+                total = con.execute(f'SELECT count(*) FROM concursos c WHERE {where}', params).fetchone()[0] if inicio else 0
+        return total, [linha_saida({'salario_formatado': sal, 'uf': uf, 'data_fim': data_fim, 'texto': texto,
+                                    'link': link, 'bancas': _conjunto(bancas)})
+                       for sal, uf, data_fim, texto, link, bancas in linhas]
+
+    def historico(self, desde):
+        """Concursos que saíram da lista depois de `desde` (timestamp): link, texto, primeiro e último visto."""
+        return [{'link': link, 'texto': texto, 'primeiro_visto': p, 'ultimo_visto': u}
+                for link, texto, p, u in self._conexao().execute(
+                    'SELECT link, texto, primeiro_visto, ultimo_visto FROM concursos '
+                    'WHERE posicao IS NULL AND ultimo_visto >= ? ORDER BY ultimo_visto DESC', (desde,))]
+
+    def estatisticas(self):
+        """Contagens para o painel: concursos na lista atual e os que só restam no histórico."""
+        con = self._conexao()
+        ativos, total = con.execute('SELECT count(posicao), count(*) FROM concursos').fetchone()
+        return {'ativos': ativos, 'historico': total - ativos, 'versao': self.versao(), 'caminho': self.caminho}
@@ -0,0 +1,86 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+# fcntl só existe em Unix; no Windows o single-flight fica restrito ao processo
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class AtualizadorBackground:
+    """Renova os dados em segundo plano (stale-while-revalidate + single-flight).
+
+    - `precisa_atualizar()` é consultada a cada `verificar_a_cada` segundos.
+    - `atualizar(force)` roda com o lock do processo E o lock de arquivo,
+      então só um worker por máquina raspa por vez; os demais apenas
+      recarregam o que ele gravou.
+    """
+
+    def __init__(self, atualizar, precisa_atualizar, arquivo_lock=None, verificar_a_cada=30):
+        self.atualizar = atualizar
+        self.precisa_atualizar = precisa_atualizar
+        self.arquivo_lock = arquivo_lock
+        self.verificar_a_cada = verificar_a_cada
+        self._lock = threading.Lock()
+        self._lock_inicio = threading.Lock()
+        self._evento = threading.Event()
+        self._forcar = False
+        self._thread = None
+
+    def iniciar(self):
+        """Sobe a thread do agendador (idempotente, seguro chamar a cada request)."""
+        if self._thread is not None and self._thread.is_alive(): return
+        with self._lock_inicio:
+            if self._thread is not None and self._thread.is_alive(): return
+            self._thread = threading.Thread(target=self._loop, name='atualizador-dados', daemon=True)
+            self._thread.start()
+
+    def solicitar(self, force=False):
+        """Enfileira uma atualização sem bloquear quem chamou."""
+        if force: self._forcar = True
+        self.iniciar()
+        self._evento.set()
+
+    def executar(self, force=False, bloquear=False):
+        """Roda `atualizar` se ninguém estiver rodando. Retorna True se executou."""
+        if not self._lock.acquire(blocking=bloquear): return False
+        try:
+            with self._lock_arquivo(bloquear) as obtido:
+                if not obtido: return False
+                self.atualizar(force)
+                return True
+        finally:
+            self._lock.release()
+
+    @contextmanager
+    def _lock_arquivo(self, bloquear):
+        if not fcntl or not self.arquivo_lock:
+            yield True
+            return
+        fd = os.open(self.arquivo_lock, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if bloquear else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try: yield True
+            finally: fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _loop(self):
+        while True:
+            self._evento.wait(self.verificar_a_cada)
+            self._evento.clear()
+            forcar, self._forcar = self._forcar, False
+            try:
+                if forcar or self.precisa_atualizar():
+                    if not self.executar(force=forcar) and forcar:
+                        self._forcar = True  # outro worker está raspando; tenta no próximo ciclo
+            except Exception as e:
+                print(f"--> [ATUALIZADOR] Falha na atualização: {e}")
+                time.sleep(1)
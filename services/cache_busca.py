@@ -0,0 +1,95 @@
+import gzip
+import time
+import threading
+from collections import OrderedDict
+
+from services.texto import normalizar_texto
+
+
+def chave_busca(versao, filtros, pagina=None, ordem=None):
+    """Chave canônica: mesma busca escrita de jeitos diferentes cai na mesma entrada.
+
+    `filtros` é a tupla de extrair_filtros (UFs já com regiões expandidas);
+    `pagina` é (inicio, limite), None para a lista completa ou 'facetas';
+    `ordem` é None (ordem da lista) ou os boosts da busca por relevância.
+    """
+    s_min, palavras, ufs, excluir, niveis, bancas = filtros
+    return (
+        versao,
+        float(s_min),
+        tuple(sorted(set(normalizar_texto(p) for p in palavras))),
+        tuple(sorted(set(ufs))),
+        tuple(sorted(set(normalizar_texto(p) for p in excluir))),
+        tuple(sorted(set(niveis or ()))),
+        tuple(sorted(set(normalizar_texto(b) for b in bancas))),
+        pagina,
+        ordem,
+    )
+
+
+class RespostaCacheada:
+    """Corpo JSON já codificado; a versão gzip é gerada na primeira vez que alguém pede."""
+
+    __slots__ = ('corpo', '_gzip', 'criado_em')
+
+    def __init__(self, corpo):
+        self.corpo = corpo
+        self._gzip = None
+        self.criado_em = time.time()
+
+    def gzip(self):
+        if self._gzip is None: self._gzip = gzip.compress(self.corpo, 6)
+        return self._gzip
+
+
+class CacheResultados:
+    """LRU limitado para respostas de /api/buscar, invalidado pela versão dos dados."""
+
+    def __init__(self, max_itens=512, ttl=None):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.expulsoes = 0
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and self.ttl and time.time() - item.criado_em > self.ttl:
+                del self._itens[chave]
+                item = None
+            if item is None:
+                self.faltas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item
+
+    def guardar(self, chave, corpo):
+        item = RespostaCacheada(corpo)
+        with self._lock:
+            self._itens[chave] = item
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.expulsoes += 1
+        return item
+
+    def manter_versoes(self, versoes):
+        """Descarta entradas de snapshots que não podem mais ser servidos."""
+        with self._lock:
+            for chave in [c for c in self._itens if c[0] not in versoes]:
+                del self._itens[chave]
+
+    def estatisticas(self):
+        total = self.acertos + self.faltas
+        return {
+            'itens': len(self._itens),
+            'max_itens': self.max_itens,
+            'acertos': self.acertos,
+            'faltas': self.faltas,
+            'expulsoes': self.expulsoes,
+            'taxa_acerto': round(100.0 * self.acertos / total, 1) if total else 0.0,
+        }
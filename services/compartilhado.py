@@ -0,0 +1,213 @@
+import os
+import time
+import pickle
+import logging
+import sqlite3
+import threading
+from urllib.parse import urlparse
+
+from limits.storage import Storage
+from flask_caching.backends.base import BaseCache
+
+from services.armazem_sqlite import conectar
+
+# --- ESTADO COMPARTILHADO ENTRE WORKERS ---
+# Contadores do limiter e respostas do flask-caching num SQLite (WAL) no
+# SNAPSHOT_DIR, que em produção é /dev/shm: nada vai ao disco e todos os
+# workers do Gunicorn veem o mesmo estado. Com REDIS_URL o app usa o Redis
+# (storage do `limits` e RedisCache do flask-caching) no lugar deste arquivo.
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS contadores (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL, expira REAL NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS respostas (chave TEXT PRIMARY KEY, valor BLOB NOT NULL, expira REAL NOT NULL) WITHOUT ROWID;
+"""
+SEM_EXPIRACAO = float('inf')
+INTERVALO_FAXINA = 60.0  # segundos entre as limpezas de chaves vencidas (por worker)
+
+# Janela fixa numa instrução só (atômica): chave vencida recomeça do zero com novo prazo
+SQL_INCREMENTAR = """
+INSERT INTO contadores (chave, valor, expira) VALUES (:chave, :quantidade, :agora + :expiracao)
+ON CONFLICT (chave) DO UPDATE SET
+    valor = CASE WHEN expira <= :agora THEN excluded.valor ELSE valor + excluded.valor END,
+    expira = CASE WHEN expira <= :agora THEN excluded.expira ELSE expira END
+RETURNING valor
+"""
+
+
+class ArmazemCompartilhado:
+    """Contadores atômicos e cache chave/valor com prazo, num arquivo SQLite compartilhado.
+
+    Cada operação é uma instrução só em autocommit; o SQLite serializa as
+    escritas entre processos, então incrementos de workers diferentes nunca
+    se perdem. Limpar o cache num worker limpa para todos.
+    """
+
+    def __init__(self, caminho, timeout=5.0):
+        self.caminho = caminho
+        self.timeout = timeout
+        self._local = threading.local()
+        self._proxima_faxina = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._conexao().executescript(ESQUEMA)
+
+    def _conexao(self):
+        con = getattr(self._local, 'con', None)
+        if con is None: con = self._local.con = conectar(self.caminho, self.timeout)
+        return con
+
+    def _faxina(self, agora):
+        """De tempos em tempos apaga o que venceu (ler uma chave vencida já a trata como ausente)."""
+        if agora < self._proxima_faxina: return
+        self._proxima_faxina = agora + INTERVALO_FAXINA
+        con = self._conexao()
+        con.execute('DELETE FROM contadores WHERE expira <= ?', (agora,))
+        con.execute('DELETE FROM respostas WHERE expira <= ?', (agora,))
+
+    # --- CONTADORES ---
+    def incrementar(self, chave, expiracao, quantidade=1):
+        agora = time.time()
+        self._faxina(agora)
+        return self._conexao().execute(SQL_INCREMENTAR, {'chave': chave, 'quantidade': quantidade,
+                                                         'agora': agora, 'expiracao': expiracao}).fetchone()[0]
+
+    def contador(self, chave):
+        linha = self._conexao().execute('SELECT valor FROM contadores WHERE chave = ? AND expira > ?',
+                                        (chave, time.time())).fetchone()
+        return linha[0] if linha else 0
+
+    def expiracao(self, chave):
+        linha = self._conexao().execute('SELECT expira FROM contadores WHERE chave = ? AND expira > ?',
+                                        (chave, time.time())).fetchone()
+        return linha[0] if linha else time.time()
+
+    def zerar(self, chave=None):
+        """Apaga um contador (ou todos, sem `chave`); devolve quantos saíram."""
+        if chave is None: return self._conexao().execute('DELETE FROM contadores').rowcount
+        return self._conexao().execute('DELETE FROM contadores WHERE chave = ?', (chave,)).rowcount
+
+    # --- CACHE ---
+    def obter(self, chave):
+        linha = self._conexao().execute('SELECT valor FROM respostas WHERE chave = ? AND expira > ?',
+                                        (chave, time.time())).fetchone()
+        return linha[0] if linha else None
+
+    def guardar(self, chave, valor, prazo, so_se_ausente=False):
+        """Grava `valor` (bytes) por `prazo` segundos (None = sem prazo); False se `so_se_ausente` e a chave existe."""
+        agora = time.time()
+        self._faxina(agora)
+        expira = SEM_EXPIRACAO if prazo is None else agora + prazo
+        if not so_se_ausente:
+            self._conexao().execute('INSERT OR REPLACE INTO respostas VALUES (?, ?, ?)', (chave, valor, expira))
+            return True
+        return self._conexao().execute(
+            'INSERT INTO respostas VALUES (?, ?, ?) ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor, '
+            'expira = excluded.expira WHERE respostas.expira <= ?', (chave, valor, expira, agora)).rowcount == 1
+
+    def apagar(self, chave):
+        return self._conexao().execute('DELETE FROM respostas WHERE chave = ?', (chave,)).rowcount == 1
+
+    def limpar(self):
+        """Esvazia o cache de respostas de todos os workers de uma vez."""
+        self._conexao().execute('DELETE FROM respostas')
+
+    def estatisticas(self):
+        con, agora = self._conexao(), time.time()
+        contadores = con.execute('SELECT count(*) FROM contadores WHERE expira > ?', (agora,)).fetchone()[0]
+        respostas = con.execute('SELECT count(*) FROM respostas WHERE expira > ?', (agora,)).fetchone()[0]
+        return {'backend': 'sqlite', 'contadores': contadores, 'respostas': respostas}
+
+
+_ARMAZENS = {}
+_LOCK_ARMAZENS = threading.Lock()
+
+def armazem_compartilhado(caminho):
+    """Um ArmazemCompartilhado por arquivo no processo (limiter e cache dividem as conexões)."""
+    caminho = os.path.abspath(caminho)
+    with _LOCK_ARMAZENS:
+        if caminho not in _ARMAZENS: _ARMAZENS[caminho] = ArmazemCompartilhado(caminho)
+        return _ARMAZENS[caminho]
+
+
+class LimitesSQLite(Storage):
+    """Storage do `limits` (flask-limiter) sobre o ArmazemCompartilhado: storage_uri='sqlite:///caminho.db'."""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.armazem = armazem_compartilhado(urlparse(uri).path)
+
+    @property
+    def base_exceptions(self): return sqlite3.Error
+
+    def incr(self, key, expiry, amount=1): return self.armazem.incrementar(key, expiry, amount)
+
+    def get(self, key): return self.armazem.contador(key)
+
+    def get_expiry(self, key): return self.armazem.expiracao(key)
+
+    def check(self):
+        try:
+            self.armazem.contador('')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self): return self.armazem.zerar()
+
+    def clear(self, key): self.armazem.zerar(key)
+
+
+class CacheSQLite(BaseCache):
+    """Backend do flask-caching sobre o ArmazemCompartilhado (CACHE_TYPE='services.compartilhado.CacheSQLite').
+
+    O arquivo vem de CACHE_SQLITE_ARQUIVO; valores vão com pickle, como nos
+    backends do cachelib.
+    """
+
+    def __init__(self, caminho, default_timeout=300, prefixo='cache:', **kwargs):
+        super().__init__(default_timeout=default_timeout, **kwargs)
+        self.armazem = armazem_compartilhado(caminho)
+        self.prefixo = prefixo
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(caminho=config['CACHE_SQLITE_ARQUIVO'], prefixo=config.get('CACHE_KEY_PREFIX') or 'cache:')
+        return cls(*args, **kwargs)
+
+    def _prazo(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return None if timeout == 0 else timeout
+
+    def get(self, key):
+        valor = self.armazem.obter(self.prefixo + key)
+        if valor is None: return None
+        try: return pickle.loads(valor)
+        except: return None
+
+    def set(self, key, value, timeout=None):
+        return self.armazem.guardar(self.prefixo + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._prazo(timeout))
+
+    def add(self, key, value, timeout=None):
+        return self.armazem.guardar(self.prefixo + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                                    self._prazo(timeout), so_se_ausente=True)
+
+    def delete(self, key): return self.armazem.apagar(self.prefixo + key)
+
+    def has(self, key): return self.armazem.obter(self.prefixo + key) is not None
+
+    def clear(self):
+        self.armazem.limpar()
+        return True
+
+
+class AvisosLimiter(logging.Handler):
+    """Leva os avisos do flask-limiter (storage caiu / voltou) para o log do app e conta as quedas."""
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.quedas = 0
+
+    def emit(self, record):
+        mensagem = record.getMessage()
+        if 'falling back' in mensagem: self.quedas += 1
+        print(f"--> [LIMITER] {mensagem}")
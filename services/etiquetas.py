@@ -0,0 +1,176 @@
+import re
+
+from services.texto import normalizar_texto
+
+try:
+    from constants import TERMOS_BANCAS
+except ImportError:
+    TERMOS_BANCAS = []
+
+# --- LISTAS DE ETIQUETAS ---
+# Escolaridade: casa como substring do texto normalizado (Lista Ampliada)
+TERMOS_NIVEIS = {
+    'fundamental': ['fundamental', 'alfabetizado', 'elementar', 'operacional', '1o grau', 'primeiro grau'],
+    'medio': ['medio', 'tecnico', 'assistente', 'ensino medio', '2o grau', 'segundo grau', 'nivel medio'],
+    'superior': ['superior', 'graduacao', 'bacharel', 'licenciatura', 'analista', 'especialista', 'medico',
+                 'enfermeiro', 'engenheiro', 'advogado', 'procurador', 'juiz', 'promotor', 'professor',
+                 'auditor', 'gestor'],
+}
+
+# Nome por extenso -> sigla, na ordem de prioridade do extrair_uf
+ESTADOS = {
+    'acre': 'AC', 'alagoas': 'AL', 'amapá': 'AP', 'amazonas': 'AM', 'bahia': 'BA', 'ceará': 'CE',
+    'distrito federal': 'DF', 'espírito santo': 'ES', 'goiás': 'GO', 'maranhão': 'MA', 'mato grosso': 'MT',
+    'minas gerais': 'MG', 'pará': 'PA', 'paraíba': 'PB', 'paraná': 'PR', 'pernambuco': 'PE', 'piauí': 'PI',
+    'rio de janeiro': 'RJ', 'rio grande do norte': 'RN', 'rio grande do sul': 'RS', 'rondônia': 'RO',
+    'roraima': 'RR', 'santa catarina': 'SC', 'são paulo': 'SP', 'sergipe': 'SE', 'tocantins': 'TO'
+}
+
+# Nomes de banca que também são palavras comuns (ou o órgão que contrata, não quem organiza):
+# só viram banca quando o anúncio fala em banca/organizadora. O resto de TERMOS_BANCAS
+# são siglas e nomes próprios, que valem em qualquer texto.
+BANCAS_AMBIGUAS = frozenset(normalizar_texto(t) for t in (
+    'access', 'actio', 'advise', 'agata', 'air', 'alfa', 'alternative', 'anima', 'apice', 'aprender', 'ares',
+    'atena', 'avalia', 'avaliar', 'avancar', 'bios', 'click', 'creative', 'crescer', 'cursiva', 'darwin',
+    'direcao', 'directa', 'ethos', 'evo', 'exata', 'excelencia', 'exercito', 'facto', 'fama', 'fenix', 'fluxo',
+    'fronte', 'fundacao', 'gama', 'group', 'imagine', 'iniciativa', 'integri', 'intelectus', 'jota', 'legatus',
+    'magnus', 'master', 'maxima', 'metodo', 'metropole', 'nemesis', 'noroeste', 'objetiva', 'omni', 'planejar',
+    'pontua', 'prime', 'referencia', 'reis', 'seletiva', 'sigma', 'status', 'sustente', 'una', 'uno', 'verbena',
+    'wedo', 'wisdom',
+    # órgãos e secretarias que aparecem muito mais como quem contrata
+    'agu', 'fab.mil', 'mpf', 'mpt', 'pge', 'pgt', 'sead', 'seap', 'seduc', 'ses',
+))
+# Palavras que indicam que o anúncio cita a organizadora (palavra inteira)
+CONTEXTO_BANCA = ('banca', 'bancas', 'organizadora', 'organizadoras', 'organizador', 'organizacao', 'realizacao')
+# O nome ambíguo vale se vier até JANELA_CONTEXTO palavras depois de uma delas, na mesma frase
+# ("Banca: Objetiva", "organizadora Instituto Objetiva"); "Prefeitura de Gama ... Banca: X" não
+JANELA_CONTEXTO = 3
+REGEX_PALAVRA_FRASE = re.compile(r'\w+(?:\.\w+)*|[.;!?]')  # 'fab.mil' é uma palavra; ponto solto fecha a frase
+
+NIVEL, ESTADO, BANCA, BANCA_AMBIGUA, CONTEXTO = 0, 1, 2, 3, 4
+
+
+class Automato:
+    """Aho–Corasick: todos os padrões achados numa única passada pelo texto.
+
+    `padroes` é uma lista de (texto, rotulo, palavra_inteira). O custo da
+    busca depende do tamanho do texto e do número de ocorrências, não da
+    quantidade de padrões cadastrados.
+
+    O texto é percorrido em pedaços separados por espaço, e o resultado de
+    cada (estado, pedaço) fica memorizado: o vocabulário dos anúncios se
+    repete muito, então quase todo pedaço sai de um dict em vez do laço por
+    caractere. Padrões de palavra inteira não podem conter espaço (a
+    fronteira é checada dentro do pedaço).
+    """
+
+    MAX_MEMO = 200000
+
+    def __init__(self, padroes):
+        self.filhos = [{}]
+        self.falha = [0]
+        self.saida = [[]]
+        for texto, rotulo, palavra_inteira in padroes:
+            texto = texto.strip()
+            if not texto: continue
+            if palavra_inteira and ' ' in texto: raise ValueError(f"Padrão de palavra inteira com espaço: {texto!r}")
+            estado = 0
+            for c in texto:
+                prox = self.filhos[estado].get(c)
+                if prox is None:
+                    prox = len(self.filhos)
+                    self.filhos[estado][c] = prox
+                    self.filhos.append({})
+                    self.falha.append(0)
+                    self.saida.append([])
+                estado = prox
+            self.saida[estado].append((rotulo, len(texto), palavra_inteira))
+
+        # BFS: link de falha = maior sufixo próprio que também é prefixo de algum padrão
+        fila = list(self.filhos[0].values())
+        for estado in fila:
+            for c, prox in self.filhos[estado].items():
+                f = self.falha[estado]
+                while f and c not in self.filhos[f]: f = self.falha[f]
+                self.falha[prox] = self.filhos[f].get(c, 0)
+                self.saida[prox] = self.saida[prox] + self.saida[self.falha[prox]]
+                fila.append(prox)
+        # Transição pelo espaço já resolvida (padrões não terminam em espaço, então ela não emite nada)
+        self.espaco = []
+        for estado in range(len(self.filhos)):
+            f = estado
+            while f and ' ' not in self.filhos[f]: f = self.falha[f]
+            self.espaco.append(self.filhos[f].get(' ', 0))
+        self._memo = [{} for _ in self.filhos]
+        self._memorizados = 0
+
+    def _avancar(self, estado, pedaco):
+        """Processa `pedaco` a partir de `estado` -> (estado final, rótulos achados)."""
+        filhos, falha, saida = self.filhos, self.falha, self.saida
+        achados = set()
+        n = len(pedaco)
+        for fim, c in enumerate(pedaco):
+            while estado and c not in filhos[estado]: estado = falha[estado]
+            estado = filhos[estado].get(c, 0)
+            for rotulo, tamanho, palavra_inteira in saida[estado]:
+                if palavra_inteira:
+                    inicio = fim - tamanho + 1
+                    if inicio > 0 and pedaco[inicio - 1].isalnum(): continue
+                    if fim + 1 < n and pedaco[fim + 1].isalnum(): continue
+                achados.add(rotulo)
+        return estado, frozenset(achados)
+
+    def procurar(self, texto):
+        """Conjunto de rótulos dos padrões presentes em `texto`."""
+        if self._memorizados > self.MAX_MEMO:
+            self._memo = [{} for _ in self.filhos]
+            self._memorizados = 0
+        memo, espaco = self._memo, self.espaco
+        achados = set()
+        estado = 0
+        for pedaco in texto.split(' '):
+            r = memo[estado].get(pedaco)
+            if r is None:
+                r = memo[estado][pedaco] = self._avancar(estado, pedaco)
+                self._memorizados += 1
+            if r[1]: achados |= r[1]
+            estado = espaco[r[0]]
+        return achados
+
+
+def _padroes():
+    for nivel, termos in TERMOS_NIVEIS.items():
+        for termo in termos: yield termo, (NIVEL, nivel), False
+    for nome, sigla in ESTADOS.items():
+        yield normalizar_texto(nome), (ESTADO, nome), False
+    # Siglas curtas de banca ("cl", "fat") só valem como palavra inteira
+    for termo in TERMOS_BANCAS:
+        termo = normalizar_texto(termo)
+        yield termo, (BANCA_AMBIGUA if termo in BANCAS_AMBIGUAS else BANCA, termo), True
+    for termo in CONTEXTO_BANCA: yield termo, (CONTEXTO, termo), True
+
+MARCADOR = Automato(_padroes())
+
+
+def etiquetar(texto_normalizado):
+    """Uma passada no texto normalizado -> (níveis, nomes de estado candidatos, bancas)."""
+    niveis, estados, bancas, ambiguas, contexto = set(), set(), set(), set(), False
+    for tipo, valor in MARCADOR.procurar(texto_normalizado):
+        if tipo == NIVEL: niveis.add(valor)
+        elif tipo == ESTADO: estados.add(valor)
+        elif tipo == BANCA: bancas.add(valor)
+        elif tipo == BANCA_AMBIGUA: ambiguas.add(valor)
+        else: contexto = True
+    if contexto and ambiguas: bancas |= _citadas_como_banca(texto_normalizado, ambiguas)
+    return niveis, estados, bancas
+
+def _citadas_como_banca(texto_normalizado, ambiguas):
+    """Quais nomes de `ambiguas` aparecem logo depois de uma palavra de CONTEXTO_BANCA."""
+    palavras = REGEX_PALAVRA_FRASE.findall(texto_normalizado)
+    citadas = set()
+    for i, palavra in enumerate(palavras):
+        if palavra not in CONTEXTO_BANCA: continue
+        for seguinte in palavras[i + 1:i + 1 + JANELA_CONTEXTO]:
+            if seguinte in '.;!?': break
+            if seguinte in ambiguas: citadas.add(seguinte)
+    return citadas
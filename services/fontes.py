@@ -0,0 +1,76 @@
+import os
+from urllib.parse import urlsplit, urljoin
+
+from services.listagem import extrair_blocos
+
+try:
+    from constants import URL_BASE
+except ImportError:
+    URL_BASE = "https://www.pciconcursos.com.br/concursos/"
+
+# --- ADAPTADORES DE FONTE ---
+# Uma fonte sabe quais páginas baixar e como transformar o HTML de cada uma
+# em blocos (texto, link). Todo o resto (download concorrente, GET
+# condicional, enriquecimento, dedup por link, snapshot) é comum e fica no
+# scraper. Para cobrir um site novo basta registrar mais um adaptador.
+#
+# SCRAPER_FONTES escolhe quais fontes rodam (nomes separados por vírgula, na
+# ordem de prioridade: com o mesmo link em duas fontes, vale a primeira).
+
+
+class Fonte:
+    """Adaptador base: subclasses definem `nome` e, se preciso, `blocos`."""
+
+    nome = None
+
+    def __init__(self, urls):
+        self._urls = list(urls)
+
+    def urls(self):
+        """Páginas a baixar, em ordem de prioridade (listagens, regiões, paginação...)."""
+        return list(self._urls)
+
+    def blocos(self, html, url):
+        """HTML de uma página -> [(texto, link absoluto)] na ordem do documento."""
+        # "/noticias/x" e "//host/x" resolvidos contra a página: o /ir e o sitemap só aceitam URL absoluta
+        return [(texto, urljoin(url, link)) for texto, link in extrair_blocos(html)]
+
+
+class FontePCI(Fonte):
+    """pciconcursos.com.br: o parser "Modo Aspirador" de sempre.
+
+    PCI_URLS troca ou amplia as páginas (ex.: listagens regionais), separadas
+    por vírgula; o padrão é só a página geral (URL_BASE).
+    """
+
+    nome = 'pciconcursos'
+
+    def __init__(self, urls=None):
+        if urls is None:
+            urls = [u.strip() for u in os.environ.get('PCI_URLS', '').split(',') if u.strip()] or [URL_BASE]
+        super().__init__(urls)
+
+
+FONTES = {}
+
+def registrar_fonte(fonte):
+    FONTES[fonte.nome] = fonte
+    return fonte
+
+registrar_fonte(FontePCI())
+
+
+def fontes_ativas():
+    nomes = [n.strip() for n in os.environ.get('SCRAPER_FONTES', FontePCI.nome).split(',') if n.strip()]
+    ativas = []
+    for nome in nomes:
+        if nome in FONTES: ativas.append(FONTES[nome])
+        else: print(f"--> [FONTES] Fonte desconhecida ignorada: {nome}")
+    return ativas
+
+def host_de(url):
+    return urlsplit(url).netloc.lower()
+
+def hosts_das_fontes(fontes=None):
+    """Hosts de todas as páginas das fontes (ativas, sem `fontes`)."""
+    return frozenset(host_de(u) for f in (fontes_ativas() if fontes is None else fontes) for u in f.urls())
@@ -0,0 +1,123 @@
+import os
+import json
+import hashlib
+
+from services.snapshot import escrever_atomico
+
+CAMPOS_CONJUNTO = ('tokens', 'niveis', 'bancas')
+
+
+def hash_bloco(texto, link):
+    """Identidade do bloco da listagem: muda se o texto ou o link mudarem."""
+    return hashlib.blake2b(f"{link}\0{texto}".encode('utf-8'), digest_size=8).hexdigest()
+
+def assinatura(item):
+    """O que conta como 'alterado' entre duas versões do mesmo link."""
+    return (item['texto'], item['data_fim'])
+
+def _para_json(item):
+    if item is None: return None
+    return {k: sorted(v) if k in CAMPOS_CONJUNTO else v for k, v in item.items()}
+
+def _de_json(item):
+    if item is None: return None
+    return {k: set(v) if k in CAMPOS_CONJUNTO else v for k, v in item.items()}
+
+
+class EstadoRaspagem:
+    """O que a raspagem anterior deixou para a próxima, num JSON ao lado dos snapshots.
+
+    - paginas: url -> {etag, last_modified, blocos}. Os validadores servem
+      para o GET condicional; os blocos (texto, link) da última resposta 200
+      permitem revalidar os vencimentos quando o dia vira e o servidor
+      responde 304, e seguram a página quando um download falha;
+    - enriquecidos: hash do bloco -> registro pronto (None = descartado).
+      O enriquecimento só depende do bloco e da data de hoje, então o cache
+      vale para o `dia` em que foi feito;
+    - verificado_em: última vez que as páginas foram conferidas (mudando ou não).
+
+    Só quem segura o lock de atualização grava; os demais workers releem o
+    arquivo quando o mtime muda.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._mtime = None
+        self._limpar()
+
+    def _limpar(self):
+        self.paginas = {}
+        self.dia = None
+        self.enriquecidos = {}
+        self.verificado_em = 0.0
+
+    def carregar(self):
+        try:
+            mtime = os.path.getmtime(self.caminho)
+        except OSError:
+            return self
+        if mtime == self._mtime: return self
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                d = json.load(f)
+            self.paginas = {}
+            for url, p in d.get('paginas', {}).items():
+                self.paginas[url] = dict(p, blocos=[tuple(b) for b in p.get('blocos', [])])
+            self.dia = d.get('dia')
+            self.enriquecidos = {h: _de_json(item) for h, item in d.get('enriquecidos', {}).items()}
+            self.verificado_em = d.get('verificado_em', 0.0)
+        except Exception as e:
+            print(f"--> [INCREMENTAL] Estado ilegível, recomeçando do zero: {e}")
+            self._limpar()
+        self._mtime = mtime
+        return self
+
+    def liberar(self):
+        """Solta blocos e registros da memória; o próximo carregar() relê o arquivo."""
+        self.paginas, self.enriquecidos = {}, {}
+        self._mtime = None
+
+    def salvar(self):
+        conteudo = json.dumps({
+            'paginas': self.paginas,
+            'dia': self.dia,
+            'enriquecidos': {h: _para_json(item) for h, item in self.enriquecidos.items()},
+            'verificado_em': self.verificado_em,
+        }, ensure_ascii=False).encode('utf-8')
+        escrever_atomico(self.caminho, conteudo)
+        self._mtime = os.path.getmtime(self.caminho)
+
+    def cabecalhos(self, url):
+        """If-None-Match / If-Modified-Since da última resposta 200 de `url`."""
+        p, h = self.paginas.get(url), {}
+        if not p: return h
+        if p.get('etag'): h['If-None-Match'] = p['etag']
+        if p.get('last_modified'): h['If-Modified-Since'] = p['last_modified']
+        return h
+
+
+def calcular_diff(anteriores, novos):
+    """Diferença por link entre duas listas de concursos (ou snapshots).
+
+    Retorna {'adicionados', 'removidos', 'alterados'} com os links, na ordem
+    em que aparecem na lista nova (removidos: na ordem da antiga).
+    """
+    antes = {}
+    if anteriores is not None and getattr(anteriores, 'colunas', None) is not None:
+        col = anteriores.colunas
+        for i in range(len(anteriores)):
+            antes[col['link'][i]] = (col['texto'][i], col['data_fim'][i])
+    else:
+        for item in anteriores or (): antes[item['link']] = assinatura(item)
+
+    adicionados, alterados, vistos = [], [], set()
+    for item in novos:
+        link = item['link']
+        vistos.add(link)
+        if link not in antes: adicionados.append(link)
+        elif antes[link] != assinatura(item): alterados.append(link)
+    removidos = [link for link in antes if link not in vistos]
+    return {'adicionados': adicionados, 'removidos': removidos, 'alterados': alterados}
+
+def diff_vazio(diff):
+    return not (diff['adicionados'] or diff['removidos'] or diff['alterados'])
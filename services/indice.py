@@ -0,0 +1,334 @@
+import re
+import threading
+from bisect import bisect_left
+
+from services.texto import normalizar_texto
+
+try:
+    from constants import UFS_SIGLAS, REGIOES
+except ImportError:
+    UFS_SIGLAS = []
+    REGIOES = {}
+
+UF_NACIONAL = 'Nacional/Outro'
+SIGLAS_INDEXADAS = list(UFS_SIGLAS) + [UF_NACIONAL]
+NIVEIS = ('fundamental', 'medio', 'superior')
+REGEX_PALAVRA = re.compile(r'\w+')
+
+# Faixas de salário das facetas: (rótulo, mínimo inclusive, máximo exclusivo ou None)
+FAIXAS_SALARIO = (
+    ('A consultar', 0, 1),
+    ('Até R$ 3 mil', 1, 3000),
+    ('R$ 3 a 6 mil', 3000, 6000),
+    ('R$ 6 a 10 mil', 6000, 10000),
+    ('R$ 10 a 20 mil', 10000, 20000),
+    ('Acima de R$ 20 mil', 20000, None),
+)
+
+
+def linha_saida(item):
+    """Formato público de um concurso na resposta da API."""
+    return {
+        'Salário': item['salario_formatado'],
+        'UF': item['uf'],
+        'Data Fim Inscrição': item['data_fim'],
+        'Informações do Concurso': item['texto'],
+        'Link': item['link'],
+        'Banca': nome_bancas(item.get('bancas'))
+    }
+
+def nome_bancas(bancas):
+    """Bancas como aparecem no card: 'CEBRASPE, FGV' ('' se nenhuma)."""
+    return ', '.join(sorted(b.upper() for b in bancas)) if bancas else ''
+
+def para_bits(ids):
+    """Conjunto de posições -> bitset num int (bit i = item i)."""
+    ids = list(ids)
+    if not ids: return 0
+    mapa = bytearray((max(ids) >> 3) + 1)
+    for i in ids: mapa[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(mapa, 'little')
+
+def buscar_em(tabela, chave):
+    """Posição de `chave` numa tabela ordenada (lista ou coluna do snapshot), ou -1."""
+    k = bisect_left(tabela, chave)
+    return k if k < len(tabela) and tabela[k] == chave else -1
+
+
+class IndiceBusca:
+    """Índice invertido de um snapshot, montado uma única vez.
+
+    Cada filtro vira um conjunto de posições (ids = ordem original da lista);
+    a busca intersecta do menor para o maior e só então monta a saída,
+    preservando exatamente a semântica do antigo laço linear.
+
+    As estruturas são tabelas ordenadas + listas de postings, no mesmo
+    layout que o snapshot binário grava: sobre um snapshot mapeado o índice
+    só aponta para as seções prontas, sem reconstruir nada.
+    """
+
+    def __init__(self, dados):
+        self.dados = dados
+        self.total = len(dados)
+        self._cache_palavras = {}
+        self._lock = threading.Lock()
+        if getattr(dados, 'secoes_indice', None) is not None:
+            self._anexar(dados)
+        else:
+            self._montar(dados)
+        self.pos_sigla = {sigla: k for k, sigla in enumerate(self.siglas)}
+        self.pos_nivel = {nivel: k for k, nivel in enumerate(NIVEIS)}
+        self._bits = None
+
+    def _montar(self, dados):
+        self.textos = [item['texto'] for item in dados]
+        self.textos_norm = [item['texto_normalized'] for item in dados]
+        self.ufs_itens = [item['uf'] for item in dados]
+        self.salarios = [item['salario_num'] for item in dados]
+        self.linha = lambda i: linha_saida(dados[i])  # só monta a linha de quem aparece na resposta
+
+        # Vocabulário ordenado -> posições; n-gramas (2 e 3) -> vocabulário
+        postings = {}
+        for i, item in enumerate(dados):
+            for tok in item['tokens']:
+                postings.setdefault(tok, []).append(i)
+        self.vocabulario = sorted(postings)
+        self.postings = [postings[tok] for tok in self.vocabulario]
+        gramas = {}
+        for v, tok in enumerate(self.vocabulario):
+            for n in (2, 3):
+                for g in {tok[j:j + n] for j in range(len(tok) - n + 1)}:
+                    gramas.setdefault(g, []).append(v)
+        self.gramas = sorted(gramas)
+        self.gramas_vocab = [gramas[g] for g in self.gramas]
+
+        # UF: conta a sigla do item OU a sigla aparecendo no texto (semântica antiga)
+        self.siglas = SIGLAS_INDEXADAS
+        self.nacional = [i for i, uf in enumerate(self.ufs_itens) if uf == UF_NACIONAL]
+        self.por_uf = [[i for i, uf in enumerate(self.ufs_itens) if uf == sigla or sigla in self.textos[i]]
+                       for sigla in self.siglas]
+        self.por_nivel = [[i for i, item in enumerate(dados) if nivel in item['niveis']] for nivel in NIVEIS]
+        por_banca = {}
+        for i, item in enumerate(dados):
+            for banca in item.get('bancas') or ():
+                por_banca.setdefault(banca, []).append(i)
+        self.bancas = sorted(por_banca)
+        self.por_banca = [por_banca[b] for b in self.bancas]
+
+        # Salário: array ordenado + bisect
+        self.ids_por_salario = sorted(range(self.total), key=self.salarios.__getitem__)
+        self.salarios_ordenados = [self.salarios[i] for i in self.ids_por_salario]
+
+    def _anexar(self, snap):
+        # Snapshot mapeado: tudo já vem pronto do arquivo
+        s = snap.secoes_indice
+        self.textos = snap.colunas['texto']
+        self.textos_norm = snap.colunas['texto_normalized']
+        self.ufs_itens = snap.colunas['uf']
+        self.salarios = snap.salarios
+        self.linha = snap.linha
+        self.vocabulario, self.postings = s['vocabulario'], s['postings']
+        self.gramas, self.gramas_vocab = s['gramas'], s['gramas_vocab']
+        self.siglas, self.nacional = s['siglas'], s['nacional']
+        self.por_uf, self.por_nivel = s['por_uf'], s['por_nivel']
+        self.bancas, self.por_banca = s['bancas'], s['por_banca']
+        self.ids_por_salario, self.salarios_ordenados = s['ids_por_salario'], s['salarios_ordenados']
+
+    # --- CONJUNTOS POR FILTRO ---
+    def _tokens_contendo(self, pedaco):
+        """Posições no vocabulário dos tokens que contêm `pedaco`."""
+        vocab = self.vocabulario
+        if len(pedaco) < 2:
+            return [v for v in range(len(vocab)) if pedaco in vocab[v]]
+        n = min(3, len(pedaco))
+        candidatos = None
+        for j in range(len(pedaco) - n + 1):
+            g = buscar_em(self.gramas, pedaco[j:j + n])
+            if g < 0: return []
+            candidatos = set(self.gramas_vocab[g]) if candidatos is None else candidatos.intersection(self.gramas_vocab[g])
+            if not candidatos: return []
+        return [v for v in candidatos if pedaco in vocab[v]]
+
+    def _ids_palavra(self, chave):
+        """Itens cujo texto normalizado contém `chave` (inclui palavras parciais)."""
+        if chave in self._cache_palavras: return self._cache_palavras[chave]
+        pedacos = REGEX_PALAVRA.findall(chave)
+        if not pedacos:
+            ids = {i for i in range(self.total) if chave in self.textos_norm[i]}
+        else:
+            ids = None
+            for pedaco in sorted(set(pedacos), key=len, reverse=True):
+                achados = set()
+                for v in self._tokens_contendo(pedaco):
+                    achados.update(self.postings[v])
+                ids = achados if ids is None else ids & achados
+                if not ids: break
+            # Tokens perdem a pontuação: confirma no texto real
+            ids = {i for i in ids if chave in self.textos_norm[i]}
+        with self._lock:
+            if len(self._cache_palavras) > 2048: self._cache_palavras.clear()
+            self._cache_palavras[chave] = ids
+        return ids
+
+    def _ids_uf(self, ufs):
+        ids = set(self.nacional)
+        for uf in ufs:
+            if uf in self.pos_sigla:
+                ids.update(self.por_uf[self.pos_sigla[uf]])
+            else:
+                ids.update(i for i in range(self.total) if self.ufs_itens[i] == uf or uf in self.textos[i])
+        return ids
+
+    def _bloqueados(self, excluir):
+        """Itens com alguma palavra excluída (token exato)."""
+        bloqueados = set()
+        for palavra in set(normalizar_texto(p) for p in excluir or ()):
+            v = buscar_em(self.vocabulario, palavra)
+            if v >= 0: bloqueados.update(self.postings[v])
+        return bloqueados
+
+    def _conjuntos_filtros(self, ufs, niveis_filtro, bancas_filtro):
+        """Um conjunto de posições por filtro de UF, nível e banca presente."""
+        conjuntos = []
+        if ufs: conjuntos.append(self._ids_uf(ufs))
+
+        if niveis_filtro:
+            ids = set()
+            for nivel in set(niveis_filtro):
+                if nivel in self.pos_nivel: ids.update(self.por_nivel[self.pos_nivel[nivel]])
+            conjuntos.append(ids)
+
+        if bancas_filtro:
+            ids = set()
+            for banca in set(normalizar_texto(b) for b in bancas_filtro):
+                k = buscar_em(self.bancas, banca)
+                if k >= 0: ids.update(self.por_banca[k])
+            conjuntos.append(ids)
+        return conjuntos
+
+    # --- BUSCA ---
+    def buscar(self, sal_min, chaves, ufs, excluir, niveis_filtro=None, bancas_filtro=None):
+        return [self.linha(i) for i in self.buscar_ids(sal_min, chaves, ufs, excluir, niveis_filtro, bancas_filtro)]
+
+    def buscar_ids(self, sal_min, chaves, ufs, excluir, niveis_filtro=None, bancas_filtro=None):
+        """Posições (em ordem original) dos concursos que passam nos filtros."""
+        if not self.total: return []
+        conjuntos = self._conjuntos_filtros(ufs, niveis_filtro, bancas_filtro)
+
+        chaves_norm = [normalizar_texto(k) for k in chaves] if chaves else []
+        if chaves_norm:
+            if '' in chaves_norm:
+                pass  # string vazia casa com tudo
+            else:
+                ids = set()
+                for k in chaves_norm: ids |= self._ids_palavra(k)
+                conjuntos.append(ids)
+
+        # Salário entra como conjunto só se for o filtro mais seletivo
+        pos_salario = bisect_left(self.salarios_ordenados, sal_min) if sal_min > 0 else 0
+        qtd_salario = self.total - pos_salario
+        if pos_salario and (not conjuntos or qtd_salario < min(len(c) for c in conjuntos)):
+            conjuntos.append(set(self.ids_por_salario[pos_salario:]))
+            pos_salario = 0
+
+        if conjuntos:
+            conjuntos.sort(key=len)
+            res = conjuntos[0]
+            for c in conjuntos[1:]:
+                res = res & c
+                if not res: return []
+        else:
+            res = range(self.total)
+
+        bloqueados = self._bloqueados(excluir)
+        salarios = self.salarios
+        return [i for i in sorted(res)
+                if i not in bloqueados and (not pos_salario or salarios[i] >= sal_min)]
+
+
+    # --- FACETAS ---
+    def _bitsets(self):
+        """Bitsets por UF, nível e faixa de salário, montados uma vez por snapshot."""
+        if self._bits is not None: return self._bits
+        with self._lock:
+            if self._bits is None:
+                nacional = para_bits(self.nacional)
+                faixas = []
+                for rotulo, minimo, maximo in FAIXAS_SALARIO:
+                    ini = bisect_left(self.salarios_ordenados, minimo)
+                    fim = bisect_left(self.salarios_ordenados, maximo) if maximo is not None else self.total
+                    faixas.append(para_bits(self.ids_por_salario[ini:fim]))
+                self._bits = {
+                    'todos': (1 << self.total) - 1,
+                    'nacional': nacional,
+                    'uf': [para_bits(ids) | nacional for ids in self.por_uf],
+                    'nivel': [para_bits(ids) for ids in self.por_nivel],
+                    'faixas': faixas,
+                }
+        return self._bits
+
+    def _bits_ufs(self, ufs):
+        b = self._bitsets()
+        bits = b['nacional']
+        for uf in ufs:
+            if uf in self.pos_sigla: bits |= b['uf'][self.pos_sigla[uf]]
+            else: bits |= para_bits(self._ids_uf([uf]))
+        return bits
+
+    def facetas(self, sal_min, chaves, ufs, excluir, niveis_filtro=None, bancas_filtro=None):
+        """Quantos resultados cada UF, região, nível e faixa de salário daria com os demais filtros.
+
+        Cada grupo é contado sem o próprio filtro (trocar de UF não zera as
+        outras UFs); os demais filtros entram como bitsets e cada contagem é
+        um AND + popcount.
+        """
+        b = self._bitsets()
+        filtros = {}
+        if ufs: filtros['uf'] = self._bits_ufs(ufs)
+        if niveis_filtro:
+            filtros['nivel'] = 0
+            for nivel in set(niveis_filtro):
+                if nivel in self.pos_nivel: filtros['nivel'] |= b['nivel'][self.pos_nivel[nivel]]
+        if sal_min > 0:
+            filtros['salario'] = para_bits(self.ids_por_salario[bisect_left(self.salarios_ordenados, sal_min):])
+        # Palavra-chave, banca e exclusão não têm faceta: entram sempre
+        resto = b['todos']
+        if chaves or bancas_filtro:
+            ids = self.buscar_ids(0, chaves, [], [], None, bancas_filtro)
+            resto = para_bits(ids)
+        if excluir: resto &= ~para_bits(self._bloqueados(excluir))
+
+        def sem(grupo):
+            bits = resto
+            for g, v in filtros.items():
+                if g != grupo: bits &= v
+            return bits
+
+        base_uf, base_nivel, base_sal = sem('uf'), sem('nivel'), sem('salario')
+        return {
+            'total': sem(None).bit_count(),
+            'uf': {sigla: (base_uf & self._bits_ufs([sigla])).bit_count() for sigla in UFS_SIGLAS},
+            'regiao': dict([('Nacional', (base_uf & self._bits_ufs([UF_NACIONAL])).bit_count())] +
+                           [(r, (base_uf & self._bits_ufs(s)).bit_count()) for r, s in REGIOES.items()]),
+            'nivel': {nivel: (base_nivel & b['nivel'][k]).bit_count() for k, nivel in enumerate(NIVEIS)},
+            'salario': [{'faixa': rotulo, 'min': minimo, 'max': maximo, 'total': (base_sal & bits).bit_count()}
+                        for (rotulo, minimo, maximo), bits in zip(FAIXAS_SALARIO, b['faixas'])],
+        }
+
+
+# Guarda o snapshot atual e o anterior: requests em voo durante a troca
+# continuam achando o índice da lista que já tinham em mãos.
+_INDICES = ()
+_LOCK_INDICE = threading.Lock()
+
+def obter_indice(dados):
+    """Índice do snapshot `dados` (reconstruído só quando a lista muda)."""
+    global _INDICES
+    for lista, indice in _INDICES:
+        if lista is dados: return indice
+    with _LOCK_INDICE:
+        for lista, indice in _INDICES:
+            if lista is dados: return indice
+        indice = IndiceBusca(dados)
+        _INDICES = ((dados, indice),) + _INDICES[:1]
+        return indice
@@ -0,0 +1,177 @@
+import os
+import time
+import atexit
+import threading
+
+from services.armazem_sqlite import conectar
+from services.metricas import metricas
+
+# --- ESQUEMA ---
+# As duas tabelas crescem só por acréscimo e o id segue a ordem de chegada:
+# páginas do painel e exportação andam pelo id (sem OFFSET, sem ORDER BY em data).
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id INTEGER PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    criado_em REAL NOT NULL,
+    atualizado_em REAL NOT NULL,
+    cadastros INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS buscas (
+    id INTEGER PRIMARY KEY,
+    criado_em REAL NOT NULL,
+    palavra_chave TEXT, salario_minimo TEXT, regioes TEXT, ufs TEXT, niveis TEXT, excluir TEXT, banca TEXT
+);
+"""
+COLUNAS_BUSCA = ('palavra_chave', 'salario_minimo', 'regioes', 'ufs', 'niveis', 'excluir', 'banca')
+POR_PAGINA = 50
+MAX_PENDENTES = 5000  # buscas esperando gravação; além disso descarta e conta
+
+
+def normalizar_email(email): return (email or '').strip().lower()
+
+def data_hora(timestamp): return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+class RegistroLeads:
+    """Leads (um por e-mail) e buscas feitas no site, num SQLite compartilhado pelos workers.
+
+    Cadastro é gravado na hora (é raro e precisa do "já existia?"); buscas
+    entram numa lista em memória e vão para o banco em lote a cada
+    `intervalo` segundos, numa transação só. O leads.txt antigo é importado
+    uma vez, na primeira abertura com a tabela vazia.
+    """
+
+    def __init__(self, caminho, arquivo_legado=None, intervalo=2.0, timeout=30.0):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pendentes = []
+        self._thread = None
+        self.descartadas = 0
+        con = self._conexao()
+        con.executescript(ESQUEMA)
+        if arquivo_legado and os.path.exists(arquivo_legado): self._importar_legado(arquivo_legado)
+        atexit.register(self.descarregar)
+
+    def _conexao(self):
+        con = getattr(self._local, 'con', None)
+        if con is None: con = self._local.con = conectar(self.caminho, self.timeout)
+        return con
+
+    def _importar_legado(self, arquivo):
+        """Linhas 'AAAA-MM-DD HH:MM:SS - email' do leads.txt; repetidos contam como recadastro."""
+        con = self._conexao()
+        con.execute('BEGIN IMMEDIATE')  # dois workers subindo juntos: só o primeiro importa
+        try:
+            if con.execute('SELECT 1 FROM leads LIMIT 1').fetchone() is None:
+                vistos = {}
+                with open(arquivo, 'r', encoding='utf-8') as f:
+                    for linha in f:
+                        if ' - ' not in linha: continue
+                        data, email = linha.strip().split(' - ', 1)
+                        email = normalizar_email(email)
+                        if not email: continue
+                        try: ts = time.mktime(time.strptime(data, '%Y-%m-%d %H:%M:%S'))
+                        except ValueError: ts = 0.0
+                        if email in vistos: vistos[email][1:] = [ts, vistos[email][2] + 1]
+                        else: vistos[email] = [ts, ts, 1]
+                con.executemany('INSERT INTO leads (email, criado_em, atualizado_em, cadastros) VALUES (?, ?, ?, ?)',
+                                [(e,) + tuple(v) for e, v in sorted(vistos.items(), key=lambda kv: kv[1][0])])
+                if vistos: print(f"--> [LEADS] {len(vistos)} e-mail(s) importados de {os.path.basename(arquivo)}")
+            con.execute('COMMIT')
+        except:
+            con.execute('ROLLBACK')
+            raise
+
+    # --- LEADS ---
+    def cadastrar(self, email, agora=None):
+        """Grava o e-mail; True se é novo, False se só renovou um cadastro existente."""
+        email, agora = normalizar_email(email), agora or time.time()
+        with metricas.medir('leads', op='cadastrar'):
+            con = self._conexao()
+            novo = con.execute('INSERT OR IGNORE INTO leads (email, criado_em, atualizado_em) VALUES (?, ?, ?)',
+                               (email, agora, agora)).rowcount == 1
+            if not novo:
+                con.execute('UPDATE leads SET atualizado_em = ?, cadastros = cadastros + 1 WHERE email = ?', (agora, email))
+        return novo
+
+    def total_leads(self):
+        return self._conexao().execute('SELECT count(*) FROM leads').fetchone()[0]
+
+    def pagina_leads(self, antes=None, limite=POR_PAGINA):
+        """Leads do mais novo ao mais antigo, a partir do id `antes`: (linhas, id para a próxima página ou None)."""
+        return self._pagina('SELECT id, criado_em, email, cadastros FROM leads', antes, limite,
+                            lambda id_, ts, email, n: {'data': data_hora(ts), 'email': email, 'cadastros': n})
+
+    def exportar_leads(self):
+        """Linhas do CSV de leads, lidas do banco aos poucos (na ordem de cadastro)."""
+        yield ('Data', 'Email', 'Cadastros', 'Ultimo cadastro')
+        for ts, email, n, ultimo in self._conexao().execute(
+                'SELECT criado_em, email, cadastros, atualizado_em FROM leads ORDER BY id'):
+            yield (data_hora(ts), email, n, data_hora(ultimo))
+
+    # --- BUSCAS ---
+    def registrar_busca(self, campos, agora=None):
+        """Enfileira uma busca (valores na ordem de COLUNAS_BUSCA); a gravação sai em lote."""
+        with self._lock:
+            if len(self._pendentes) >= MAX_PENDENTES:
+                self.descartadas += 1
+                return False
+            self._pendentes.append((agora or time.time(),) + tuple(campos))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='registro-buscas', daemon=True)
+                self._thread.start()
+        return True
+
+    def _loop(self):
+        while True:
+            time.sleep(self.intervalo)
+            try: self.descarregar()
+            except Exception as e: print(f"--> [LEADS] Falha ao gravar buscas: {e}")
+
+    def descarregar(self):
+        """Grava as buscas pendentes numa transação; devolve quantas."""
+        with self._lock:
+            lote, self._pendentes = self._pendentes, []
+        if not lote: return 0
+        with metricas.medir('leads', op='buscas'):
+            con = self._conexao()
+            con.execute('BEGIN IMMEDIATE')
+            try:
+                con.executemany(f"INSERT INTO buscas (criado_em, {', '.join(COLUNAS_BUSCA)}) "
+                                f"VALUES ({', '.join('?' * (len(COLUNAS_BUSCA) + 1))})", lote)
+                con.execute('COMMIT')
+            except:
+                con.execute('ROLLBACK')
+                with self._lock: self._pendentes[:0] = lote  # tenta de novo no próximo ciclo
+                raise
+        return len(lote)
+
+    def total_buscas(self):
+        return self._conexao().execute('SELECT count(*) FROM buscas').fetchone()[0]
+
+    def pagina_buscas(self, antes=None, limite=POR_PAGINA):
+        """Buscas da mais nova à mais antiga, a partir do id `antes`: (linhas, id para a próxima página ou None)."""
+        return self._pagina(f"SELECT id, criado_em, {', '.join(COLUNAS_BUSCA)} FROM buscas", antes, limite,
+                            lambda id_, ts, *campos: dict(zip(COLUNAS_BUSCA, campos), data=data_hora(ts)))
+
+    def exportar_buscas(self):
+        yield ('Data',) + COLUNAS_BUSCA
+        for ts, *campos in self._conexao().execute(f"SELECT criado_em, {', '.join(COLUNAS_BUSCA)} FROM buscas ORDER BY id"):
+            yield (data_hora(ts), *campos)
+
+    # --- PAINEL ---
+    def _pagina(self, select, antes, limite, montar):
+        if antes is None:
+            linhas = self._conexao().execute(f'{select} ORDER BY id DESC LIMIT ?', (limite + 1,)).fetchall()
+        else:
+            linhas = self._conexao().execute(f'{select} WHERE id < ? ORDER BY id DESC LIMIT ?', (antes, limite + 1)).fetchall()
+        proximo = linhas[limite - 1][0] if len(linhas) > limite else None
+        return [montar(*linha) for linha in linhas[:limite]], proximo
+
+    def estatisticas(self):
+        return {'leads': self.total_leads(), 'buscas': self.total_buscas(),
+                'buscas_pendentes': len(self._pendentes), 'buscas_descartadas': self.descartadas}
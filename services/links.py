@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from services.texto import normalizar_texto
+from services.snapshot import escrever_atomico
+from services.fontes import hosts_das_fontes, host_de
+from services.scraper import get_session, USER_AGENTS
+
+try:
+    from constants import URL_BASE
+except ImportError:
+    URL_BASE = "https://www.pciconcursos.com.br/concursos/"
+
+TIPOS = ('edital', 'inscricao')
+
+# --- CONFIGURAÇÃO DO RESOLVEDOR ---
+LINKS_TTL = int(os.environ.get('LINKS_TTL') or 86400)            # link achado vale 1 dia
+LINKS_TTL_FALHA = int(os.environ.get('LINKS_TTL_FALHA') or 3600)  # sem alvo/erro: tenta de novo em 1h
+LINKS_MAX_ITENS = int(os.environ.get('LINKS_MAX_ITENS') or 5000)
+LINKS_TIMEOUT = float(os.environ.get('LINKS_TIMEOUT') or 4)
+LINKS_TRABALHADORES = int(os.environ.get('LINKS_TRABALHADORES') or 4)
+LINKS_PRE_RESOLVER = int(os.environ.get('LINKS_PRE_RESOLVER') or 40)
+
+
+class _ColetorLinks(HTMLParser):
+    """Todos os <a href> da página com o texto de cada um, em ordem de documento."""
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+        self._abertos = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a': return
+        href = dict(attrs).get('href')
+        if href:
+            self._abertos.append([href, []])
+            self.links.append(self._abertos[-1])
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._abertos: self._abertos.pop()
+
+    def handle_data(self, data):
+        for a in self._abertos: a[1].append(data)
+
+
+def _pontuar(href, texto, tipo, host_pagina):
+    h, t = href.lower(), normalizar_texto(texto)
+    if tipo == 'edital':
+        p = 3 * h.endswith('.pdf') + 2 * ('edital' in t) + ('edital' in h)
+    else:
+        p = 3 * ('inscri' in t) + 2 * ('inscri' in h)
+        if p: p += urlsplit(href).netloc.lower() != host_pagina  # site do organizador
+    return p
+
+def escolher_alvos(html, url):
+    """Página do concurso -> {tipo: melhor link}, só para os tipos achados."""
+    coletor = _ColetorLinks()
+    coletor.feed(html)
+    coletor.close()
+    host_pagina = host_de(url)
+    melhores = {}
+    for href, partes in coletor.links:
+        href = href.strip()
+        if href.startswith(('#', 'javascript:', 'mailto:', 'tel:')): continue
+        alvo = urljoin(url, href)
+        if not alvo.startswith('http') or alvo.split('#')[0] == url.split('#')[0]: continue
+        texto = ' '.join(' '.join(partes).split())
+        for tipo in TIPOS:
+            p = _pontuar(alvo, texto, tipo, host_pagina)
+            if p and p > melhores.get(tipo, (0, None))[0]: melhores[tipo] = (p, alvo)
+    return {tipo: alvo for tipo, (p, alvo) in melhores.items()}
+
+
+class ResolvedorLinks:
+    """Link da listagem -> edital / inscrição, com cache LRU persistente e TTL.
+
+    A chave é (url, tipo). Uma visita à página do concurso resolve os dois
+    tipos de uma vez. Falhas (página fora do ar, nenhum alvo) também ficam
+    no cache, com TTL menor, apontando para a própria página.
+
+    Só busca páginas dos hosts das fontes ativas (o /ir recebe a URL do
+    cliente); o conjunto de hosts sai das fontes uma vez, na criação. O arquivo é compartilhado pelos workers: cada um relê quando o
+    mtime muda e mescla antes de gravar.
+    """
+
+    def __init__(self, caminho, max_itens=LINKS_MAX_ITENS, ttl=LINKS_TTL, ttl_falha=LINKS_TTL_FALHA, hosts=None):
+        self.caminho = caminho
+        self.hosts = hosts_das_fontes() if hosts is None else frozenset(hosts)
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.ttl_falha = ttl_falha
+        self._itens = OrderedDict()  # "tipo|url" -> (alvo, expira_em)
+        self._lock = threading.Lock()
+        self._lock_pre = threading.Lock()
+        self._mtime = None
+        self._sujo = 0
+        self._gravado_em = 0.0
+        self.acertos = self.faltas = self.buscas = 0
+        self._session = None
+
+    # --- CACHE ---
+    def _ler_arquivo(self):
+        try:
+            mtime = os.path.getmtime(self.caminho)
+            if mtime == self._mtime: return None
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                itens = json.load(f)
+            self._mtime = mtime
+            return itens
+        except (OSError, ValueError):
+            return None
+
+    def _mesclar(self, itens):
+        agora = time.time()
+        for chave, (alvo, expira_em) in itens:
+            atual = self._itens.get(chave)
+            if expira_em > agora and (atual is None or expira_em > atual[1]):
+                self._itens[chave] = (alvo, expira_em)
+        while len(self._itens) > self.max_itens: self._itens.popitem(last=False)
+
+    def carregar(self):
+        itens = self._ler_arquivo()
+        if itens is not None:
+            with self._lock: self._mesclar(itens)
+        return self
+
+    def salvar(self, minimo_intervalo=0):
+        if not self._sujo or time.time() - self._gravado_em < minimo_intervalo: return
+        itens = self._ler_arquivo()
+        with self._lock:
+            if itens is not None: self._mesclar(itens)
+            conteudo = json.dumps(list(self._itens.items()), ensure_ascii=False).encode('utf-8')
+            self._sujo = 0
+        try:
+            escrever_atomico(self.caminho, conteudo)
+            self._mtime = os.path.getmtime(self.caminho)
+            self._gravado_em = time.time()
+        except Exception as e:
+            print(f"--> [LINKS] Falha ao gravar cache: {e}")
+
+    def _do_cache(self, url, tipo):
+        chave = f"{tipo}|{url}"
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None: return None
+            if item[1] <= time.time():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return item[0]
+
+    def _guardar(self, url, alvos):
+        agora = time.time()
+        with self._lock:
+            for tipo in TIPOS:
+                achado = alvos.get(tipo)
+                self._itens[f"{tipo}|{url}"] = (achado or url, agora + (self.ttl if achado else self.ttl_falha))
+            while len(self._itens) > self.max_itens: self._itens.popitem(last=False)
+            self._sujo += 1
+
+    # --- RESOLUÇÃO ---
+    def _permitido(self, url):
+        """Só páginas HTML dos hosts das fontes (um PDF já é o próprio documento)."""
+        if not url.startswith(('http://', 'https://')) or urlsplit(url).path.lower().endswith('.pdf'): return False
+        return host_de(url) in self.hosts
+
+    def _buscar(self, url):
+        """Baixa a página do concurso -> {tipo: alvo} (vazio se não deu)."""
+        if self._session is None: self._session = get_session(LINKS_TRABALHADORES)
+        self.buscas += 1
+        try:
+            resp = self._session.get(url, timeout=LINKS_TIMEOUT, headers={'User-Agent': random.choice(USER_AGENTS)})
+            resp.raise_for_status()
+            if 'html' not in resp.headers.get('Content-Type', 'text/html'): return {}
+            resp.encoding = resp.apparent_encoding
+            return escolher_alvos(resp.text, resp.url or url)
+        except Exception as e:
+            print(f"--> [LINKS] Falha ao resolver {url}: {e}")
+            return {}
+
+    def resolver(self, url, tipo='edital'):
+        """Alvo de `tipo` para o link da listagem; na dúvida, o próprio link."""
+        if tipo not in TIPOS: tipo = 'edital'
+        if url.startswith('/'): url = urljoin(URL_BASE, url)
+        self.carregar()
+        alvo = self._do_cache(url, tipo)
+        if alvo is not None:
+            self.acertos += 1
+            return alvo
+        self.faltas += 1
+        if not self._permitido(url): return url
+        alvos = self._buscar(url)
+        self._guardar(url, alvos)
+        self.salvar(minimo_intervalo=30)
+        return alvos.get(tipo) or url
+
+    def pre_resolver(self, urls):
+        """Resolve em lote (pool limitado) os links que não estão no cache. Retorna quantos buscou."""
+        if not self._lock_pre.acquire(blocking=False): return 0
+        try:
+            self.carregar()
+            pendentes = []
+            for url in urls:
+                if url.startswith('/'): url = urljoin(URL_BASE, url)
+                if url not in pendentes and self._permitido(url) and any(self._do_cache(url, t) is None for t in TIPOS):
+                    pendentes.append(url)
+            if not pendentes: return 0
+            with ThreadPoolExecutor(max_workers=LINKS_TRABALHADORES, thread_name_prefix='links') as ex:
+                for url, alvos in zip(pendentes, ex.map(self._buscar, pendentes)):
+                    self._guardar(url, alvos)
+            self.salvar()
+            print(f"--> [LINKS] {len(pendentes)} links pré-resolvidos.")
+            return len(pendentes)
+        finally:
+            self._lock_pre.release()
+
+    def pre_resolver_em_fundo(self, urls):
+        threading.Thread(target=self.pre_resolver, args=(list(urls),), name='links-pre', daemon=True).start()
+
+    def estatisticas(self):
+        return {'itens': len(self._itens), 'acertos': self.acertos, 'faltas': self.faltas, 'buscas': self.buscas}
@@ -0,0 +1,198 @@
+import os
+import re
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup, NavigableString
+from bs4.builder import HTMLParserTreeBuilder
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+
+# --- SELEÇÃO DOS BLOCOS DE LISTAGEM ---
+# Regra do "Modo Aspirador": toda div com classe é candidata; vale o primeiro
+# <a> do seu conteúdo e o texto inteiro dela (get_text(" ", strip=True)).
+# O primeiro bloco (em ordem de documento) que traz um link novo, válido e
+# com texto de 20+ caracteres fica com o link.
+#
+# Em vez de chamar get_text em toda div (o mesmo texto reconcatenado a cada
+# nível de aninhamento), cada div só anota o primeiro <a> e a faixa
+# [inicio, fim) na lista global de textos; o texto é montado apenas para
+# quem ganha o link.
+#
+# PARSER_HTML:
+#   'stream'      (padrão) passada única com o HTMLParser da stdlib, sem montar
+#                 árvore; reproduz a árvore que o BeautifulSoup montaria com
+#                 html.parser (mesma pilha, mesmas entidades, mesmas tags vazias).
+#   'html.parser' / 'lxml'  árvore do BeautifulSoup + varredura única.
+#                 O lxml é opcional (não está no requirements.txt): instale à
+#                 parte (`pip install lxml`) para usar SCRAPER_PARSER=lxml.
+PARSER_HTML = os.environ.get('SCRAPER_PARSER', 'stream')
+if PARSER_HTML == 'lxml':
+    try: import lxml  # noqa: F401
+    except ImportError:
+        print("--> Aviso: SCRAPER_PARSER=lxml sem o pacote lxml instalado. Usando o parser 'stream'.")
+        PARSER_HTML = 'stream'
+
+_BUILDER = HTMLParserTreeBuilder()
+TAGS_VAZIAS = frozenset(_BUILDER.empty_element_tags)
+TAGS_CONTEINER = frozenset(_BUILDER.string_containers)  # script, style, template...: texto não conta
+ENTIDADES = EntitySubstitution.HTML_ENTITY_TO_CHARACTER
+REGEX_REF_DECIMAL = re.compile("^([0-9]+)(.*)")
+REGEX_REF_HEX = re.compile("^([0-9a-f]+)(.*)")
+
+SEM_LINK = False  # marcador: bloco ainda sem <a> (None = <a> sem href)
+
+
+def _selecionar(blocos, textos):
+    saida, links_processados = [], set()
+    for link, inicio, fim in blocos:
+        if link is SEM_LINK or link is None or link in links_processados: continue
+        # Se for link interno de ancora ou javascript, ignora
+        if not link.startswith('http') and not link.startswith('/'): continue
+        texto = ' '.join(textos[inicio:fim])
+        # Texto curto demais é lixo (o link fica livre para uma div interna)
+        if len(texto) < 20: continue
+        links_processados.add(link)
+        saida.append((texto, link))
+    return saida
+
+
+class _ExtratorStream(HTMLParser):
+    """Eventos do HTMLParser -> pilha de tags abertas, como o BeautifulSoup faria."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.textos, self.blocos = [], []
+        self._dados = []
+        self._pilha = []          # (nome, bloco ou None)
+        self._abertas = {}        # nome -> quantas abertas
+        self._conteineres = 0
+        self._sem_link = []
+        self._vazias_fechadas = {}  # nome -> quantas </tag> redundantes ignorar
+
+    def _fluir(self):
+        if not self._dados: return
+        t = ''.join(self._dados).strip()
+        self._dados = []
+        if t and not self._conteineres: self.textos.append(t)
+
+    def _desempilhar(self):
+        nome, bloco = self._pilha.pop()
+        self._abertas[nome] -= 1
+        if nome in TAGS_CONTEINER: self._conteineres -= 1
+        if bloco is not None:
+            bloco[2] = len(self.textos)
+            if self._sem_link and self._sem_link[-1] is bloco: self._sem_link.pop()
+
+    def handle_starttag(self, tag, attrs, vazia=True):
+        self._fluir()
+        atributos = {}
+        for chave, valor in attrs: atributos[chave] = '' if valor is None else valor
+        if tag == 'a' and self._sem_link:
+            href = atributos.get('href')
+            for bloco in self._sem_link: bloco[0] = href
+            self._sem_link.clear()
+        bloco = None
+        if tag == 'div' and 'class' in atributos:
+            bloco = [SEM_LINK, len(self.textos), None]
+            self.blocos.append(bloco)
+            self._sem_link.append(bloco)
+        self._pilha.append((tag, bloco))
+        self._abertas[tag] = self._abertas.get(tag, 0) + 1
+        if tag in TAGS_CONTEINER: self._conteineres += 1
+        if vazia and tag in TAGS_VAZIAS:
+            self.handle_endtag(tag, False)
+            self._vazias_fechadas[tag] = self._vazias_fechadas.get(tag, 0) + 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, vazia=False)
+        self.handle_endtag(tag, False)
+
+    def handle_endtag(self, tag, checar_fechadas=True):
+        if checar_fechadas and self._vazias_fechadas.get(tag):
+            self._vazias_fechadas[tag] -= 1  # </br> depois de <br>: já fechada
+            return
+        self._fluir()
+        while self._abertas.get(tag):
+            nome = self._pilha[-1][0]
+            self._desempilhar()
+            if nome == tag: break
+
+    def handle_data(self, data): self._dados.append(data)
+
+    def handle_charref(self, name):
+        base, regex = 10, REGEX_REF_DECIMAL
+        if name[:1] in ('x', 'X'): name, base, regex = name[1:], 16, REGEX_REF_HEX
+        numero, resto = None, ''
+        try:
+            numero = int(name, base)
+        except ValueError:
+            m = regex.search(name)
+            if m: numero, resto = int(m.group(1), base), m.group(2)
+        if numero is None:
+            self._dados.append(name)
+        else:
+            self._dados += [UnicodeDammit.numeric_character_reference(numero)[0], resto]
+
+    def handle_entityref(self, name):
+        caractere = ENTIDADES.get(name)
+        self._dados.append(caractere if caractere is not None else '&' + name)
+
+    def _descartar(self, data): self._fluir()
+
+    handle_comment = handle_decl = handle_pi = _descartar
+
+    def unknown_decl(self, data):
+        self._fluir()
+        if data.upper().startswith('CDATA['):
+            t = data[6:].strip()
+            if t: self.textos.append(t)
+
+    def close(self):
+        super().close()
+        self._fluir()
+        while self._pilha: self._desempilhar()
+
+
+def _blocos_stream(html):
+    p = _ExtratorStream()
+    p.feed(html)
+    p.close()
+    return _selecionar(p.blocos, p.textos)
+
+
+def _blocos_arvore(html, parser):
+    soup = BeautifulSoup(html, parser)
+    divs = soup.find_all('div', attrs={'class': True})
+    if not divs: return []
+    com_classe = {id(d) for d in divs}
+    tipos = divs[0].interesting_string_types  # mesmos tipos de string que get_text considera
+
+    textos, blocos, sem_link = [], [], []
+    pilha = [(soup, None)]
+    while pilha:
+        no, fechando = pilha.pop()
+        if fechando is not None:
+            fechando[2] = len(textos)
+            if sem_link and sem_link[-1] is fechando: sem_link.pop()
+            continue
+        if isinstance(no, NavigableString):
+            if type(no) in tipos:
+                t = no.strip()
+                if t: textos.append(t)
+            continue
+        if no.name == 'a' and sem_link:
+            for bloco in sem_link: bloco[0] = no.get('href')
+            sem_link.clear()
+        if id(no) in com_classe:
+            bloco = [SEM_LINK, len(textos), None]
+            blocos.append(bloco)
+            sem_link.append(bloco)
+            pilha.append((no, bloco))
+        pilha.extend((filho, None) for filho in reversed(no.contents))
+    return _selecionar(blocos, textos)
+
+
+def extrair_blocos(html, parser=None):
+    """Blocos de listagem [(texto, link)] na ordem do documento, já sem links repetidos."""
+    parser = parser or PARSER_HTML
+    if parser == 'stream': return _blocos_stream(html)
+    return _blocos_arvore(html, parser)
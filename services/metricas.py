@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+
+from services.snapshot import escrever_atomico
+
+# Limites dos buckets em segundos (le= do Prometheus); o último bucket é +Inf
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIXO = 'concurso_ideal_'
+INTERVALO_GRAVACAO = 10.0      # cada worker publica seus histogramas a cada 10s, no máximo
+VALIDADE_ARQUIVO = 900         # arquivo de worker parado há mais de 15 min sai da soma e é apagado
+
+
+class Histograma:
+    """Contagens por bucket + soma e total, como o histogram do Prometheus (não cumulativo aqui)."""
+
+    __slots__ = ('contagens', 'soma', 'total')
+
+    def __init__(self):
+        self.contagens = [0] * (len(BUCKETS) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, segundos):
+        self.contagens[bisect_left(BUCKETS, segundos)] += 1
+        self.soma += segundos
+        self.total += 1
+
+
+class _Cronometro:
+    __slots__ = ('registro', 'nome', 'rotulos', 'inicio')
+
+    def __init__(self, registro, nome, rotulos):
+        self.registro, self.nome, self.rotulos = registro, nome, rotulos
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registro.observar(self.nome, time.perf_counter() - self.inicio, **self.rotulos)
+        return False
+
+
+class Metricas:
+    """Histogramas de tempo por etapa, baratos o bastante para ficar ligados em produção.
+
+    Uma observação é um bisect e três somas sob um lock. Durante um request,
+    as etapas medidas na thread dele também vão para o Server-Timing da
+    resposta. Cada worker grava seus histogramas em SNAPSHOT_DIR de tempos
+    em tempos; o /admin/metrics soma os de todos os workers.
+    """
+
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio
+        self._series = {}   # (nome, ((rotulo, valor), ...)) -> Histograma
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._proxima_gravacao = 0.0
+
+    # --- COLETA ---
+    def observar(self, nome, segundos, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            h = self._series.get(chave)
+            if h is None: h = self._series[chave] = Histograma()
+            h.observar(segundos)
+        etapas = getattr(self._local, 'etapas', None)
+        if etapas is not None: etapas.append((nome, segundos, rotulos))
+
+    def medir(self, nome, **rotulos):
+        """with metricas.medir('busca', modo='pagina'): ..."""
+        return _Cronometro(self, nome, rotulos)
+
+    # --- SERVER-TIMING ---
+    def iniciar_request(self):
+        self._local.etapas = []
+        self._local.inicio = time.perf_counter()
+
+    def finalizar_request(self, **rotulos):
+        """Fecha o request da thread: registra a duração total e retorna o valor do Server-Timing."""
+        etapas = getattr(self._local, 'etapas', None)
+        if etapas is None: return None
+        self._local.etapas = None
+        total = time.perf_counter() - self._local.inicio
+        self.observar('http_request', total, **rotulos)
+        partes = []
+        for nome, segundos, r in etapas:
+            desc = '/'.join(str(v) for v in r.values())
+            partes.append(f'{nome};dur={segundos * 1000:.2f}' + (f';desc="{desc}"' if desc else ''))
+        partes.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(partes)
+
+    # --- ENTRE WORKERS ---
+    def exportar(self):
+        with self._lock:
+            return [[nome, list(rotulos), list(h.contagens), h.soma, h.total]
+                    for (nome, rotulos), h in self._series.items()]
+
+    def _arquivo(self, pid=None):
+        return os.path.join(self.diretorio, f'metricas-{pid or os.getpid()}.json')
+
+    def gravar(self, forcar=False):
+        """Publica os histogramas deste worker (no máximo a cada INTERVALO_GRAVACAO)."""
+        if not self.diretorio: return
+        agora = time.monotonic()
+        if not forcar and agora < self._proxima_gravacao: return
+        self._proxima_gravacao = agora + INTERVALO_GRAVACAO
+        try: escrever_atomico(self._arquivo(), json.dumps(self.exportar()).encode('utf-8'))
+        except Exception as e: print(f"--> [METRICAS] Falha ao gravar: {e}")
+
+    def agregado(self):
+        """Séries deste worker somadas às publicadas pelos outros."""
+        series = {}
+
+        def somar(linhas):
+            for nome, rotulos, contagens, soma, total in linhas:
+                chave = (nome, tuple(tuple(r) for r in rotulos))
+                h = series.get(chave)
+                if h is None: h = series[chave] = Histograma()
+                if len(contagens) != len(h.contagens): continue  # buckets de outra versão
+                h.contagens = [a + b for a, b in zip(h.contagens, contagens)]
+                h.soma += soma
+                h.total += total
+
+        somar(self.exportar())
+        if self.diretorio:
+            limite = time.time() - VALIDADE_ARQUIVO
+            proprio = os.path.basename(self._arquivo())
+            try: nomes = os.listdir(self.diretorio)
+            except OSError: nomes = []
+            for nome in nomes:
+                if not (nome.startswith('metricas-') and nome.endswith('.json')) or nome == proprio: continue
+                caminho = os.path.join(self.diretorio, nome)
+                try:
+                    if os.path.getmtime(caminho) < limite:
+                        os.remove(caminho)  # worker que morreu (restart, reload): o arquivo não volta a ser atualizado
+                        continue
+                    with open(caminho, 'r', encoding='utf-8') as f: somar(json.load(f))
+                except: pass
+        return series
+
+    # --- EXPOSIÇÃO ---
+    def prometheus(self, medidores=None):
+        """Texto no formato de exposição do Prometheus (0.0.4); `medidores` entram como gauges."""
+        linhas = []
+        por_nome = {}
+        for (nome, rotulos), h in sorted(self.agregado().items()):
+            por_nome.setdefault(nome, []).append((rotulos, h))
+        for nome, series in por_nome.items():
+            metrica = f'{PREFIXO}{nome}_seconds'
+            linhas.append(f'# TYPE {metrica} histogram')
+            for rotulos, h in series:
+                base = ','.join(f'{k}="{_escapar(v)}"' for k, v in rotulos)
+                sep = ',' if base else ''
+                acumulado = 0
+                for limite, n in zip(BUCKETS + ('+Inf',), h.contagens):
+                    acumulado += n
+                    linhas.append(f'{metrica}_bucket{{{base}{sep}le="{limite}"}} {acumulado}')
+                sufixo = f'{{{base}}}' if base else ''
+                linhas.append(f'{metrica}_sum{sufixo} {h.soma:.6f}')
+                linhas.append(f'{metrica}_count{sufixo} {h.total}')
+        for nome, valor in (medidores or {}).items():
+            linhas.append(f'# TYPE {PREFIXO}{nome} gauge')
+            linhas.append(f'{PREFIXO}{nome} {valor}')
+        return '\n'.join(linhas) + '\n'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Registro do processo: o app, o scraper e o escritor de planilhas medem aqui
+metricas = Metricas()
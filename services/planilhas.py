@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+
+from services.metricas import metricas
+
+# --- INTEGRAÇÃO GOOGLE SHEETS ---
+try:
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+except ImportError:
+    gspread = None
+    print("--> Aviso: Biblioteca gspread não encontrada. Planilhas desativadas.")
+
+NOME_PLANILHA = "Leads Concurso Ideal"
+_FIM = object()  # marcador na fila: acorda a thread para o encerramento
+ESCOPO = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+
+
+class BackendGspread:
+    """Cliente autorizado uma única vez; abas ficam em cache até um erro forçar reconexão."""
+
+    def __init__(self, creds_json, nome_planilha=NOME_PLANILHA):
+        self.creds_json = creds_json
+        self.nome_planilha = nome_planilha
+        self._planilha = None
+        self._abas = {}
+
+    def _aba(self, nome):
+        if self._planilha is None:
+            creds = ServiceAccountCredentials.from_json_keyfile_dict(json.loads(self.creds_json), ESCOPO)
+            self._planilha = gspread.authorize(creds).open(self.nome_planilha)
+            self._abas = {}
+        if nome not in self._abas:
+            if nome is None: self._abas[nome] = self._planilha.sheet1
+            else:
+                try: self._abas[nome] = self._planilha.worksheet(nome)
+                except: self._abas[nome] = self._planilha.sheet1
+        return self._abas[nome]
+
+    def anexar(self, aba, linhas):
+        try:
+            self._aba(aba).append_rows(linhas, value_input_option='RAW')
+        except:
+            self._planilha = None  # credencial expirada ou aba removida: reconecta no próximo lote
+            raise
+
+
+class BackendLocal:
+    """Stub offline: grava cada lote como uma linha JSON (aba + linhas) num arquivo."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.lotes = 0
+
+    def anexar(self, aba, linhas):
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'aba': aba, 'linhas': linhas}, ensure_ascii=False) + '\n')
+        self.lotes += 1
+
+
+def criar_backend(basedir):
+    """PLANILHAS_BACKEND=local força o stub; senão usa gspread se houver credenciais."""
+    if os.environ.get('PLANILHAS_BACKEND') == 'local':
+        return BackendLocal(os.environ.get('PLANILHAS_ARQUIVO') or os.path.join(basedir, 'planilhas.jsonl'))
+    creds_json = os.environ.get('GOOGLE_CREDENTIALS_JSON')
+    if gspread and creds_json: return BackendGspread(creds_json)
+    return None
+
+
+class EscritorPlanilhas:
+    """Uma thread, uma fila limitada e envios em lote (append_rows).
+
+    O lote sai quando junta `tamanho_lote` linhas ou quando a linha mais
+    antiga espera `intervalo` segundos. Fila cheia descarta a linha e conta
+    (o request nunca bloqueia esperando a planilha). Ao sair do processo,
+    `encerrar` envia o que ainda estiver na fila.
+    """
+
+    def __init__(self, backend, max_fila=2000, tamanho_lote=50, intervalo=5.0):
+        self.backend = backend
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self._fila = queue.Queue(maxsize=max_fila)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self.enfileiradas = 0
+        self.enviadas = 0
+        self.descartadas = 0
+        self.falhas = 0
+        self.lotes = 0
+        atexit.register(self.encerrar)
+
+    def enfileirar(self, aba, linha):
+        if self.backend is None or self._parar.is_set(): return False
+        self._iniciar()
+        try:
+            self._fila.put_nowait((aba, linha))
+            self.enfileiradas += 1
+            return True
+        except queue.Full:
+            self.descartadas += 1
+            return False
+
+    def _iniciar(self):
+        if self._thread is not None: return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='escritor-planilhas', daemon=True)
+                self._thread.start()
+
+    def _coletar(self):
+        """Bloqueia até a primeira linha e junta as demais até o limite de tamanho/tempo."""
+        primeira = self._fila.get()
+        if primeira is _FIM: return []
+        lote = [primeira]
+        prazo = time.monotonic() + self.intervalo
+        while len(lote) < self.tamanho_lote:
+            restante = prazo - time.monotonic()
+            if restante <= 0: break
+            try: linha = self._fila.get(timeout=restante)
+            except queue.Empty: break
+            if linha is _FIM: break
+            lote.append(linha)
+        return lote
+
+    def _loop(self):
+        while not self._parar.is_set():
+            lote = self._coletar()
+            if lote: self.descarregar(lote)
+        # Encerrando: o que sobrou na fila sai agora, em lotes do tamanho de sempre
+        restantes = []
+        while True:
+            try: linha = self._fila.get_nowait()
+            except queue.Empty: break
+            if linha is not _FIM: restantes.append(linha)
+        for i in range(0, len(restantes), self.tamanho_lote):
+            self.descarregar(restantes[i:i + self.tamanho_lote])
+
+    def encerrar(self, timeout=10.0):
+        """Para de aceitar linhas e espera a thread enviar a fila (chamado no atexit)."""
+        if self._thread is None or self._parar.is_set(): return
+        self._parar.set()
+        try: self._fila.put_nowait(_FIM)
+        except queue.Full: pass  # fila cheia: a thread não está parada no get, vai ver o sinal
+        self._thread.join(timeout)
+        if self._thread.is_alive(): print(f"--> [GSPREAD] Encerrando com {self._fila.qsize()} linha(s) ainda na fila")
+
+    def descarregar(self, lote):
+        por_aba = {}
+        for aba, linha in lote: por_aba.setdefault(aba, []).append(linha)
+        for aba, linhas in por_aba.items():
+            t0 = time.perf_counter()
+            try:
+                self.backend.anexar(aba, linhas)
+                self.enviadas += len(linhas)
+                self.lotes += 1
+                resultado = 'ok'
+            except Exception as e:
+                self.falhas += len(linhas)
+                resultado = 'erro'
+                print(f"--> [GSPREAD ERROR] {e}")
+            metricas.observar('planilhas', time.perf_counter() - t0, aba=aba or 'Leads', resultado=resultado)
+
+    def estatisticas(self):
+        return {
+            'backend': type(self.backend).__name__ if self.backend else 'desativado',
+            'na_fila': self._fila.qsize(),
+            'enfileiradas': self.enfileiradas,
+            'enviadas': self.enviadas,
+            'descartadas': self.descartadas,
+            'falhas': self.falhas,
+            'lotes': self.lotes,
+        }
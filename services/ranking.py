@@ -0,0 +1,261 @@
+import math
+import heapq
+import threading
+from array import array
+from datetime import date
+
+from services.texto import normalizar_texto
+from services.indice import REGEX_PALAVRA, buscar_em
+
+# --- PARÂMETROS DO RANKING ---
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Peso de cada forma de casar a palavra digitada com um token do vocabulário
+PESO_EXATO = 1.0
+PESO_PREFIXO = 0.8     # 'enferm' -> 'enfermeiro'
+PESO_PARCIAL = 0.5     # pedaço no meio do token, como a busca booleana aceita
+PESO_ERRO = {1: 0.5, 2: 0.3}  # por distância de edição ('polica' -> 'policia')
+# Boosts opcionais: multiplicam a nota por até 1 + PESO
+PESO_SALARIO, SALARIO_REFERENCIA = 0.5, 20000.0
+PESO_PRAZO, JANELA_PRAZO = 0.5, 30  # encerra em até 30 dias: quanto mais perto, maior
+BOOSTS = ('salario', 'prazo')
+# Não pontuam (casariam com quase tudo, até como pedaço de token), salvo se forem a consulta inteira
+PALAVRAS_VAZIAS = frozenset(('a', 'o', 'as', 'os', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'na', 'no', 'nas', 'nos',
+                             'para', 'por', 'com', 'um', 'uma'))
+MAX_CACHE_EXPANSOES = 4096
+
+
+def erros_permitidos(palavra):
+    """Distância de edição tolerada pelo tamanho da palavra (curtas ou números: nenhuma)."""
+    if palavra.isdigit() or len(palavra) < 5: return 0
+    return 1 if len(palavra) < 9 else 2
+
+def distancia_limitada(a, b, k):
+    """Levenshtein entre `a` e `b` se for <= k; senão k + 1 (DP em faixa, para cedo)."""
+    if abs(len(a) - len(b)) > k: return k + 1
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        atual = [i] + [k + 1] * len(b)
+        ca = a[i - 1]
+        for j in range(max(1, i - k), min(len(b), i + k) + 1):
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (ca != b[j - 1]))
+        if min(atual) > k: return k + 1
+        anterior = atual
+    return min(anterior[-1], k + 1)
+
+def _data_ordinal(texto):
+    try:
+        dia, mes, ano = texto.split('/')
+        return date(int(ano), int(mes), int(dia)).toordinal()
+    except: return None
+
+
+class Ranqueador:
+    """Busca ranqueada sobre as estruturas do IndiceBusca (as mesmas do snapshot).
+
+    Cada palavra da consulta vira uma lista de tokens do vocabulário com
+    peso: o próprio token e tokens que a contêm (prefixo vale mais); se a
+    palavra não existe no vocabulário, também tokens a 1 ou 2 edições. Os
+    vizinhos com erro saem do índice de n-gramas que o snapshot já traz: só
+    tokens que dividem n-gramas suficientes com a palavra são conferidos com
+    Levenshtein limitado, então nada varre o vocabulário por consulta.
+
+    A nota é BM25 com tf binário (tokens são um conjunto por concurso). Como
+    a normalização por tamanho só depende do concurso, a nota fatora em
+    (soma dos melhores pesos por palavra) x (fator do concurso x boosts): o
+    segundo termo é um array por snapshot, e o primeiro sai de
+    dict.fromkeys/update sobre as listas de postings, sem laço por posting.
+    """
+
+    def __init__(self, indice):
+        self.indice = indice
+        self.total = indice.total
+        self._expansoes = {}
+        self._lock = threading.Lock()
+        self._fator = None
+        self._pesos_doc = {}   # (boosts, dia) -> array por concurso
+        self._ordens = {}      # (boosts, dia) -> posições ordenadas só pelos boosts
+
+    # --- ESTRUTURAS POR SNAPSHOT ---
+    def _fatores(self):
+        """(k1 + 1) / (1 + k1 * (1 - b + b * dl / média)) de cada concurso, calculado uma vez."""
+        if self._fator is not None: return self._fator
+        with self._lock:
+            if self._fator is None:
+                tokens = getattr(self.indice.dados, 'tokens', None)
+                if tokens is not None and hasattr(tokens, 'offsets'):
+                    o = tokens.offsets
+                    comprimentos = [o[i + 1] - o[i] for i in range(self.total)]
+                else:
+                    comprimentos = [len(item['tokens']) for item in self.indice.dados]
+                media = (sum(comprimentos) / self.total) or 1.0
+                k1, b = BM25_K1, BM25_B
+                self._fator = array('d', ((k1 + 1) / (1 + k1 * (1 - b + b * dl / media)) for dl in comprimentos))
+        return self._fator
+
+    def _boosts(self, boosts, hoje):
+        """Multiplicador de cada concurso para os `boosts` (1.0 sem boost)."""
+        mult = [1.0] * self.total
+        if 'salario' in boosts:
+            ref = math.log1p(SALARIO_REFERENCIA)
+            for i, sal in enumerate(self.indice.salarios):
+                mult[i] *= 1 + PESO_SALARIO * min(1.0, math.log1p(max(sal, 0.0)) / ref)
+        if 'prazo' in boosts:
+            dados = self.indice.dados
+            col = dados.colunas['data_fim'] if getattr(dados, 'colunas', None) is not None else None
+            por_data = {}
+            for i in range(self.total):
+                texto = col[i] if col is not None else dados[i]['data_fim']
+                m = por_data.get(texto)
+                if m is None:
+                    ordinal = _data_ordinal(texto)
+                    dias = None if ordinal is None else ordinal - hoje
+                    m = por_data[texto] = (1 + PESO_PRAZO * (1 - dias / JANELA_PRAZO)
+                                           if dias is not None and 0 <= dias < JANELA_PRAZO else 1.0)
+                mult[i] *= m
+        return mult
+
+    def _cacheado(self, cache, chave, montar):
+        achado = cache.get(chave)
+        if achado is None:
+            achado = montar()
+            with self._lock:
+                if len(cache) >= 8: cache.clear()  # poucas combinações; muda com o dia
+                cache[chave] = achado
+        return achado
+
+    def _pesos(self, boosts, hoje):
+        """Fator BM25 x boosts de cada concurso."""
+        def montar():
+            fator = self._fatores()
+            if not boosts: return fator
+            return array('d', (f * m for f, m in zip(fator, self._boosts(boosts, hoje))))
+        return self._cacheado(self._pesos_doc, (boosts, hoje), montar)
+
+    def _ordem_boosts(self, boosts, hoje):
+        """Todas as posições pela nota dos boosts (empate: ordem original)."""
+        def montar():
+            mult = self._boosts(boosts, hoje)
+            return sorted(range(self.total), key=lambda i: (-mult[i], i))
+        return self._cacheado(self._ordens, (boosts, hoje), montar)
+
+    def _idf(self, v):
+        df = len(self.indice.postings[v])
+        return math.log(1 + (self.total - df + 0.5) / (df + 0.5))
+
+    # --- EXPANSÃO DAS PALAVRAS ---
+    def _vizinhos(self, palavra, k):
+        """Tokens a até `k` edições de `palavra` -> {posição no vocabulário: distância}."""
+        vocab, indice = self.indice.vocabulario, self.indice
+        # Cada edição destrói no máximo n n-gramas distintos: quem não divide o
+        # mínimo restante não pode estar a k edições. Usa o n que mais poda.
+        n, minimo = 3, len({palavra[j:j + 3] for j in range(len(palavra) - 2)}) - 3 * k
+        if minimo < 2:
+            n, minimo = 2, len({palavra[j:j + 2] for j in range(len(palavra) - 1)}) - 2 * k
+        if minimo < 1: return {}
+        contagem = {}
+        for g in {palavra[j:j + n] for j in range(len(palavra) - n + 1)}:
+            p = buscar_em(indice.gramas, g)
+            if p < 0: continue
+            for v in indice.gramas_vocab[p]:
+                contagem[v] = contagem.get(v, 0) + 1
+        achados = {}
+        for v, c in contagem.items():
+            if c < minimo: continue
+            d = distancia_limitada(palavra, vocab[v], k)
+            if 0 < d <= k: achados[v] = d
+        return achados
+
+    def expandir(self, palavra):
+        """[(peso x idf, posição no vocabulário)] de uma palavra normalizada, do menor peso ao maior."""
+        achado = self._expansoes.get(palavra)
+        if achado is not None: return achado
+        vocab = self.indice.vocabulario
+        pesos = {}
+        for v in self.indice._tokens_contendo(palavra):
+            tok = vocab[v]
+            pesos[v] = PESO_EXATO if tok == palavra else PESO_PREFIXO if tok.startswith(palavra) else PESO_PARCIAL
+        # Tolerância a erro só para palavra que não existe: 'medico' não vira 'medio'
+        k = erros_permitidos(palavra) if PESO_EXATO not in pesos.values() else 0
+        if k:
+            for v, d in self._vizinhos(palavra, k).items():
+                if PESO_ERRO[d] > pesos.get(v, 0): pesos[v] = PESO_ERRO[d]
+        expansao = sorted((peso * self._idf(v), v) for v, peso in pesos.items())
+        with self._lock:
+            if len(self._expansoes) > MAX_CACHE_EXPANSOES: self._expansoes.clear()
+            self._expansoes[palavra] = expansao
+        return expansao
+
+    def pontuar(self, chaves):
+        """{posição do concurso: soma dos pesos das palavras} (vírgula = OU, como na busca).
+
+        Multiplicada pelo fator do concurso (_fatores) dá a nota BM25.
+        """
+        palavras = []
+        for chave in chaves:
+            for p in REGEX_PALAVRA.findall(normalizar_texto(chave)):
+                if p not in palavras: palavras.append(p)
+        palavras = [p for p in palavras if p not in PALAVRAS_VAZIAS] or palavras
+        postings = self.indice.postings
+        notas = None
+        for palavra in palavras:
+            # Do menor peso ao maior: em cada concurso fica a melhor forma da palavra
+            melhor = {}
+            for peso, v in self.expandir(palavra):
+                melhor.update(dict.fromkeys(postings[v], peso))
+            if notas is None:
+                notas = melhor
+            else:
+                for i, peso in melhor.items(): notas[i] = notas.get(i, 0.0) + peso
+        return notas or {}
+
+    # --- BUSCA ---
+    def ranquear(self, sal_min, chaves, ufs, excluir, niveis_filtro=None, bancas_filtro=None, boosts=(), ate=None):
+        """(total, posições ordenadas por relevância); `ate` limita quantas posições ordenar.
+
+        UF, nível, banca, salário e exclusões continuam filtros exatos; só as
+        palavras-chave passam a ranquear (e a tolerar erros).
+        """
+        indice = self.indice
+        if not self.total: return 0, []
+        hoje = date.today().toordinal()
+        chaves = [c for c in chaves or () if normalizar_texto(c)]
+        if not chaves:
+            # Sem palavra não há nota de texto: filtros exatos e, se houver, os boosts
+            ids = indice.buscar_ids(sal_min, [], ufs, excluir, niveis_filtro, bancas_filtro)
+            if not boosts: return len(ids), ids if ate is None else ids[:ate]
+            aceitos, saida = set(ids), []
+            for i in self._ordem_boosts(boosts, hoje):
+                if i in aceitos:
+                    saida.append(i)
+                    if ate is not None and len(saida) >= ate: break
+            return len(ids), saida
+
+        notas = self.pontuar(chaves)
+        candidatos = notas.keys()
+        for c in indice._conjuntos_filtros(ufs, niveis_filtro, bancas_filtro):
+            candidatos = c & candidatos
+        bloqueados = indice._bloqueados(excluir)
+        if bloqueados: candidatos = candidatos - bloqueados
+        pesos, salarios = self._pesos(boosts, hoje), indice.salarios
+        # (nota, -posição): no empate ganha a ordem original (salário decrescente)
+        if sal_min > 0:
+            pares = [(notas[i] * pesos[i], -i) for i in candidatos if salarios[i] >= sal_min]
+        else:
+            pares = [(notas[i] * pesos[i], -i) for i in candidatos]
+        if ate is not None and ate < len(pares) // 4:
+            topo = heapq.nlargest(ate, pares)
+        else:
+            topo = sorted(pares, reverse=True)
+            if ate is not None: topo = topo[:ate]
+        return len(pares), [-i for _, i in topo]
+
+
+def obter_ranqueador(indice):
+    """Um Ranqueador por índice (o índice já é um por snapshot)."""
+    r = getattr(indice, '_ranqueador', None)
+    if r is None:
+        with indice._lock:
+            r = getattr(indice, '_ranqueador', None)
+            if r is None: r = indice._ranqueador = Ranqueador(indice)
+    return r
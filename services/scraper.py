@@ -1,12 +1,23 @@
+import os
 import re
+import time
 import requests
 import random
 import logging
-import unicodedata
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
-from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from services.texto import normalizar_texto, tokenizar
+from services.indice import obter_indice
+from services.ranking import obter_ranqueador
+from services.listagem import extrair_blocos
+from services.etiquetas import etiquetar, ESTADOS
+from services.incremental import hash_bloco
+from services.fontes import FONTES, fontes_ativas, host_de
+from services.metricas import metricas
 
 # Configuração de Logs
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
@@ -26,37 +37,27 @@ USER_AGENTS = [
     "Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101 Firefox/121.0"
 ]
 
-def get_session():
+# --- COLETA CONCORRENTE ---
+# Downloads em threads sobre uma sessão com pool de conexões, no máximo
+# SCRAPER_POR_HOST simultâneos no mesmo host; parse + enriquecimento das
+# páginas num pool de processos (SCRAPER_PROCESSOS: 0 = um por CPU, até o
+# número de páginas; 1 = tudo no próprio processo).
+CONEXOES = int(os.environ.get('SCRAPER_CONEXOES') or 8)
+LIMITE_POR_HOST = int(os.environ.get('SCRAPER_POR_HOST') or 2)
+PROCESSOS = int(os.environ.get('SCRAPER_PROCESSOS') or 0)
+
+def get_session(conexoes=10):
     """Sessão blindada com retries."""
     session = requests.Session()
     retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=conexoes, pool_maxsize=conexoes)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
 
-def normalizar_texto(texto):
-    """Remove acentos e deixa minúsculo (médico -> medico)."""
-    if not texto: return ""
-    return ''.join(c for c in unicodedata.normalize('NFD', texto)
-                   if unicodedata.category(c) != 'Mn').lower()
-
 def identificar_niveis(texto_normalizado):
-    """Detecta escolaridade no texto (Lista Ampliada)."""
-    niveis = set()
-    # Fundamental
-    if any(k in texto_normalizado for k in ['fundamental', 'alfabetizado', 'elementar', 'operacional', '1o grau', 'primeiro grau']):
-        niveis.add('fundamental')
-    
-    # Médio/Técnico
-    if any(k in texto_normalizado for k in ['medio', 'tecnico', 'assistente', 'ensino medio', '2o grau', 'segundo grau', 'nivel medio']):
-        niveis.add('medio')
-    
-    # Superior
-    if any(k in texto_normalizado for k in ['superior', 'graduacao', 'bacharel', 'licenciatura', 'analista', 'especialista', 'medico', 'enfermeiro', 'engenheiro', 'advogado', 'procurador', 'juiz', 'promotor', 'professor', 'auditor', 'gestor']):
-        niveis.add('superior')
-        
-    return niveis
+    """Detecta escolaridade no texto (Lista Ampliada, ver services/etiquetas.py)."""
+    return etiquetar(texto_normalizado)[0]
 
 def formatar_real(valor):
     if not valor or valor <= 0: return "A consultar / Variável"
@@ -94,15 +95,80 @@ def extrair_data(texto):
         return datas[-1]
     return None
 
-def extrair_uf(texto):
-    m = REGEX_UF.search(texto)
-    if m: return m.group(1).upper()
-    estados = {'acre': 'AC', 'alagoas': 'AL', 'amapá': 'AP', 'amazonas': 'AM', 'bahia': 'BA', 'ceará': 'CE', 'distrito federal': 'DF', 'espírito santo': 'ES', 'goiás': 'GO', 'maranhão': 'MA', 'mato grosso': 'MT', 'minas gerais': 'MG', 'pará': 'PA', 'paraíba': 'PB', 'paraná': 'PR', 'pernambuco': 'PE', 'piauí': 'PI', 'rio de janeiro': 'RJ', 'rio grande do norte': 'RN', 'rio grande do sul': 'RS', 'rondônia': 'RO', 'roraima': 'RR', 'santa catarina': 'SC', 'são paulo': 'SP', 'sergipe': 'SE', 'tocantins': 'TO'}
+def extrair_uf(texto, candidatos=None):
+    """Sigla no texto ou, na falta dela, o primeiro estado por extenso.
+
+    `candidatos` são os nomes de estado que o etiquetador achou no texto
+    normalizado (sem acento); a confirmação com acento continua aqui.
+    """
+    for m in REGEX_UF.finditer(texto):
+        # o REGEX_UF do constants ignora caixa: "se", "to", "pa" minúsculos são palavras, não siglas
+        if m.group(0).isupper(): return m.group(0)
     texto_lower = texto.lower()
-    for nome, sigla in estados.items():
-        if nome in texto_lower: return sigla
+    for nome, sigla in ESTADOS.items():
+        if (candidatos is None or nome in candidatos) and nome in texto_lower: return sigla
     return "Nacional/Outro"
 
+def montar_registro(texto, link, hoje):
+    """Enriquece um bloco (data, salário, UF, níveis, bancas, tokens); None se vencido."""
+    data_fim = extrair_data(texto)
+    data_display = "Inscrições Abertas"
+    if data_fim:
+        if data_fim < hoje: return None # Ignora vencidos
+        data_display = data_fim.strftime('%d/%m/%Y')
+
+    # Processamento de Texto: níveis, estados e bancas saem de uma passada só
+    texto_normalizado = normalizar_texto(texto)
+    tokens = tokenizar(texto_normalizado)
+    niveis, estados, bancas = etiquetar(texto_normalizado)
+
+    salario = extrair_salario(texto)
+    uf = extrair_uf(texto, estados)
+
+    return {
+        'texto': texto,
+        'texto_normalized': texto_normalizado,
+        'tokens': tokens,
+        'niveis': niveis,
+        'bancas': bancas,
+        'link': link,
+        'data_fim': data_display,
+        'salario_num': salario,
+        'salario_formatado': formatar_real(salario),
+        'uf': uf
+    }
+
+def enriquecer_blocos(blocos, hoje, cache=None):
+    """Blocos -> lista ordenada por salário, reaproveitando o `cache` (hash -> registro).
+
+    Links repetidos ficam com o primeiro bloco válido. Retorna (lista, cache
+    só com os blocos recebidos, quantos foram reprocessados).
+    """
+    cache = cache or {}
+    lista, novo_cache, refeitos, vistos = [], {}, 0, set()
+    for texto, link in blocos:
+        h = hash_bloco(texto, link)
+        if h in novo_cache:
+            item = novo_cache[h]
+        elif h in cache:
+            item = cache[h]
+        else:
+            refeitos += 1
+            try: item = montar_registro(texto, link, hoje)
+            except: item = None
+        novo_cache[h] = item
+        if item and link not in vistos:
+            vistos.add(link)
+            lista.append(item)
+
+    # Ordena: Maior salário primeiro
+    lista.sort(key=lambda x: x['salario_num'], reverse=True)
+    return lista, novo_cache, refeitos
+
+def processar_html(html):
+    """Página da listagem -> lista de concursos ordenada por salário."""
+    return enriquecer_blocos(extrair_blocos(html), datetime.now().date())[0]
+
 def raspar_dados_online():
     session = get_session()
     headers = {'User-Agent': random.choice(USER_AGENTS)}
@@ -112,99 +178,164 @@ def raspar_dados_online():
         resp = session.get(URL_BASE, timeout=30, headers=headers)
         resp.raise_for_status()
         resp.encoding = resp.apparent_encoding
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        # PEGA TUDO: Qualquer div que tenha alguma classe definida
-        itens_brutos = soup.find_all('div', attrs={'class': True}) 
-        
-        lista = []
-        hoje = datetime.now().date()
-        links_processados = set()
-
-        for item in itens_brutos:
-            # REMOVIDO: O filtro de classes que estava bloqueando resultados.
-            # Agora confiamos apenas se tem Link e Texto válido.
-
-            try:
-                link_tag = item.find('a')
-                if not link_tag: continue
-                
-                texto = item.get_text(" ", strip=True)
-                link = link_tag['href']
-                
-                # Validação básica: Texto curto demais é lixo
-                if link in links_processados or len(texto) < 20: continue
-                
-                # Se for link interno de ancora ou javascript, ignora
-                if not link.startswith('http') and not link.startswith('/'): continue
-
-                links_processados.add(link)
-
-                data_fim = extrair_data(texto)
-                data_display = "Inscrições Abertas"
-                if data_fim:
-                    if data_fim < hoje: continue # Ignora vencidos
-                    data_display = data_fim.strftime('%d/%m/%Y')
-                
-                salario = extrair_salario(texto)
-                uf = extrair_uf(texto)
-                
-                # Processamento de Texto
-                texto_normalizado = normalizar_texto(texto)
-                tokens = set(re.sub(r'[^\w\s]', '', texto_normalizado).split())
-                niveis = identificar_niveis(texto_normalizado)
-
-                lista.append({
-                    'texto': texto,
-                    'texto_normalized': texto_normalizado,
-                    'tokens': tokens,
-                    'niveis': niveis,
-                    'link': link,
-                    'data_fim': data_display,
-                    'salario_num': salario,
-                    'salario_formatado': formatar_real(salario),
-                    'uf': uf
-                })
-            except: continue
-
-        # Ordena: Maior salário primeiro
-        lista.sort(key=lambda x: x['salario_num'], reverse=True)
+        lista = processar_html(resp.text)
         print(f"--> [SCRAPER] Sucesso! {len(lista)} concursos encontrados.")
         return lista
     except Exception as e:
         print(f"--> [ERRO] Scraper: {e}")
         return []
 
-def extrair_link_final(url, tipo='edital'): return url 
-
-def filtrar_concursos(todos, sal_min, chaves, ufs, excluir, niveis_filtro=None):
-    res = []
-    excluir_set = set(normalizar_texto(p) for p in excluir) if excluir else set()
-    chaves_norm = [normalizar_texto(k) for k in chaves] if chaves else []
-    set_niveis_alvo = set(niveis_filtro) if niveis_filtro else set()
-
-    for item in todos:
-        # Filtros Padrão
-        if excluir_set and not excluir_set.isdisjoint(item['tokens']): continue
-        if sal_min > 0 and item['salario_num'] < sal_min: continue
-        
-        if ufs:
-            if item['uf'] not in ufs and item['uf'] != 'Nacional/Outro':
-                if not any(u in item['texto'] for u in ufs): continue
-        
-        if chaves_norm:
-            if not any(k in item['texto_normalized'] for k in chaves_norm): continue
-            
-        # Filtro de Escolaridade
-        # Só filtra SE o usuário clicou em algum botão. Se não clicou, mostra tudo.
-        if set_niveis_alvo:
-            if set_niveis_alvo.isdisjoint(item['niveis']): continue 
-
-        res.append({
-            'Salário': item['salario_formatado'],
-            'UF': item['uf'],
-            'Data Fim Inscrição': item['data_fim'],
-            'Informações do Concurso': item['texto'],
-            'Link': item['link']
-        })
-    return res
\ No newline at end of file
+def baixar_paginas(urls, estado, session=None):
+    """Baixa as páginas em paralelo -> {url: resposta ou a exceção que ocorreu}."""
+    session = session or get_session(CONEXOES)
+    semaforos = {host_de(url): threading.BoundedSemaphore(LIMITE_POR_HOST) for url in urls}
+
+    def baixar(url):
+        headers = {'User-Agent': random.choice(USER_AGENTS)}
+        headers.update(estado.cabecalhos(url))
+        with semaforos[host_de(url)]:
+            resp = session.get(url, timeout=30, headers=headers)
+        if resp.status_code != 304:
+            resp.raise_for_status()
+            resp.encoding = resp.apparent_encoding
+            resp.text  # decodifica ainda na thread do download
+        return resp
+
+    resultados = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(CONEXOES, len(urls))), thread_name_prefix='scraper') as ex:
+        futuros = [(url, ex.submit(baixar, url)) for url in urls]
+        for url, futuro in futuros:
+            try: resultados[url] = futuro.result()
+            except Exception as e: resultados[url] = e
+    return resultados
+
+def processar_pagina(nome_fonte, url, html, blocos, conhecidos, hoje):
+    """Tarefa do pool: extrai os blocos (se veio HTML) e enriquece os que o cache não tem.
+
+    Retorna (blocos, {hash: registro ou None}, (segundos de parse, segundos de enriquecimento)).
+    """
+    t0 = time.perf_counter()
+    if html is not None: blocos = FONTES[nome_fonte].blocos(html, url)
+    t1 = time.perf_counter()
+    novos = {}
+    for texto, link in blocos:
+        h = hash_bloco(texto, link)
+        if h in conhecidos or h in novos: continue
+        try: novos[h] = montar_registro(texto, link, hoje)
+        except: novos[h] = None
+    return blocos, novos, (t1 - t0, time.perf_counter() - t1)
+
+def _executar_tarefas(tarefas):
+    processos = PROCESSOS or min(len(tarefas), os.cpu_count() or 1)
+    if processos > 1 and len(tarefas) > 1:
+        try:
+            # spawn: o worker web tem threads, e fork com threads não é seguro
+            with ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn')) as pool:
+                return list(pool.map(processar_pagina, *zip(*tarefas)))
+        except Exception as e:
+            print(f"--> [SCRAPER] Pool de processos indisponível, seguindo no processo: {e}")
+    return [processar_pagina(*t) for t in tarefas]
+
+def raspar_incremental(estado, fontes=None):
+    """Todas as páginas de todas as fontes, com GET condicional e dedup por link.
+
+    `estado` é o EstadoRaspagem persistido. Só páginas que mudaram (ou todas,
+    se o dia virou) vão para o parse/enriquecimento, e só os blocos que o
+    cache do dia não conhece são reenriquecidos. Retorna a lista nova, None
+    se nada mudou (tudo 304 no mesmo dia) ou [] se nenhuma página respondeu.
+    """
+    try:
+        return _raspar_incremental(estado, fontes)
+    finally:
+        estado.liberar()  # o cache do dia fica no arquivo, não na memória do worker
+
+def _raspar_incremental(estado, fontes):
+    t0 = time.time()
+    estado.carregar()
+    fontes = fontes_ativas() if fontes is None else fontes
+    paginas = [(fonte, url) for fonte in fontes for url in fonte.urls()]
+    if not paginas: return []
+    hoje = datetime.now().date()
+    mesmo_dia = estado.dia == hoje.isoformat()
+    cache = estado.enriquecidos if mesmo_dia else {}
+    conhecidos = set(cache)
+
+    with metricas.medir('scraper', etapa='download'):
+        respostas = baixar_paginas([url for _, url in paginas], estado)
+    if all(isinstance(r, Exception) for r in respostas.values()):
+        print(f"--> [ERRO] Scraper: {next(iter(respostas.values()))}")
+        return []
+
+    blocos_por_url, tarefas, falhas, inalteradas = {}, [], 0, 0
+    for fonte, url in paginas:
+        resp, anterior = respostas[url], estado.paginas.get(url)
+        if isinstance(resp, Exception) or (resp.status_code == 304 and not anterior):
+            falhas += 1
+            print(f"--> [ERRO] Scraper ({url}): {resp}")
+            if anterior: blocos_por_url[url] = anterior['blocos']  # segura a página até a próxima
+            continue
+        if resp.status_code == 304:
+            inalteradas += 1
+            blocos_por_url[url] = anterior['blocos']
+            if not mesmo_dia:  # virou o dia: revalida vencimentos sem baixar de novo
+                tarefas.append((fonte.nome, url, None, anterior['blocos'], conhecidos, hoje))
+            continue
+        estado.paginas[url] = {'etag': resp.headers.get('ETag'),
+                               'last_modified': resp.headers.get('Last-Modified'), 'blocos': []}
+        tarefas.append((fonte.nome, url, resp.text, [], conhecidos, hoje))
+
+    estado.verificado_em = time.time()
+    if not tarefas:
+        estado.salvar()
+        print(f"--> [SCRAPER] Nenhuma página mudou ({inalteradas} x 304, {falhas} falha(s)).")
+        return None
+
+    cache = dict(cache)
+    t_parse = t_enriquecer = 0.0  # somados por página (no pool, cada página roda num processo)
+    for (_, url, _, _, _, _), (blocos, novos, (tp, te)) in zip(tarefas, _executar_tarefas(tarefas)):
+        blocos_por_url[url] = estado.paginas[url]['blocos'] = blocos
+        cache.update(novos)
+        t_parse += tp
+        t_enriquecer += te
+
+    # Junta na ordem das fontes/páginas: com link repetido, vale a primeira
+    t0_juncao = time.perf_counter()
+    todos_blocos = [b for _, url in paginas for b in blocos_por_url.get(url, ())]
+    lista, estado.enriquecidos, _ = enriquecer_blocos(todos_blocos, hoje, cache)
+    metricas.observar('scraper', t_parse, etapa='parse')
+    metricas.observar('scraper', t_enriquecer + time.perf_counter() - t0_juncao, etapa='enriquecimento')
+    estado.paginas = {url: estado.paginas[url] for _, url in paginas if url in estado.paginas}
+    estado.dia = hoje.isoformat()
+    estado.salvar()
+    refeitos = len(cache) - len(conhecidos)
+    print(f"--> [SCRAPER] Sucesso! {len(lista)} concursos de {len(paginas)} página(s) "
+          f"({len(tarefas)} processadas, {inalteradas} x 304, {falhas} falha(s), "
+          f"{refeitos}/{len(todos_blocos)} blocos reprocessados) em {time.time() - t0:.1f}s.")
+    return lista
+
+def filtrar_concursos(todos, sal_min, chaves, ufs, excluir, niveis_filtro=None, bancas_filtro=None, ordem=None):
+    """Aplica os filtros da busca usando o índice invertido do snapshot (ou o SQL do ArmazemSQLite).
+
+    `ordem` None mantém a ordem da lista (salário decrescente); uma tupla de
+    boosts ('salario', 'prazo' ou vazia) ordena por relevância (services.ranking).
+    """
+    if ordem is None and hasattr(todos, 'consultar'):  # ArmazemSQLite: os filtros viram SQL
+        return todos.consultar(sal_min, chaves, ufs, excluir, niveis_filtro, bancas_filtro)[1]
+    indice = obter_indice(todos)
+    if ordem is None:
+        return indice.buscar(sal_min, chaves, ufs, excluir, niveis_filtro, bancas_filtro)
+    _, ids = obter_ranqueador(indice).ranquear(sal_min, chaves, ufs, excluir, niveis_filtro, bancas_filtro, boosts=ordem)
+    return [indice.linha(i) for i in ids]
+
+def paginar_concursos(todos, sal_min, chaves, ufs, excluir, niveis_filtro=None, bancas_filtro=None, inicio=0, limite=20, ordem=None):
+    """Mesmos filtros, mas só monta as linhas da página pedida. Retorna (total, linhas)."""
+    if ordem is None and hasattr(todos, 'consultar'):
+        return todos.consultar(sal_min, chaves, ufs, excluir, niveis_filtro, bancas_filtro, inicio=inicio, limite=limite)
+    indice = obter_indice(todos)
+    if ordem is None:
+        ids = indice.buscar_ids(sal_min, chaves, ufs, excluir, niveis_filtro, bancas_filtro)
+        total = len(ids)
+    else:
+        total, ids = obter_ranqueador(indice).ranquear(sal_min, chaves, ufs, excluir, niveis_filtro, bancas_filtro,
+                                                       boosts=ordem, ate=inicio + limite)
+    return total, [indice.linha(i) for i in ids[inicio:inicio + limite]]
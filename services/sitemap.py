@@ -0,0 +1,114 @@
+import zlib
+import time
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+# --- PARÂMETROS ---
+URLS_POR_ARQUIVO = 10000   # o protocolo aceita até 50 mil URLs (50 MB) por arquivo
+MANTER_VERSOES = 2
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def lastmod(timestamp):
+    """Timestamp -> data W3C em UTC ('2025-06-01T12:00:00Z')."""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+def termos_sitemap(dados):
+    """Termos das páginas ?q= dinâmicas: o nome do órgão (texto antes do primeiro '-'), sem repetir."""
+    vistos = set()
+    for item in dados:
+        termo = item['texto'].split('-')[0].strip()
+        if len(termo) > 4 and termo not in vistos:
+            vistos.add(termo)
+            yield termo
+
+def _gzip_de(pedacos):
+    """Bytes gzip dos pedaços de texto de uma parte.
+
+    Os pedaços são comprimidos um a um, sem juntar o XML numa string só,
+    mas a lista de linhas da parte e o gzip dela ficam inteiros na memória
+    (o gzip é o que o Sitemaps guarda e serve).
+    """
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = formato gzip
+    saida = [z.compress(p.encode('utf-8')) for p in pedacos]
+    saida.append(z.flush())
+    return b''.join(saida)
+
+
+class ConjuntoSitemaps:
+    """Arquivos de uma versão dos dados: índice + termos em partes gzip."""
+
+    def __init__(self, versao, timestamp, base, partes, total_urls):
+        self.versao = versao
+        self.timestamp = timestamp
+        self.base = base
+        self.partes = partes          # bytes gzip de sitemap-termos-<n>.xml.gz
+        self.total_urls = total_urls
+
+    def indice(self, extras=()):
+        """Sitemap index: `extras` são (url, timestamp) de sitemaps fora das partes (páginas fixas)."""
+        linhas = ['<?xml version="1.0" encoding="UTF-8"?>', f'<sitemapindex xmlns="{XMLNS}">']
+        arquivos = list(extras) + [(f"{self.base}/sitemap-termos-{n}.xml.gz", self.timestamp)
+                                   for n in range(len(self.partes))]
+        for url, ts in arquivos:
+            linhas.append(f'<sitemap><loc>{escape(url)}</loc><lastmod>{lastmod(ts)}</lastmod></sitemap>')
+        linhas.append('</sitemapindex>')
+        return '\n'.join(linhas).encode('utf-8')
+
+
+class Sitemaps:
+    """Sitemaps dos termos, gerados uma vez por versão dos dados e guardados em gzip.
+
+    Servir um arquivo é só devolver bytes prontos: robô nenhum faz busca,
+    renderiza template ou espera raspagem. O lastmod de cada termo é o
+    timestamp do snapshot que o gerou. Todas as URLs usam a `base` canônica
+    (SITE_URL), então o Host do request não cria conjuntos extras.
+    """
+
+    def __init__(self, base, urls_por_arquivo=URLS_POR_ARQUIVO):
+        self.base = base.rstrip('/')
+        self.urls_por_arquivo = urls_por_arquivo
+        self._conjuntos = OrderedDict()  # versao -> ConjuntoSitemaps
+        self._lock = threading.Lock()
+        self._gerando = {}               # versao -> Lock: uma geração por versão
+
+    def _gerar(self, versao, dados, timestamp):
+        base = self.base
+        inicio = f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{XMLNS}">\n'
+        mod = lastmod(timestamp)
+        partes, total, atual = [], 0, []
+
+        def fechar():
+            partes.append(_gzip_de([inicio] + atual + ['</urlset>\n']))
+
+        for termo in termos_sitemap(dados):
+            loc = escape(f"{base}/?q={quote(termo)}")
+            atual.append(f'<url><loc>{loc}</loc><lastmod>{mod}</lastmod><changefreq>daily</changefreq>'
+                         f'<priority>0.7</priority></url>\n')
+            total += 1
+            if len(atual) >= self.urls_por_arquivo:
+                fechar()
+                atual = []
+        if atual or not partes: fechar()
+        return ConjuntoSitemaps(versao, timestamp, base, partes, total)
+
+    def obter(self, versao, dados, timestamp):
+        chave = versao
+        conjunto = self._conjuntos.get(chave)
+        if conjunto is not None: return conjunto
+        with self._lock:
+            trava = self._gerando.setdefault(chave, threading.Lock())
+        with trava:
+            conjunto = self._conjuntos.get(chave)
+            if conjunto is None:
+                t0 = time.time()
+                conjunto = self._gerar(versao, dados, timestamp)
+                with self._lock:
+                    self._conjuntos[chave] = conjunto
+                    while len(self._conjuntos) > MANTER_VERSOES: self._conjuntos.popitem(last=False)
+                    self._gerando.pop(chave, None)
+                print(f"--> [SITEMAP] {conjunto.total_urls} termos em {len(conjunto.partes)} arquivo(s) "
+                      f"({time.time() - t0:.2f}s)")
+        return conjunto
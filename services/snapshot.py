@@ -0,0 +1,356 @@
+import os
+import json
+import mmap
+import struct
+import tempfile
+from array import array
+from collections.abc import Mapping
+
+from services.indice import IndiceBusca, NIVEIS, nome_bancas
+from services.sugestoes import montar_sugestoes
+
+# --- FORMATO BINÁRIO DO SNAPSHOT ---
+# Cabeçalho + diretório de seções nomeadas (nome, offset, tamanho) + seções
+# alinhadas em 8 bytes. Campos únicos por concurso são colunas (offsets uint32
+# + blob UTF-8); campos repetitivos (UF, data, salário formatado) são
+# internados: código por item (uint8/16/32, o menor que couber) + tabela
+# com os valores distintos.
+# O índice de busca (vocabulário, postings, n-gramas, UF, nível, banca, salário)
+# e o autocompletar (services/sugestoes.py) vão prontos no arquivo. Arrays numéricos usam a ordem de bytes nativa
+# (o arquivo é sempre gerado e lido na mesma máquina).
+MAGICO = b'CIDS'
+VERSAO_FORMATO = 5
+CABECALHO = struct.Struct('<4sHHId')  # mágico, versão do formato, nº de seções, total, timestamp
+SECAO = struct.Struct('<24sQQ')       # nome, offset, tamanho
+
+CAMPOS_UNICOS = ('texto', 'texto_normalized', 'link')
+CAMPOS_INTERNADOS = ('data_fim', 'salario_formatado', 'uf')
+
+
+def versao_de(timestamp):
+    """Identificador do snapshot, igual em todos os workers que o anexarem."""
+    return format(int(timestamp * 1000), 'x')
+
+def mascara_niveis(niveis):
+    return sum(1 << k for k, nivel in enumerate(NIVEIS) if nivel in niveis)
+
+def niveis_da_mascara(mascara):
+    return {nivel for k, nivel in enumerate(NIVEIS) if mascara & (1 << k)}
+
+def _tabela(strings):
+    offsets, partes, pos = array('I', [0]), [], 0
+    for valor in strings:
+        b = valor.encode('utf-8')
+        partes.append(b)
+        pos += len(b)
+        offsets.append(pos)
+    return offsets.tobytes(), b''.join(partes)
+
+def _codigos(valores):
+    """Array de códigos com o menor tipo inteiro que comporta `valores`."""
+    maior = max(valores, default=0)
+    return array('B' if maior < 1 << 8 else 'H' if maior < 1 << 16 else 'I', valores)
+
+def _tipo_codigos(secao, total):
+    return {1: 'B', 2: 'H'}.get(len(secao) // total if total else 4, 'I')
+
+def _csr(listas):
+    offsets, valores = array('I', [0]), array('I')
+    for lista in listas:
+        valores.extend(lista)
+        offsets.append(len(valores))
+    return offsets.tobytes(), valores.tobytes()
+
+
+def serializar(dados, timestamp):
+    """Converte a lista de concursos no formato binário (bytes)."""
+    indice = IndiceBusca(dados)
+    secoes = {}
+    for campo in CAMPOS_UNICOS:
+        secoes[campo + '.o'], secoes[campo + '.b'] = _tabela(item.get(campo) or '' for item in dados)
+    for campo in CAMPOS_INTERNADOS:
+        codigos = {}
+        col = _codigos([codigos.setdefault(item.get(campo) or '', len(codigos)) for item in dados])
+        secoes[campo + '.c'] = col.tobytes()
+        secoes[campo + '.o'], secoes[campo + '.b'] = _tabela(codigos)
+    secoes['salario'] = array('d', (float(item.get('salario_num') or 0) for item in dados)).tobytes()
+    secoes['niveis'] = bytes(mascara_niveis(item.get('niveis') or ()) for item in dados)
+
+    pos_vocab = {tok: v for v, tok in enumerate(indice.vocabulario)}
+    secoes['tokens.o'], secoes['tokens.v'] = _csr(sorted(pos_vocab[t] for t in item['tokens']) for item in dados)
+    secoes['vocab.o'], secoes['vocab.b'] = _tabela(indice.vocabulario)
+    secoes['post.o'], secoes['post.v'] = _csr(indice.postings)
+    secoes['gramas.o'], secoes['gramas.b'] = _tabela(indice.gramas)
+    secoes['gramasv.o'], secoes['gramasv.v'] = _csr(indice.gramas_vocab)
+    secoes['siglas.o'], secoes['siglas.b'] = _tabela(indice.siglas)
+    secoes['nacional'] = array('I', indice.nacional).tobytes()
+    secoes['por_uf.o'], secoes['por_uf.v'] = _csr(indice.por_uf)
+    secoes['por_nivel.o'], secoes['por_nivel.v'] = _csr(indice.por_nivel)
+    pos_banca = {banca: k for k, banca in enumerate(indice.bancas)}
+    secoes['bancas.o'], secoes['bancas.v'] = _csr(sorted(pos_banca[b] for b in item.get('bancas') or ()) for item in dados)
+    secoes['bancasn.o'], secoes['bancasn.b'] = _tabela(indice.bancas)
+    secoes['por_banca.o'], secoes['por_banca.v'] = _csr(indice.por_banca)
+    secoes['sal_ids'] = array('I', indice.ids_por_salario).tobytes()
+    secoes['sal_ord'] = array('d', indice.salarios_ordenados).tobytes()
+
+    entradas, prefixos, topos = montar_sugestoes(dados, indice)
+    secoes['sug.o'], secoes['sug.b'] = _tabela(e[0] for e in entradas)
+    secoes['sugx.o'], secoes['sugx.b'] = _tabela(e[1] for e in entradas)
+    secoes['sug.n'] = array('I', (e[2] for e in entradas)).tobytes()
+    secoes['sug.t'] = bytes(e[3] for e in entradas)
+    secoes['sugp.o'], secoes['sugp.b'] = _tabela(prefixos)
+    secoes['sugt.o'], secoes['sugt.v'] = _csr(topos)
+
+    inicio = CABECALHO.size + SECAO.size * len(secoes)
+    diretorio, corpo, pos = [], [], _alinhar(inicio)
+    corpo.append(b'\0' * (pos - inicio))
+    for nome, s in secoes.items():
+        diretorio.append(SECAO.pack(nome.encode('ascii'), pos, len(s)))
+        fim = _alinhar(pos + len(s))
+        corpo += [s, b'\0' * (fim - pos - len(s))]
+        pos = fim
+    return CABECALHO.pack(MAGICO, VERSAO_FORMATO, len(secoes), len(dados), timestamp) + b''.join(diretorio) + b''.join(corpo)
+
+def _alinhar(n): return (n + 7) & ~7
+
+def escrever_atomico(caminho, conteudo):
+    """Grava em arquivo temporário no mesmo diretório e faz rename (nunca fica truncado)."""
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    fd, tmp = tempfile.mkstemp(dir=pasta, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, caminho)
+    except:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+
+
+class ColunaTexto:
+    """Coluna de strings lida direto do buffer; decodifica só o item acessado."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self): return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+
+class ColunaInternada:
+    """Coluna de valores repetidos: código por item + tabela decodificada uma vez."""
+
+    def __init__(self, codigos, tabela):
+        self.codigos = codigos
+        self.valores = [tabela[k] for k in range(len(tabela))]
+
+    def __len__(self): return len(self.codigos)
+
+    def __getitem__(self, i): return self.valores[self.codigos[i]]
+
+
+class ListasCSR:
+    """Lista de listas de inteiros (offsets + valores), fatiada sem cópia."""
+
+    def __init__(self, offsets, valores):
+        self.offsets = offsets
+        self.valores = valores
+
+    def __len__(self): return len(self.offsets) - 1
+
+    def __getitem__(self, k): return self.valores[self.offsets[k]:self.offsets[k + 1]]
+
+
+class Registro(Mapping):
+    """Um concurso do catálogo, lido sob demanda (só guarda o catálogo e a posição).
+
+    Funciona como o dict de antes (item['texto'], item.get('uf'), dict(item)),
+    mas nenhum campo existe em memória até ser pedido.
+    """
+
+    __slots__ = ('_cat', '_i')
+    CAMPOS = CAMPOS_UNICOS + CAMPOS_INTERNADOS + ('tokens', 'niveis', 'bancas', 'salario_num')
+
+    def __init__(self, catalogo, i):
+        self._cat = catalogo
+        self._i = i
+
+    def __getitem__(self, campo):
+        cat, i = self._cat, self._i
+        col = cat.colunas.get(campo)
+        if col is not None: return col[i]
+        if campo == 'salario_num': return cat.salarios[i]
+        if campo == 'niveis': return cat.niveis_de(i)
+        if campo == 'bancas': return cat.bancas_de(i)
+        if campo == 'tokens': return cat.tokens_de(i)
+        raise KeyError(campo)
+
+    def __iter__(self): return iter(self.CAMPOS)
+
+    def __len__(self): return len(self.CAMPOS)
+
+    def __repr__(self): return f"Registro({self._i}, {self['link']!r})"
+
+
+class SnapshotMapeado:
+    """Catálogo somente-leitura sobre um arquivo mapeado em memória (zero-copy).
+
+    Comporta-se como a lista de dicts de antes: len(), índice, fatia e iteração
+    devolvem registros montados sob demanda. Vários processos que mapeiam o
+    mesmo arquivo compartilham as mesmas páginas do page cache, e abrir o
+    arquivo não reidrata nada: só lê o diretório de seções.
+    """
+
+    def __init__(self, caminho, conteudo=None):
+        self.caminho = caminho
+        if conteudo is None:
+            with open(caminho, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mm = conteudo  # catálogo só em memória (mesmo formato, sem arquivo)
+        mv = memoryview(self._mm)
+        magico, versao, n_secoes, self.total, self.timestamp = CABECALHO.unpack_from(mv, 0)
+        if magico != MAGICO or versao != VERSAO_FORMATO:
+            raise ValueError(f"Snapshot inválido ou de outra versão: {caminho}")
+        sec = {}
+        for k in range(n_secoes):
+            nome, offset, tamanho = SECAO.unpack_from(mv, CABECALHO.size + k * SECAO.size)
+            sec[nome.rstrip(b'\0').decode('ascii')] = mv[offset:offset + tamanho]
+
+        def tabela(nome): return ColunaTexto(sec[nome + '.o'].cast('I'), sec[nome + '.b'])
+        def csr(nome, sufixo='.v'): return ListasCSR(sec[nome + '.o'].cast('I'), sec[nome + sufixo].cast('I'))
+
+        self.colunas = {campo: tabela(campo) for campo in CAMPOS_UNICOS}
+        for campo in CAMPOS_INTERNADOS:
+            c = sec[campo + '.c']
+            self.colunas[campo] = ColunaInternada(c.cast(_tipo_codigos(c, self.total)), tabela(campo))
+        self.salarios = sec['salario'].cast('d')
+        self.niveis = sec['niveis']
+        self.tokens = csr('tokens')
+        self.bancas = csr('bancas')
+        self.secoes_indice = {
+            'vocabulario': tabela('vocab'), 'postings': csr('post'),
+            'gramas': tabela('gramas'), 'gramas_vocab': csr('gramasv'),
+            'siglas': [tabela('siglas')[k] for k in range(len(tabela('siglas')))],
+            'nacional': sec['nacional'].cast('I'),
+            'por_uf': csr('por_uf'), 'por_nivel': csr('por_nivel'),
+            'bancas': [tabela('bancasn')[k] for k in range(len(tabela('bancasn')))], 'por_banca': csr('por_banca'),
+            'ids_por_salario': sec['sal_ids'].cast('I'), 'salarios_ordenados': sec['sal_ord'].cast('d'),
+        }
+        self.secoes_sugestoes = {
+            'chaves': tabela('sug'), 'textos': tabela('sugx'), 'totais': sec['sug.n'].cast('I'), 'tipos': sec['sug.t'],
+            'prefixos': tabela('sugp'), 'topos': csr('sugt'),
+        }
+        self.versao = versao_de(self.timestamp)
+
+    def __len__(self): return self.total
+
+    def __iter__(self):
+        for i in range(self.total): yield self._registro(i)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._registro(j) for j in range(*i.indices(self.total))]
+        if i < 0: i += self.total
+        if not 0 <= i < self.total: raise IndexError(i)
+        return self._registro(i)
+
+    def _registro(self, i): return Registro(self, i)
+
+    def tokens_de(self, i):
+        vocab = self.secoes_indice['vocabulario']
+        return {vocab[v] for v in self.tokens[i]}
+
+    def niveis_de(self, i): return niveis_da_mascara(self.niveis[i])
+
+    def bancas_de(self, i):
+        nomes = self.secoes_indice['bancas']
+        return {nomes[k] for k in self.bancas[i]}
+
+    def linha(self, i):
+        """Linha de saída da API sem decodificar texto normalizado e tokens."""
+        c = self.colunas
+        return {
+            'Salário': c['salario_formatado'][i],
+            'UF': c['uf'][i],
+            'Data Fim Inscrição': c['data_fim'][i],
+            'Informações do Concurso': c['texto'][i],
+            'Link': c['link'][i],
+            'Banca': nome_bancas(self.bancas_de(i))
+        }
+
+
+def catalogo_em_memoria(dados, timestamp):
+    """Lista de dicts -> catálogo compacto sem passar pelo disco (mesmo formato do snapshot)."""
+    return SnapshotMapeado(None, serializar(dados, timestamp))
+
+
+class RepositorioSnapshots:
+    """Diretório local compartilhado pelos workers.
+
+    Quem raspa grava `concursos-<versao>.snap` e troca o ponteiro `ATUAL`
+    com rename atômico; os demais só releem o ponteiro e mapeiam o arquivo.
+    """
+
+    MANTER = 3  # versões antigas continuam válidas para quem ainda as mapeia
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.ponteiro = os.path.join(diretorio, 'ATUAL')
+        os.makedirs(diretorio, exist_ok=True)
+        self._aberto = None
+
+    def publicar(self, dados, timestamp):
+        nome = f"concursos-{versao_de(timestamp)}.snap"
+        escrever_atomico(os.path.join(self.diretorio, nome), serializar(dados, timestamp))
+        escrever_atomico(self.ponteiro, nome.encode('utf-8'))
+        self._limpar(nome)
+        return self.abrir_atual()
+
+    def abrir_atual(self):
+        """Snapshot apontado por ATUAL (reaproveita o mapeamento se não mudou)."""
+        try:
+            with open(self.ponteiro, 'r', encoding='utf-8') as f:
+                nome = f.read().strip()
+        except OSError:
+            return None
+        caminho = os.path.join(self.diretorio, nome)
+        if self._aberto is not None and self._aberto.caminho == caminho:
+            return self._aberto
+        self._aberto = SnapshotMapeado(caminho)
+        return self._aberto
+
+    def abrir_versao(self, versao):
+        """Snapshot de uma versão que ainda está no diretório (as MANTER mais novas); None se já saiu."""
+        if not versao or any(c not in '0123456789abcdef' for c in versao): return None  # vem do cursor do cliente
+        caminho = os.path.join(self.diretorio, f"concursos-{versao}.snap")
+        if self._aberto is not None and self._aberto.caminho == caminho: return self._aberto
+        try: return SnapshotMapeado(caminho)
+        except: return None
+
+    def gravar_diff(self, diff):
+        """Diff da raspagem que gerou `diff['versao']` (adicionados/removidos/alterados)."""
+        escrever_atomico(os.path.join(self.diretorio, f"diff-{diff['versao']}.json"),
+                         json.dumps(diff, ensure_ascii=False).encode('utf-8'))
+
+    def ler_diff(self, versao):
+        try:
+            with open(os.path.join(self.diretorio, f"diff-{versao}.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _limpar(self, atual):
+        # Em Unix, remover um arquivo mapeado não invalida o mapeamento existente
+        for prefixo, sufixo in (('concursos-', '.snap'), ('diff-', '.json')):
+            antigos = sorted((n for n in os.listdir(self.diretorio)
+                              if n.startswith(prefixo) and n.endswith(sufixo) and n != atual), reverse=True)
+            for nome in antigos[self.MANTER - 1:]:
+                try: os.remove(os.path.join(self.diretorio, nome))
+                except OSError: pass
@@ -0,0 +1,130 @@
+import re
+import heapq
+from bisect import bisect_left
+from collections import Counter
+
+from services.texto import normalizar_texto
+from services.ranking import PALAVRAS_VAZIAS
+
+# --- PARÂMETROS ---
+TIPOS = ('palavra', 'cargo', 'banca')
+PALAVRA, CARGO, BANCA = 0, 1, 2
+MAX_SUGESTOES = 10
+LIMIAR_FAIXA = 64   # prefixo com mais sugestões que isso já tem o topo pronto no snapshot
+MIN_PALAVRA = 3
+MAX_FRACAO = 0.5    # palavra em mais da metade dos concursos ('edital', 'vagas') não ajuda a filtrar
+
+# Cargos no anúncio: "... 137 vagas até R$ 2.100,50 Motorista, Engenheiro Civil Médio / Superior 06/11/2025 ..."
+# (sem IGNORECASE: com ele o re não acha o 'v' inicial por busca literal e fica duas vezes mais lento)
+REGEX_CARGOS = re.compile(r'\b[Vv]agas?\s+(?:[Aa]t[eé]\s+R\$\s*[\d.,]+\s+)?([^\d]+)\d{2}/\d{2}')
+NIVEIS_ANUNCIO = {'fundamental', 'medio', 'médio', 'superior', 'tecnico', 'técnico', 'alfabetizado', '/'}
+REGEX_DIGITO = re.compile(r'\d')
+
+
+def extrair_cargos(texto):
+    """Nomes de cargo listados no texto do concurso, como foram escritos."""
+    cargos = []
+    for m in REGEX_CARGOS.finditer(texto or ''):
+        palavras = m.group(1).split()
+        while palavras and palavras[-1].lower() in NIVEIS_ANUNCIO: palavras.pop()  # 'Médio / Superior' antes da data
+        for nome in ' '.join(palavras).split(','):
+            nome = ' '.join(nome.split())
+            if MIN_PALAVRA <= len(nome) <= 60 and not REGEX_DIGITO.search(nome) and nome not in cargos:
+                cargos.append(nome)
+    return cargos
+
+def montar_sugestoes(dados, indice):
+    """Estruturas do autocompletar de um catálogo: (entradas, prefixos, topos).
+
+    `entradas` são (chave normalizada, texto exibido, total de concursos,
+    tipo) ordenadas pela chave: as completações de um prefixo são uma faixa
+    contígua, achada com bisect. Para os prefixos cuja faixa passa de
+    LIMIAR_FAIXA (as primeiras letras), `topos` guarda as MAX_SUGESTOES
+    melhores posições, então nenhuma consulta percorre mais que LIMIAR_FAIXA
+    entradas.
+    """
+    entradas, comum = {}, max(indice.total * MAX_FRACAO, 1)
+    for v, tok in enumerate(indice.vocabulario):
+        if len(tok) < MIN_PALAVRA or tok in PALAVRAS_VAZIAS or REGEX_DIGITO.search(tok): continue
+        total = len(indice.postings[v])
+        if total <= comum: entradas[tok] = (tok, total, PALAVRA)
+    # As bancas do índice são os termos de TERMOS_BANCAS achados nos textos
+    for k, banca in enumerate(indice.bancas):
+        total = len(indice.por_banca[k])
+        if total: entradas[banca] = (banca.upper(), max(total, entradas.get(banca, ('', 0))[1]), BANCA)
+    contagem, grafias, chave_de = Counter(), Counter(), {}
+    for item in dados:
+        nomes = extrair_cargos(item['texto'])
+        grafias.update(nomes)
+        for nome in nomes:
+            if nome not in chave_de: chave_de[nome] = normalizar_texto(nome)
+        contagem.update({chave_de[nome] for nome in nomes})
+    exibir = {}  # chave -> grafia mais usada
+    for nome, n in grafias.most_common():
+        exibir.setdefault(chave_de[nome], nome)
+    for chave, total in contagem.items():
+        entradas[chave] = (exibir[chave], max(total, entradas.get(chave, ('', 0))[1]), CARGO)
+
+    ordenadas = [(chave,) + entradas[chave] for chave in sorted(entradas)]
+    chaves = [e[0] for e in ordenadas]
+    totais = [e[2] for e in ordenadas]
+
+    topos = {}
+    pilha = [(0, len(chaves), 0)]  # faixa [lo, hi) cujas chaves dividem os primeiros n caracteres
+    while pilha:
+        lo, hi, n = pilha.pop()
+        if n: topos[chaves[lo][:n]] = heapq.nsmallest(MAX_SUGESTOES, range(lo, hi), key=lambda i: (-totais[i], i))
+        while lo < hi and len(chaves[lo]) == n: lo += 1  # a chave igual ao prefixo vem antes das mais longas
+        while lo < hi:
+            c, fim = chaves[lo][n], lo
+            while fim < hi and chaves[fim][n] == c: fim += 1
+            if fim - lo > LIMIAR_FAIXA: pilha.append((lo, fim, n + 1))
+            lo = fim
+    prefixos = sorted(topos)
+    return ordenadas, prefixos, [topos[p] for p in prefixos]
+
+
+class Sugestoes:
+    """Autocompletar por prefixo sobre as estruturas de montar_sugestoes.
+
+    Sobre um snapshot mapeado tudo vem pronto do arquivo (montado uma vez no
+    serializar); uma consulta é dois bisects e, no máximo, LIMIAR_FAIXA
+    contagens comparadas.
+    """
+
+    def __init__(self, indice):
+        s = getattr(indice.dados, 'secoes_sugestoes', None)
+        if s is not None:
+            self.chaves, self.textos, self.totais, self.tipos = s['chaves'], s['textos'], s['totais'], s['tipos']
+            self.prefixos, self.topos = s['prefixos'], s['topos']
+        else:
+            entradas, self.prefixos, self.topos = montar_sugestoes(indice.dados, indice)
+            self.chaves = [e[0] for e in entradas]
+            self.textos = [e[1] for e in entradas]
+            self.totais = [e[2] for e in entradas]
+            self.tipos = [e[3] for e in entradas]
+
+    def sugerir(self, prefixo, limite=MAX_SUGESTOES):
+        """Até `limite` completações de `prefixo`, das com mais concursos às com menos."""
+        p = ' '.join(normalizar_texto(prefixo).split())[:60]
+        if not p: return []
+        if prefixo[-1].isspace(): p += ' '  # 'tecnico ' já pede o cargo de várias palavras
+        limite = min(max(limite, 1), MAX_SUGESTOES)
+        lo = bisect_left(self.chaves, p)
+        hi = bisect_left(self.chaves, p[:-1] + chr(ord(p[-1]) + 1), lo)
+        k = bisect_left(self.prefixos, p) if hi - lo > LIMIAR_FAIXA else len(self.prefixos)
+        if k < len(self.prefixos) and self.prefixos[k] == p:
+            posicoes = self.topos[k][:limite]
+        else:
+            posicoes = heapq.nsmallest(limite, range(lo, hi), key=lambda i: (-self.totais[i], i))
+        return [{'texto': self.textos[i], 'tipo': TIPOS[self.tipos[i]], 'total': self.totais[i]} for i in posicoes]
+
+
+def obter_sugestoes(indice):
+    """Um Sugestoes por índice (o índice já é um por snapshot)."""
+    s = getattr(indice, '_sugestoes', None)
+    if s is None:
+        with indice._lock:
+            s = getattr(indice, '_sugestoes', None)
+            if s is None: s = indice._sugestoes = Sugestoes(indice)
+    return s
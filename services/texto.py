@@ -0,0 +1,14 @@
+import re
+import unicodedata
+
+REGEX_PONTUACAO = re.compile(r'[^\w\s]')
+
+def normalizar_texto(texto):
+    """Remove acentos e deixa minúsculo (médico -> medico)."""
+    if not texto: return ""
+    return ''.join(c for c in unicodedata.normalize('NFD', texto)
+                   if unicodedata.category(c) != 'Mn').lower()
+
+def tokenizar(texto_normalizado):
+    """Conjunto de palavras do texto já normalizado, sem pontuação."""
+    return set(REGEX_PONTUACAO.sub('', texto_normalizado).split())
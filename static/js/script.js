@@ -4,6 +4,12 @@ let todosConcursos = [];
 let paginaAtual = 0;
 const itensPorPagina = 20;
 
+// Paginação no servidor: guardamos o filtro atual e o cursor da próxima página
+let totalResultados = 0;
+let proximoCursor = null;
+let payloadAtual = null;
+let carregandoPagina = false;
+
 // --- SISTEMA DE FAVORITOS (LOCALSTORAGE) ---
 function getFavoritos() {
     const salvos = localStorage.getItem('concursosFavoritos');
@@ -73,6 +79,7 @@ function criarHTMLCard(c, isFavPage = false) {
     const salario = c.salario || c['Salário'];
     const uf = c.uf || c['UF'];
     const dataFim = c.dataFim || c['Data Fim Inscrição'];
+    const banca = c.banca || c['Banca'];
     const linkEdital = `/ir?url=${encodeURIComponent(linkBase)}&tipo=edital`;
     const linkInscricao = `/ir?url=${encodeURIComponent(linkBase)}&tipo=inscricao`;
     const classeFav = (isFavPage || isFavorito(c.texto || c['Informações do Concurso'])) ? 'favorited' : '';
@@ -86,6 +93,7 @@ function criarHTMLCard(c, isFavPage = false) {
             <span class="badge money"><i class="fas fa-money-bill-wave"></i> ${salario}</span>
             <span class="badge uf"><i class="fas fa-map-marker-alt"></i> ${uf}</span>
             <span class="badge date"><i class="far fa-calendar-alt"></i> ${dataFim}</span>
+            ${banca ? `<span class="badge banca"><i class="fas fa-landmark"></i> ${banca}</span>` : ''}
             <button class="icon-btn btn-copy-small" onclick="copiarLinkUnico('${textoConcurso}')" title="Copiar link"><i class="fas fa-link"></i></button>
             <button class="icon-btn btn-zap-small" onclick="compartilharZapUnico('${textoConcurso}')" title="WhatsApp"><i class="fab fa-whatsapp"></i></button>
             <a href="${linkEdital}" target="_blank" rel="noopener noreferrer" class="action-btn btn-edital"><i class="fas fa-file-pdf"></i> Edital</a>
@@ -108,7 +116,7 @@ function formatarMoeda(elemento) {
     elemento.value = "R$ " + valor;
 }
 
-document.querySelectorAll('.uf-btn, .region-btn').forEach(btn => {
+document.querySelectorAll('.uf-btn, .region-btn, .level-btn').forEach(btn => {
     btn.addEventListener('click', () => { btn.classList.toggle('active'); });
 });
 
@@ -224,6 +232,7 @@ function mostrarToast(msg) {
 async function cadastrarLead() {
     const emailInput = document.getElementById('email-lead');
     const email = emailInput.value;
+    const alerta = document.getElementById('alerta-busca').checked;
     const btn = document.querySelector('.news-form button');
     if (!email || !email.includes('@')) { alert("E-mail inválido."); return; }
 
@@ -235,10 +244,10 @@ async function cadastrarLead() {
         const response = await fetch('/api/newsletter', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ email: email })
+            body: JSON.stringify(alerta ? { email: email, alerta: true, filtros: payloadAtual } : { email: email })
         });
         if (response.ok) {
-            btn.innerText = "Cadastrado! ✅";
+            btn.innerText = alerta ? "Confirme no e-mail ✅" : "Cadastrado! ✅";
             emailInput.value = "";
             setTimeout(() => { btn.innerText = "Cadastrar"; btn.disabled = false; }, 3000);
         } else { throw new Error(); }
@@ -267,19 +276,134 @@ function renderizarLote() {
         container.appendChild(criarHTMLCard(c));
     });
 
-    if (fim < todosConcursos.length) {
+    if (fim < totalResultados) {
         btnLoadMore.style.display = 'block';
-        btnLoadMore.innerText = `👇 Carregar mais (${todosConcursos.length - fim})`;
+        btnLoadMore.innerText = `👇 Carregar mais (${totalResultados - fim})`;
     } else {
         btnLoadMore.style.display = 'none';
     }
 }
 
-function carregarMais() {
+// Query string canônica (ordem fixa, listas ordenadas): a mesma busca gera
+// sempre a mesma URL, então CDN, navegador e service worker podem reaproveitar
+function queryBusca(payload, cursor) {
+    const params = new URLSearchParams();
+    if (payload.palavra_chave) params.set('q', payload.palavra_chave);
+    if (payload.salario_minimo) params.set('salario', payload.salario_minimo);
+    if (payload.excluir_palavra) params.set('excluir', payload.excluir_palavra);
+    if (payload.banca) params.set('banca', payload.banca);
+    if (payload.ufs && payload.ufs.length) params.set('uf', [...payload.ufs].sort().join(','));
+    if (payload.regioes && payload.regioes.length) params.set('regiao', [...payload.regioes].sort().join(','));
+    if (payload.niveis && payload.niveis.length) params.set('nivel', [...payload.niveis].sort().join(','));
+    if (payload.ordem) params.set('ordem', payload.ordem);
+    if (payload.boost) params.set('boost', payload.boost);
+    params.set('limit', itensPorPagina);
+    if (cursor) params.set('cursor', cursor);
+    return params.toString();
+}
+
+// Contagem em cada botão de UF/região/nível: quantos resultados ele daria com os demais filtros
+async function atualizarFacetas(payload) {
+    const params = new URLSearchParams(queryBusca(payload));
+    params.delete('limit');
+    params.delete('ordem'); // a ordem não muda as contagens
+    params.delete('boost');
+    try {
+        const response = await fetch('/api/facetas?' + params.toString());
+        if (!response.ok) return;
+        const facetas = await response.json();
+        const grupos = [['.uf-btn', facetas.uf], ['.region-btn', facetas.regiao], ['.level-btn', facetas.nivel]];
+        grupos.forEach(([seletor, contagens]) => {
+            document.querySelectorAll(seletor).forEach(btn => {
+                const n = contagens[btn.getAttribute('data-value')];
+                if (n === undefined) { btn.removeAttribute('data-contagem'); return; }
+                btn.setAttribute('data-contagem', n);
+                btn.classList.toggle('sem-resultado', n === 0);
+            });
+        });
+    } catch (e) {
+        console.error(e);
+    }
+}
+
+async function buscarPagina(cursor) {
+    const response = await fetch('/api/buscar?' + queryBusca(payloadAtual, cursor));
+    if (response.status === 410) return null; // dados atualizados: refaz a busca
+    if (!response.ok) throw new Error(`Erro: ${response.status}`);
+    return response.json();
+}
+
+async function carregarMais() {
+    if (carregandoPagina) return;
+    const proximoInicio = (paginaAtual + 1) * itensPorPagina;
+    if (proximoInicio >= totalResultados) return;
+
+    // Página ainda não baixada: busca no servidor antes de renderizar
+    if (proximoInicio >= todosConcursos.length && proximoCursor) {
+        carregandoPagina = true;
+        try {
+            const pagina = await buscarPagina(proximoCursor);
+            if (!pagina) {
+                document.getElementById('searchForm').dispatchEvent(new Event('submit'));
+                return;
+            }
+            todosConcursos = todosConcursos.concat(pagina.itens);
+            proximoCursor = pagina.cursor;
+        } catch (e) {
+            console.error(e);
+            return;
+        } finally {
+            carregandoPagina = false;
+        }
+    }
     paginaAtual++;
     renderizarLote();
 }
 
+// Rolagem infinita: carrega a próxima página quando o botão aparece na tela
+if ('IntersectionObserver' in window) {
+    const btnObservado = document.getElementById('btn-load-more');
+    if (btnObservado) {
+        new IntersectionObserver(entradas => {
+            if (entradas.some(e => e.isIntersecting) && btnObservado.style.display !== 'none') carregarMais();
+        }, { rootMargin: '400px' }).observe(btnObservado);
+    }
+}
+
+// --- AUTOCOMPLETAR DA PALAVRA-CHAVE ---
+// Completa só o último termo (vírgula separa termos); espera a digitação parar antes de perguntar ao servidor
+let timerSugestoes = null;
+const campoPalavra = document.getElementById('palavra_chave');
+if (campoPalavra) {
+    campoPalavra.addEventListener('input', () => {
+        clearTimeout(timerSugestoes);
+        timerSugestoes = setTimeout(carregarSugestoes, 150);
+    });
+}
+
+async function carregarSugestoes() {
+    const valor = campoPalavra.value;
+    const corte = valor.lastIndexOf(',') + 1;
+    const base = corte ? valor.slice(0, corte) + ' ' : '';
+    const prefixo = valor.slice(corte).trimStart();
+    const lista = document.getElementById('sugestoes');
+    if (prefixo.length < 2) { lista.innerHTML = ''; return; }
+    try {
+        const response = await fetch('/api/sugestoes?' + new URLSearchParams({ prefix: prefixo, limit: 8 }));
+        if (!response.ok || campoPalavra.value !== valor) return; // já digitaram outra coisa
+        const dados = await response.json();
+        lista.innerHTML = '';
+        dados.sugestoes.forEach(s => {
+            const opcao = document.createElement('option');
+            opcao.value = base + s.texto;
+            opcao.label = `${s.total} concurso${s.total === 1 ? '' : 's'}`;
+            lista.appendChild(opcao);
+        });
+    } catch (e) {
+        console.error(e);
+    }
+}
+
 // --- AUTO-CARREGAMENTO (TELA VIVA) ---
 window.addEventListener('load', () => {
     const params = new URLSearchParams(window.location.search);
@@ -287,6 +411,12 @@ window.addEventListener('load', () => {
     if (params.has('q')) { document.getElementById('palavra_chave').value = params.get('q'); temFiltrosURL = true; }
     if (params.has('salario')) { document.getElementById('salario_minimo').value = params.get('salario'); temFiltrosURL = true; }
     if (params.has('excluir')) { document.getElementById('excluir_palavra').value = params.get('excluir'); temFiltrosURL = true; }
+    if (params.has('banca')) { document.getElementById('banca').value = params.get('banca'); temFiltrosURL = true; }
+    if (params.get('ordem') === 'relevancia') {
+        const valor = ['relevancia', params.get('boost')].filter(Boolean).join('|');
+        const select = document.getElementById('ordem');
+        if ([...select.options].some(o => o.value === valor)) select.value = valor;
+    }
     if (params.has('uf')) {
         params.get('uf').split(',').forEach(uf => {
             const btn = document.querySelector(`.uf-btn[data-value="${uf}"]`);
@@ -301,6 +431,13 @@ window.addEventListener('load', () => {
         });
         temFiltrosURL = true;
     }
+    if (params.has('nivel')) {
+        params.get('nivel').split(',').forEach(nivel => {
+            const btn = document.querySelector(`.level-btn[data-value="${nivel}"]`);
+            if (btn) btn.classList.add('active');
+        });
+        temFiltrosURL = true;
+    }
     document.getElementById('searchForm').dispatchEvent(new Event('submit'));
 });
 
@@ -313,6 +450,8 @@ document.getElementById('searchForm').addEventListener('submit', async function(
     
     todosConcursos = [];
     paginaAtual = 0;
+    totalResultados = 0;
+    proximoCursor = null;
     btnLoadMore.style.display = 'none';
     container.innerHTML = '';
     statusDiv.style.display = 'none';
@@ -326,33 +465,38 @@ document.getElementById('searchForm').addEventListener('submit', async function(
 
     const activeUfs = Array.from(document.querySelectorAll('.uf-btn.active')).map(btn => btn.getAttribute('data-value'));
     const activeRegions = Array.from(document.querySelectorAll('.region-btn.active')).map(btn => btn.getAttribute('data-value'));
+    const activeLevels = Array.from(document.querySelectorAll('.level-btn.active')).map(btn => btn.getAttribute('data-value'));
     const salario = document.getElementById('salario_minimo').value;
     const palavraChave = document.getElementById('palavra_chave').value;
     const excluir = document.getElementById('excluir_palavra').value;
+    const banca = document.getElementById('banca').value;
+    const [ordem, boost] = document.getElementById('ordem').value.split('|');
 
     const params = new URLSearchParams();
     if (palavraChave) params.set('q', palavraChave);
     if (salario) params.set('salario', salario);
     if (excluir) params.set('excluir', excluir);
+    if (banca) params.set('banca', banca);
     if (activeUfs.length > 0) params.set('uf', activeUfs.join(','));
     if (activeRegions.length > 0) params.set('regiao', activeRegions.join(','));
+    if (activeLevels.length > 0) params.set('nivel', activeLevels.join(','));
+    if (ordem) params.set('ordem', ordem);
+    if (boost) params.set('boost', boost);
     
     if ([...params].length > 0) {
         window.history.pushState({}, '', window.location.pathname + '?' + params.toString());
     }
 
-    const payload = { salario_minimo: salario, palavra_chave: palavraChave, excluir_palavra: excluir, regioes: activeRegions, ufs: activeUfs };
+    payloadAtual = { salario_minimo: salario, palavra_chave: palavraChave, excluir_palavra: excluir, banca: banca, regioes: activeRegions, ufs: activeUfs, niveis: activeLevels, ordem: ordem || '', boost: boost || '' };
+    atualizarFacetas(payloadAtual);
 
     try {
-        const response = await fetch('/api/buscar', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(payload)
-        });
-
-        if (!response.ok) throw new Error(`Erro: ${response.status}`);
-        todosConcursos = await response.json();
-        btnBuscar.value = `Buscar Oportunidades (${todosConcursos.length})`;
+        const pagina = await buscarPagina(null);
+        if (!pagina) throw new Error('Erro: 410');
+        todosConcursos = pagina.itens;
+        totalResultados = pagina.total;
+        proximoCursor = pagina.cursor;
+        btnBuscar.value = `Buscar Oportunidades (${totalResultados})`;
         btnBuscar.disabled = false;
         container.innerHTML = '';
 
@@ -0,0 +1,30 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Os testes importam `services.*` e `app` a partir da raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app_modulo(tmp_path_factory):
+    """O app.py importado com tudo num diretório temporário e um snapshot pequeno já publicado."""
+    base = tmp_path_factory.mktemp('app')
+    os.environ.update({
+        'SNAPSHOT_DIR': str(base / 'dados'), 'LEADS_DB': str(base / 'leads.db'),
+        'ALERTAS_ASSINATURAS': str(base / 'alertas.jsonl'), 'ALERTAS_ARQUIVO': str(base / 'alertas_enviados.jsonl'),
+        'PLANILHAS_BACKEND': 'local', 'PLANILHAS_ARQUIVO': str(base / 'planilhas.jsonl'),
+        'PCI_URLS': 'http://127.0.0.1:9/', 'SITE_URL': 'https://concursos.exemplo.com.br',
+    })
+    from datetime import date
+    from services.scraper import enriquecer_blocos
+    import app as modulo
+
+    modulo.limiter.enabled = False
+    blocos = [(f"Prefeitura de Teste {i} - SP {i} vagas até R$ {i}.000,00 Analista Superior 20/12/2099",
+               f"https://exemplo.gov.br/concurso/{i}") for i in range(1, 60)]
+    modulo.publicar_dados(enriquecer_blocos(blocos, date(2026, 1, 1))[0], 1700000000.0)
+    modulo.ESTADO_ARQUIVO['verificado'] = modulo.ESTADO_ARQUIVO['mtime'] = time.time()
+    return modulo
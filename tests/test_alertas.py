@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from services import alertas
+from services.alertas import RepositorioAssinaturas, MotorAlertas, PRAZO_CONFIRMACAO
+
+
+class Caixa:
+    def __init__(self): self.mensagens = []
+    def enviar(self, email, assunto, corpo): self.mensagens.append((email, assunto, corpo))
+
+
+def concurso(texto, uf='SP', salario=5000.0):
+    return {'texto': texto, 'texto_normalized': texto.lower(), 'uf': uf, 'salario_num': salario,
+            'niveis': frozenset(), 'bancas': frozenset(), 'tokens': frozenset(texto.lower().split()),
+            'salario_formatado': 'R$ 5.000,00', 'data_fim': '01/01/2030', 'link': 'https://exemplo.gov.br/edital'}
+
+
+@pytest.fixture
+def repo(tmp_path): return RepositorioAssinaturas(str(tmp_path / 'alertas.jsonl'))
+
+
+def test_mesma_busca_do_mesmo_email_devolve_a_assinatura_existente(repo):
+    a, nova = repo.assinar('Pessoa@Exemplo.com ', (0, ['TI', 'analista'], ['SP'], [], [], []))
+    b, nova_b = repo.assinar('pessoa@exemplo.com', (0.0, ['analista', 'ti'], ['SP'], [], [], []))
+    assert nova and not nova_b
+    assert b.token == a.token
+    assert len(repo.ativas) == 1
+
+
+def test_busca_sem_filtros_e_recusada(repo):
+    with pytest.raises(ValueError): repo.assinar('a@b.com', (0, [], [], [], [], []))
+    with pytest.raises(ValueError): repo.assinar('a@b.com', (0, [], [], ['estagio'], [], []))
+
+
+def test_so_assinatura_confirmada_recebe_aviso(repo):
+    caixa = Caixa()
+    motor = MotorAlertas(repo, caixa, url_base='https://site.exemplo/')
+    a, _ = repo.assinar('a@b.com', (0, ['analista'], [], [], [], []))
+    motor.pedir_confirmacao(a)
+    assert caixa.mensagens[-1][2].count(f'https://site.exemplo/api/alertas/confirmar?token={a.token}') == 1
+
+    assert motor.processar([concurso('Analista de TI')]) == 0
+    assert repo.confirmar(a.token)
+    assert motor.processar([concurso('Analista de TI')]) == 1
+    assert f'https://site.exemplo/api/alertas/cancelar?token={a.token}' in caixa.mensagens[-1][2]
+
+    assert repo.cancelar(a.token)
+    assert motor.processar([concurso('Analista de TI')]) == 0
+
+
+def test_outro_worker_ve_confirmacao_e_cancelamento(repo):
+    outro = RepositorioAssinaturas(repo.caminho)
+    motor = MotorAlertas(outro, Caixa(), url_base='https://site.exemplo')
+    a, _ = repo.assinar('a@b.com', (0, ['analista'], [], [], [], []))
+    outro.carregar()
+    assert not motor.percolador.assinaturas
+    repo.confirmar(a.token)
+    outro.carregar()
+    assert list(motor.percolador.assinaturas) == [a.id]
+
+
+def test_compactacao_mantem_vivas_e_descarta_pendentes_vencidas(repo):
+    motor = MotorAlertas(repo, Caixa(), url_base='https://site.exemplo')
+    viva, _ = repo.assinar('a@b.com', (0, ['analista'], [], [], [], []))
+    repo.confirmar(viva.token)
+    cancelada, _ = repo.assinar('a@b.com', (0, ['tecnico'], [], [], [], []))
+    repo.cancelar(cancelada.token)
+    pendente, _ = repo.assinar('c@d.com', (3000, [], [], [], [], []))
+    outro = RepositorioAssinaturas(repo.caminho).carregar()
+
+    assert repo.compactar(agora=pendente.criada + PRAZO_CONFIRMACAO + 1) == 5 - 1
+    with open(repo.caminho, encoding='utf-8') as f:
+        assert [json.loads(l)['id'] for l in f] == [viva.id]
+    assert list(motor.percolador.assinaturas) == [viva.id]
+    # o outro worker percebe a troca do arquivo e relê do início
+    outro.carregar()
+    assert list(outro.ativas) == [viva.id] and outro.ativas[viva.id].confirmada
+    # acréscimos depois da compactação continuam valendo
+    nova, _ = repo.assinar('e@f.com', (0, ['medico'], [], [], [], []))
+    assert nova.id in outro.carregar().ativas
+
+
+def test_sem_fcntl_trava_fica_no_processo(repo, monkeypatch):
+    monkeypatch.setattr(alertas, 'fcntl', None)
+    a, _ = repo.assinar('a@b.com', (0, ['analista'], [], [], [], []))
+    repo.confirmar(a.token)
+    repo.assinar('c@d.com', (3000, [], [], [], [], []))
+    assert repo.compactar(agora=a.criada + PRAZO_CONFIRMACAO + 1) == 3 - 1
+    assert list(repo.ativas) == [a.id]
+    assert not repo._lock_arquivo.locked()
@@ -0,0 +1,43 @@
+import sqlite3
+
+from flask import Flask
+from flask_limiter import Limiter
+
+from services.compartilhado import AvisosLimiter
+
+
+def montar(tmp_path, fallback, swallow):
+    app = Flask(__name__)
+    limiter = Limiter(lambda: '1.2.3.4', app=app, default_limits=['3 per minute'],
+                      storage_uri=f"sqlite://{tmp_path / 'compartilhado.db'}",
+                      in_memory_fallback_enabled=fallback, swallow_errors=swallow)
+    avisos = AvisosLimiter()
+    limiter.logger.addHandler(avisos)
+    app.add_url_rule('/', 'raiz', lambda: 'ok')
+    return app.test_client(), limiter, avisos
+
+
+def derrubar(limiter, monkeypatch):
+    def falhar(*args, **kwargs): raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(limiter._storage.armazem, 'incrementar', falhar)
+    monkeypatch.setattr(limiter._storage.armazem, 'contador', falhar)
+
+
+def test_limites_contam_no_sqlite(tmp_path):
+    cliente, limiter, _ = montar(tmp_path, True, True)
+    assert [cliente.get('/').status_code for _ in range(4)] == [200, 200, 200, 429]
+
+
+def test_fallback_em_memoria_avisa_e_segue_limitando(tmp_path, monkeypatch, capsys):
+    cliente, limiter, avisos = montar(tmp_path, True, True)
+    derrubar(limiter, monkeypatch)
+    assert [cliente.get('/').status_code for _ in range(4)] == [200, 200, 200, 429]
+    assert avisos.quedas == 1
+    assert '--> [LIMITER] Rate limit storage unreachable' in capsys.readouterr().out
+
+
+def test_sem_fallback_o_erro_aparece(tmp_path, monkeypatch):
+    cliente, limiter, avisos = montar(tmp_path, False, False)
+    derrubar(limiter, monkeypatch)
+    assert cliente.get('/').status_code == 500
+    assert avisos.quedas == 0
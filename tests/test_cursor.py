@@ -0,0 +1,44 @@
+import os
+from collections import OrderedDict
+from datetime import date
+
+import pytest
+
+from services.scraper import enriquecer_blocos
+from services.snapshot import serializar, escrever_atomico, versao_de
+
+
+@pytest.fixture
+def versao_de_outro_worker(app_modulo, monkeypatch):
+    """Uma versão mais nova gravada no diretório por outro worker, que este ainda não publicou."""
+    monkeypatch.setattr(app_modulo, 'VERSOES_RECENTES', OrderedDict(app_modulo.VERSOES_RECENTES))
+    timestamp = 1800000000.0
+    blocos = [(f"Câmara de Teste {i} - RJ {i} vagas até R$ {i}.500,00 Motorista Médio 20/12/2099",
+               f"https://exemplo.gov.br/outro/{i}") for i in range(1, 31)]
+    caminho = os.path.join(app_modulo.repositorio.diretorio, f"concursos-{versao_de(timestamp)}.snap")
+    escrever_atomico(caminho, serializar(enriquecer_blocos(blocos, date(2026, 1, 1))[0], timestamp))
+    yield versao_de(timestamp)
+    os.remove(caminho)
+
+
+def test_cursor_de_versao_que_o_worker_ainda_nao_publicou(app_modulo, versao_de_outro_worker):
+    versao = versao_de_outro_worker
+    assert versao != app_modulo.CACHE_MEMORIA['versao'] and versao not in app_modulo.VERSOES_RECENTES
+    cliente = app_modulo.app.test_client()
+    r = cliente.get(f"/api/buscar?limit=10&cursor={app_modulo.codificar_cursor(versao, 10)}")
+    assert r.status_code == 200
+    corpo = r.get_json()
+    assert corpo['versao'] == versao and corpo['total'] == 30 and len(corpo['itens']) == 10
+    assert all('/outro/' in item['Link'] for item in corpo['itens'])
+    # a próxima página usa o mesmo snapshot já aberto
+    snap = app_modulo.VERSOES_RECENTES[versao]
+    assert cliente.get(f"/api/buscar?limit=10&cursor={corpo['cursor']}").status_code == 200
+    assert app_modulo.VERSOES_RECENTES[versao] is snap
+    assert app_modulo.CACHE_MEMORIA['versao'] != versao
+
+
+@pytest.mark.parametrize('versao', ['1', 'ffffffffff', '../ATUAL', ''])
+def test_cursor_de_versao_fora_do_diretorio_expira(app_modulo, versao):
+    r = app_modulo.app.test_client().get(f"/api/buscar?limit=10&cursor={app_modulo.codificar_cursor(versao, 10)}")
+    assert r.status_code == 410
+    assert r.get_json()['versao'] == app_modulo.CACHE_MEMORIA['versao']
@@ -0,0 +1,28 @@
+from services.etiquetas import etiquetar
+from services.texto import normalizar_texto
+
+
+def bancas(texto): return etiquetar(normalizar_texto(texto))[2]
+
+
+def test_palavras_comuns_nao_viram_banca():
+    assert bancas('Fundação Hospitalar: analista de fluxo, excelência no atendimento e direção; Exército') == set()
+    assert bancas('Prova objetiva e avaliação de títulos, nível médio, click aqui') == set()
+
+
+def test_banca_ambigua_vale_quando_o_anuncio_cita_a_organizadora():
+    assert bancas('Organizadora: Objetiva Concursos') == {'objetiva'}
+    assert bancas('Realização: Instituto Fundação Objetiva') == {'fundacao', 'objetiva'}
+    assert bancas('Edital da AGU; banca organizadora: Cebraspe') == {'cebraspe'}
+
+
+def test_banca_ambigua_so_vale_ao_lado_da_palavra_de_contexto():
+    # a cidade Gama não vira banca só porque o anúncio cita a organizadora em outra frase
+    assert bancas('Prefeitura de Gama abre concurso. Banca: Objetiva') == {'objetiva'}
+    assert bancas('Prefeitura de Gama: banca Objetiva') == {'objetiva'}
+    assert bancas('Banca definida em breve; Prefeitura de Gama contrata') == set()
+
+
+def test_siglas_valem_em_qualquer_texto():
+    assert bancas('Concurso TJ-SP com provas pela Vunesp e FGV') == {'vunesp', 'fgv'}
+    assert bancas('Cargos de classe, cl e cla') == {'cl'}
@@ -0,0 +1,74 @@
+import pytest
+
+from services.indice import IndiceBusca, FAIXAS_SALARIO, NIVEIS, UF_NACIONAL, REGIOES, UFS_SIGLAS
+from services.scraper import filtrar_concursos
+from services.snapshot import catalogo_em_memoria
+
+from test_indice import LISTA, CONSULTAS
+
+
+@pytest.fixture(scope='module', params=['lista', 'snapshot'])
+def catalogo(request):
+    return LISTA if request.param == 'lista' else catalogo_em_memoria(LISTA, 1700000000.0)
+
+
+@pytest.fixture(scope='module')
+def indice(catalogo): return IndiceBusca(catalogo)
+
+
+def contar(catalogo, sal_min, chaves, ufs, excluir, niveis, bancas):
+    return len(filtrar_concursos(catalogo, sal_min, chaves, ufs, excluir, niveis, bancas))
+
+
+@pytest.mark.parametrize('consulta', CONSULTAS)
+def test_facetas_batem_com_a_busca(catalogo, indice, consulta):
+    sal_min, chaves, ufs, excluir, niveis, bancas = consulta
+    f = indice.facetas(*consulta)
+    assert f['total'] == contar(catalogo, *consulta)
+
+    # Cada grupo é contado sem o próprio filtro: a contagem de um valor é a busca com só ele no grupo
+    for sigla in ('SP', 'RJ', 'AC'):
+        assert f['uf'][sigla] == contar(catalogo, sal_min, chaves, [sigla], excluir, niveis, bancas)
+    assert f['regiao']['Nacional'] == contar(catalogo, sal_min, chaves, [UF_NACIONAL], excluir, niveis, bancas)
+    for regiao, siglas in REGIOES.items():
+        assert f['regiao'][regiao] == contar(catalogo, sal_min, chaves, siglas, excluir, niveis, bancas)
+    for nivel in NIVEIS:
+        assert f['nivel'][nivel] == contar(catalogo, sal_min, chaves, ufs, excluir, [nivel], bancas)
+
+    # As faixas de salário são disjuntas e, sem o filtro de salário, somam o total
+    sem_salario = contar(catalogo, 0.0, chaves, ufs, excluir, niveis, bancas)
+    assert sum(faixa['total'] for faixa in f['salario']) == sem_salario
+    for faixa, (_, minimo, maximo) in zip(f['salario'], FAIXAS_SALARIO):
+        acima = contar(catalogo, maximo, chaves, ufs, excluir, niveis, bancas) if maximo else 0
+        desde = contar(catalogo, minimo, chaves, ufs, excluir, niveis, bancas) if minimo else sem_salario
+        assert faixa['total'] == desde - acima
+
+
+def test_facetas_cobrem_todas_as_ufs(indice):
+    f = indice.facetas(0.0, [], [], [], [], [])
+    assert set(f['uf']) == set(UFS_SIGLAS) and set(f['regiao']) == {'Nacional'} | set(REGIOES)
+    assert f['total'] == len(LISTA)
+    assert sum(faixa['total'] for faixa in f['salario']) == len(LISTA)
+
+
+def test_facetas_da_busca_vazia_ja_prontas(app_modulo):
+    dados, versao = app_modulo.CACHE_MEMORIA['dados'], app_modulo.CACHE_MEMORIA['versao']
+    chave = app_modulo.chave_busca(versao, app_modulo.FILTROS_VAZIOS, 'facetas')
+    pronta = app_modulo.cache_busca.obter(chave)
+    assert pronta is not None
+    fresca = IndiceBusca(dados).facetas(*app_modulo.FILTROS_VAZIOS)
+    assert pronta.corpo == app_modulo.codificar_json(fresca)
+
+    cliente = app_modulo.app.test_client()
+    r = cliente.get('/api/facetas')
+    assert r.status_code == 200 and r.get_json() == fresca
+    assert cliente.get('/api/facetas', headers={'If-None-Match': r.headers['ETag']}).status_code == 304
+
+
+def test_api_facetas_usa_os_filtros_da_query(app_modulo):
+    dados = app_modulo.CACHE_MEMORIA['dados']
+    r = app_modulo.app.test_client().get('/api/facetas?q=analista&salario=30000&regiao=Sudeste&nivel=superior')
+    assert r.status_code == 200
+    filtros = (30000.0, ['analista'], list(REGIOES['Sudeste']), [], ['superior'], [])
+    assert r.get_json() == IndiceBusca(dados).facetas(*filtros)
+    assert r.get_json()['total'] == len(filtrar_concursos(dados, *filtros))
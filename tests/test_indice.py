@@ -0,0 +1,107 @@
+import random
+from datetime import date
+
+import pytest
+
+from services.armazem_sqlite import ArmazemSQLite
+from services.indice import linha_saida
+from services.scraper import enriquecer_blocos, filtrar_concursos, paginar_concursos
+from services.snapshot import catalogo_em_memoria
+from services.texto import normalizar_texto
+
+ORGAOS = ['Prefeitura de Campinas', 'Câmara Municipal de Niterói', 'Tribunal Regional Federal', 'SAAE de Sorocaba',
+          'Universidade Federal', 'Conselho Regional de Enfermagem', 'Polícia Militar', 'Instituto Federal']
+CARGOS = ['Analista de TI', 'Técnico em Enfermagem', 'Enfermeiro', 'Motorista', 'Professor de Matemática',
+          'Auxiliar Administrativo', 'Engenheiro Civil', 'Médico Plantonista', 'Agente Comunitário', 'Procurador']
+NIVEIS_TEXTO = ['Fundamental', 'Médio', 'Superior', 'Médio / Superior', '']
+UFS = ['SP', 'RJ', 'MG', 'BA', 'RS', 'DF', '']
+BANCAS = ['FGV', 'Vunesp', 'Cebraspe', 'Quadrix', 'IBFC', '']
+
+
+def linear(todos, sal_min, chaves, ufs, excluir, niveis_filtro=None, bancas_filtro=None):
+    """O filtrar_concursos de antes do índice (varredura da lista), com o filtro de banca."""
+    res = []
+    excluir_set = set(normalizar_texto(p) for p in excluir) if excluir else set()
+    chaves_norm = [normalizar_texto(k) for k in chaves] if chaves else []
+    set_niveis_alvo = set(niveis_filtro) if niveis_filtro else set()
+    set_bancas = set(normalizar_texto(b) for b in bancas_filtro) if bancas_filtro else set()
+    for item in todos:
+        if excluir_set and not excluir_set.isdisjoint(item['tokens']): continue
+        if sal_min > 0 and item['salario_num'] < sal_min: continue
+        if ufs:
+            if item['uf'] not in ufs and item['uf'] != 'Nacional/Outro':
+                if not any(u in item['texto'] for u in ufs): continue
+        if chaves_norm:
+            if not any(k in item['texto_normalized'] for k in chaves_norm): continue
+        if set_niveis_alvo and set_niveis_alvo.isdisjoint(item['niveis']): continue
+        if set_bancas and set_bancas.isdisjoint(item['bancas']): continue
+        res.append(linha_saida(item))
+    return res
+
+
+def gerar_lista(n, semente):
+    sorteio = random.Random(semente)
+    blocos = []
+    for i in range(n):
+        uf, banca = sorteio.choice(UFS), sorteio.choice(BANCAS)
+        texto = (f"{sorteio.choice(ORGAOS)} {'- ' + uf if uf else ''} {sorteio.randint(1, 300)} vagas até "
+                 f"R$ {sorteio.randint(1, 25)}.{sorteio.randint(0, 999):03d},00 "
+                 f"{', '.join(sorteio.sample(CARGOS, sorteio.randint(1, 3)))} {sorteio.choice(NIVEIS_TEXTO)} "
+                 f"{sorteio.randint(1, 28):02d}/{sorteio.randint(1, 12):02d}/2099 "
+                 f"{'Banca: ' + banca if banca else ''}")
+        blocos.append((' '.join(texto.split()), f"https://exemplo.gov.br/concurso/{i}"))
+    return enriquecer_blocos(blocos, date(2026, 1, 1))[0]
+
+
+def gerar_consultas(n, semente):
+    sorteio = random.Random(semente)
+    palavras = ['analista', 'enfer', 'tec', 'médico', 'professor', 'ti', 'xyz', 'Câmara', 'federal', '']
+    consultas = [(0.0, [], [], [], [], []),
+                 (0.0, [], ['Nacional/Outro'], [], [], []),
+                 (0.0, [], ['SP', 'Nacional/Outro'], [], [], []),
+                 (10000.0, [], [], [], [], []),
+                 (0.0, [''], [], [], [], []),
+                 (0.0, [], [], ['motorista', 'enfermeiro'], [], []),
+                 (0.0, [], [], [], ['superior'], []),
+                 (0.0, [], [], [], [], ['fgv', 'Vunesp'])]
+    for _ in range(n):
+        consultas.append((
+            sorteio.choice([0.0, 0.0, 3000.0, 8000.5, 20000.0]),
+            sorteio.sample(palavras, sorteio.randint(0, 2)),
+            sorteio.sample(['SP', 'RJ', 'MG', 'BA', 'Nacional/Outro'], sorteio.randint(0, 2)),
+            sorteio.sample(['motorista', 'civil', 'enfermagem', 'de', 'inexistente'], sorteio.randint(0, 2)),
+            sorteio.sample(['fundamental', 'medio', 'superior'], sorteio.randint(0, 2)),
+            sorteio.sample(['fgv', 'vunesp', 'cebraspe', 'quadrix'], sorteio.choice([0, 0, 1])),
+        ))
+    return consultas
+
+
+LISTA = gerar_lista(600, semente=7)
+CONSULTAS = gerar_consultas(150, semente=11)
+
+
+@pytest.fixture(scope='module', params=['lista', 'snapshot', 'sqlite'])
+def catalogo(request, tmp_path_factory):
+    if request.param == 'lista': return LISTA
+    if request.param == 'snapshot': return catalogo_em_memoria(LISTA, 1700000000.0)
+    armazem = ArmazemSQLite(str(tmp_path_factory.mktemp('armazem') / 'catalogo.db'))
+    armazem.gravar(LISTA, 1700000000.0)
+    return armazem
+
+
+@pytest.mark.parametrize('consulta', CONSULTAS)
+def test_indice_igual_a_varredura_linear(catalogo, consulta):
+    esperado = linear(LISTA, *consulta)
+    assert filtrar_concursos(catalogo, *consulta) == esperado
+    total, linhas = paginar_concursos(catalogo, *consulta, inicio=20, limite=20)
+    assert total == len(esperado)
+    assert linhas == esperado[20:40]
+
+
+def test_fixture_cobre_os_filtros():
+    assert {item['uf'] for item in LISTA} >= {'SP', 'RJ', 'Nacional/Outro'}
+    assert all(any(item['niveis'] == {n} or n in item['niveis'] for item in LISTA) for n in ('fundamental', 'medio', 'superior'))
+    assert any(item['bancas'] for item in LISTA)
+    # nem toda consulta volta vazia ou a lista inteira
+    tamanhos = {len(linear(LISTA, *c)) for c in CONSULTAS}
+    assert len(tamanhos) > 20
@@ -0,0 +1,20 @@
+from services import fontes
+from services.links import ResolvedorLinks
+
+
+def test_hosts_permitidos_saem_das_fontes_uma_vez(tmp_path, monkeypatch):
+    monkeypatch.setenv('PCI_URLS', 'https://www.pciconcursos.com.br/concursos/,https://regional.exemplo.com.br/sp/')
+    monkeypatch.setitem(fontes.FONTES, fontes.FontePCI.nome, fontes.FontePCI())
+    resolvedor = ResolvedorLinks(str(tmp_path / 'links.json'))
+    assert resolvedor.hosts == {'www.pciconcursos.com.br', 'regional.exemplo.com.br'}
+
+    def proibido(): raise AssertionError('fontes_ativas() no caminho do /ir')
+    monkeypatch.setattr(fontes, 'fontes_ativas', proibido)
+    assert resolvedor._permitido('https://www.pciconcursos.com.br/noticias/prefeitura-x')
+    assert resolvedor._permitido('https://REGIONAL.exemplo.com.br/noticias/y')
+    assert not resolvedor._permitido('https://www.pciconcursos.com.br/edital.pdf')
+    assert not resolvedor._permitido('https://atacante.invalid/noticias/z')
+    assert not resolvedor._permitido('javascript:alert(1)')
+    # host de fora: devolve a própria URL sem baixar nada
+    assert resolvedor.resolver('https://atacante.invalid/x', 'edital') == 'https://atacante.invalid/x'
+    assert resolvedor.buscas == 0
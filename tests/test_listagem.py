@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from services.listagem import extrair_blocos, _blocos_arvore
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+TEXTO = 'Prefeitura de Exemplo abre 10 vagas até R$ 5.000,00'
+
+CASOS = {
+    'aninhado': f'<div class="a"><div class="b"><a href="/x">{TEXTO}</a></div><div class="c"><a href="/y">{TEXTO} 2</a></div></div>',
+    'div_sem_fechar': f'<div class="ca"><a href="/um">{TEXTO}</a><div class="cd">cargos<div class="ca"><a href="/dois">{TEXTO}</a>',
+    'fechamento_cruzado': f'<div class="ca"><span><a href="/um">{TEXTO}</div></span><b>texto solto</b></a><div class="ca"><a href="/dois">{TEXTO}</a></div>',
+    'fechamento_sobrando': f'</div></div><div class="ca"><a href="/um">{TEXTO}</a></div></div></a><div class="x"><a href="/dois">{TEXTO}</a>',
+    'a_sem_fechar': f'<div class="ca"><a href="/um">{TEXTO}<div class="cb"><a href="/dois">{TEXTO} de novo</div></div>',
+    'p_implicito': f'<div class="ca"><p>Edital<p><a href="/um">{TEXTO}</a><li>sem ul</div>',
+    'tags_vazias': f'<div class="ca"><br/><img src="x"></img><a href="/um">{TEXTO}</a><br></br><hr>mais texto</div>',
+    'entidades': f'<div class="ca"><a href="/um?a=1&amp;b=2">{TEXTO} &amp; &lt;mais&gt; &eacute; &#233; &#xe9; &#233x &naoexiste; &</a></div>',
+    'script_e_comentario': f'<div class="ca"><script>var x = "<div class=\'z\'>";</script><!-- <a href="/falso"> --><a href="/um">{TEXTO}</a><style>.a{{}}</style></div>',
+    'cdata': f'<div class="ca"><![CDATA[ conteúdo cdata ]]><a href="/um">{TEXTO}</a></div>',
+    'atributos_estranhos': f'<div class=ca data-x="<div>"><a href=/um title=\'"\'>{TEXTO}</a></div><div class><a href="/dois">{TEXTO}</a></div>',
+    'link_invalido_e_curto': f'<div class="ca"><a href="javascript:void(0)">{TEXTO}</a></div><div class="cb"><a href="/um">curto</a></div><div class="cc"><a>{TEXTO}</a></div>',
+    'link_repetido': f'<div class="ca"><a href="/um">{TEXTO}</a></div><div class="cb"><a href="/um">{TEXTO} outra</a></div>',
+    'truncado': f'<div class="ca"><a href="/um">{TEXTO}</a></div><div class="cb"><a href="/dois">{TEXTO} e o arquivo acaba no meio <sp',
+}
+
+
+@pytest.mark.parametrize('nome', sorted(CASOS))
+def test_stream_igual_a_arvore_em_html_malformado(nome):
+    html = CASOS[nome]
+    assert extrair_blocos(html, 'stream') == _blocos_arvore(html, 'html.parser')
+
+
+@pytest.mark.parametrize('arquivo', sorted(os.listdir(FIXTURES)))
+def test_stream_igual_a_arvore_nas_fixtures(arquivo):
+    with open(os.path.join(FIXTURES, arquivo), encoding='utf-8') as f: html = f.read()
+    blocos = extrair_blocos(html, 'stream')
+    assert len(blocos) > 100
+    assert blocos == _blocos_arvore(html, 'html.parser')
+    # a mesma página cortada em pontos arbitrários (tags e entidades pela metade)
+    for corte in (len(html) // 3, len(html) // 2 + 7, len(html) - 101):
+        assert extrair_blocos(html[:corte], 'stream') == _blocos_arvore(html[:corte], 'html.parser')
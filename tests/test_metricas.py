@@ -0,0 +1,22 @@
+import os
+import time
+
+from services.metricas import Metricas, VALIDADE_ARQUIVO
+
+
+def test_agregado_soma_workers_e_apaga_arquivos_de_workers_mortos(tmp_path):
+    outro, morto = Metricas(str(tmp_path)), Metricas(str(tmp_path))
+    outro.observar('busca', 0.01, modo='pagina')
+    morto.observar('busca', 0.02, modo='pagina')
+    outro._arquivo = lambda pid=None: str(tmp_path / 'metricas-101.json')
+    morto._arquivo = lambda pid=None: str(tmp_path / 'metricas-102.json')
+    outro.gravar(forcar=True)
+    morto.gravar(forcar=True)
+    velho = time.time() - VALIDADE_ARQUIVO - 60
+    os.utime(tmp_path / 'metricas-102.json', (velho, velho))
+
+    local = Metricas(str(tmp_path))
+    local.observar('busca', 0.03, modo='pagina')
+    serie = local.agregado()[('busca', (('modo', 'pagina'),))]
+    assert serie.total == 2  # o deste worker e o do vivo; o do morto não entra
+    assert sorted(os.listdir(tmp_path)) == ['metricas-101.json']
@@ -0,0 +1,31 @@
+def test_home_fora_do_lru_e_independente_do_host(app_modulo):
+    cliente = app_modulo.app.test_client()
+    cache = app_modulo.cache_busca
+    antes = (cache.acertos, cache.faltas, len(cache._itens))
+
+    respostas = [cliente.get('/', headers={'Host': host})
+                 for host in ('concursos.exemplo.com.br', 'falso.invalid', f'x{"y" * 50}.invalid', 'localhost')]
+    assert {r.status_code for r in respostas} == {200}
+    assert len({r.data for r in respostas}) == 1 and len({r.headers['ETag'] for r in respostas}) == 1
+    assert b'falso.invalid' not in respostas[1].data
+    assert b'https://concursos.exemplo.com.br/ir?' in respostas[0].data  # JSON-LD com o host canônico
+
+    com_busca = cliente.get('/?q=Analista', headers={'Host': 'falso.invalid'})
+    assert b'Concurso: Analista | CONCURSO IDEAL' in com_busca.data
+    assert com_busca.headers['ETag'] != respostas[0].headers['ETag']
+
+    # a home não passa pelo cache das buscas: nem entradas, nem acertos/faltas
+    assert (cache.acertos, cache.faltas, len(cache._itens)) == antes
+    versao, dia = app_modulo.PAGINA_INICIAL[0]
+    assert versao == app_modulo.CACHE_MEMORIA['versao']
+
+
+def test_home_renderiza_uma_vez_por_versao(app_modulo, monkeypatch):
+    chamadas = []
+    original = app_modulo.schema_jobs
+    monkeypatch.setattr(app_modulo, 'schema_jobs', lambda *a: chamadas.append(1) or original(*a))
+    monkeypatch.setattr(app_modulo, 'PAGINA_INICIAL', (None, None, None))
+    cliente = app_modulo.app.test_client()
+    for host in ('a.invalid', 'b.invalid', 'c.invalid'): cliente.get('/', headers={'Host': host})
+    cliente.get('/?q=medico')
+    assert len(chamadas) == 1
@@ -0,0 +1,91 @@
+import json
+import time
+import threading
+
+from services.planilhas import EscritorPlanilhas, BackendLocal
+
+
+def lotes(backend):
+    try:
+        with open(backend.caminho, encoding='utf-8') as f: return [json.loads(l) for l in f]
+    except FileNotFoundError: return []
+
+
+def esperar(condicao, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        if time.monotonic() > limite: return False
+        time.sleep(0.01)
+    return True
+
+
+class BackendTravado(BackendLocal):
+    """Segura o primeiro envio até `liberar` ser setado (a fila enche enquanto isso)."""
+
+    def __init__(self, caminho):
+        super().__init__(caminho)
+        self.entrou, self.liberar = threading.Event(), threading.Event()
+
+    def anexar(self, aba, linhas):
+        self.entrou.set()
+        self.liberar.wait(10)
+        super().anexar(aba, linhas)
+
+
+def test_padroes():
+    escritor = EscritorPlanilhas(None)
+    assert (escritor.tamanho_lote, escritor.intervalo, escritor._fila.maxsize) == (50, 5.0, 2000)
+    assert escritor.enfileirar('Termos', ['x']) is False  # sem backend, nada entra
+
+
+def test_lote_sai_ao_juntar_50_linhas(tmp_path):
+    backend = BackendLocal(str(tmp_path / 'planilhas.jsonl'))
+    escritor = EscritorPlanilhas(backend, intervalo=60.0)
+    for i in range(120): escritor.enfileirar('Termos', [i])
+    assert esperar(lambda: backend.lotes == 2)
+    assert [len(l['linhas']) for l in lotes(backend)] == [50, 50]
+    assert lotes(backend)[0]['linhas'][0] == [0] and lotes(backend)[1]['linhas'][-1] == [99]
+    time.sleep(0.2)
+    assert backend.lotes == 2  # as 20 restantes esperam o prazo
+    escritor.encerrar()
+    assert [len(l['linhas']) for l in lotes(backend)] == [50, 50, 20]
+
+
+def test_lote_incompleto_sai_no_prazo(tmp_path):
+    backend = BackendLocal(str(tmp_path / 'planilhas.jsonl'))
+    escritor = EscritorPlanilhas(backend, intervalo=0.5)
+    t0 = time.monotonic()
+    escritor.enfileirar(None, ['lead@exemplo.com'])
+    escritor.enfileirar('Report', ['erro'])
+    assert esperar(lambda: backend.lotes == 2)  # um anexar por aba
+    assert time.monotonic() - t0 >= 0.45
+    assert sorted((l['aba'] or '', l['linhas']) for l in lotes(backend)) == [('', [['lead@exemplo.com']]),
+                                                                          ('Report', [['erro']])]
+    assert escritor.estatisticas()['enviadas'] == 2
+
+
+def test_fila_cheia_descarta_e_conta(tmp_path):
+    backend = BackendTravado(str(tmp_path / 'planilhas.jsonl'))
+    escritor = EscritorPlanilhas(backend, intervalo=0.01)
+    escritor.enfileirar('Termos', ['primeira'])
+    assert backend.entrou.wait(5)  # a thread está presa no envio: a fila só enche
+    aceitas = sum(escritor.enfileirar('Termos', [i]) for i in range(2005))
+    assert aceitas == 2000
+    assert escritor.estatisticas()['descartadas'] == 5
+    assert escritor.estatisticas()['na_fila'] == 2000
+    backend.liberar.set()
+    escritor.encerrar()
+    assert sum(len(l['linhas']) for l in lotes(backend)) == 2001
+    assert escritor.estatisticas()['enviadas'] == 2001
+
+
+def test_encerrar_envia_o_que_ficou_na_fila(tmp_path):
+    backend = BackendLocal(str(tmp_path / 'planilhas.jsonl'))
+    escritor = EscritorPlanilhas(backend, intervalo=60.0)
+    for i in range(10): escritor.enfileirar('Termos', [i])
+    time.sleep(0.1)
+    assert lotes(backend) == []
+    escritor.encerrar()
+    assert lotes(backend) == [{'aba': 'Termos', 'linhas': [[i] for i in range(10)]}]
+    assert not escritor._thread.is_alive()
+    assert escritor.enfileirar('Termos', ['depois']) is False
@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+
+import pytest
+
+from services.indice import IndiceBusca
+from services.ranking import Ranqueador, distancia_limitada, erros_permitidos
+from services.scraper import enriquecer_blocos, filtrar_concursos, paginar_concursos
+from services.snapshot import catalogo_em_memoria
+from services.texto import normalizar_texto
+
+from test_indice import LISTA, CONSULTAS, linear
+
+
+def montar(textos, hoje=date(2026, 1, 1)):
+    blocos = [(t, f"https://exemplo.gov.br/concurso/{i}") for i, t in enumerate(textos)]
+    return enriquecer_blocos(blocos, hoje)[0]
+
+
+def links(linhas): return [linha['Link'] if 'Link' in linha else linha['link'] for linha in linhas]
+
+
+# --- DISTÂNCIA E EXPANSÃO ---
+@pytest.mark.parametrize('a, b, k, esperado', [
+    ('policia', 'policia', 1, 0),
+    ('polica', 'policia', 1, 1),
+    ('enfermero', 'enfermeiro', 2, 1),
+    ('analista', 'analitsa', 2, 2),
+    ('analista', 'analitsa', 1, 2),    # passou do limite: k + 1
+    ('motorista', 'medico', 2, 3),
+    ('abc', 'abcdefgh', 2, 3),          # só pela diferença de tamanho
+    ('', 'ab', 2, 2),
+])
+def test_distancia_limitada_para_no_limite(a, b, k, esperado):
+    assert distancia_limitada(a, b, k) == esperado
+    assert distancia_limitada(b, a, k) == esperado
+
+
+def test_erros_permitidos_pelo_tamanho():
+    assert [erros_permitidos(p) for p in ('ti', 'medic', 'enfermeiro', '123456')] == [0, 1, 2, 0]
+
+
+@pytest.fixture(scope='module')
+def ranqueador():
+    return Ranqueador(IndiceBusca(LISTA))
+
+
+@pytest.mark.parametrize('digitado, correto', [('enfermero', 'enfermeiro'), ('polica', 'policia'),
+                                               ('engenhero', 'engenheiro')])
+def test_expandir_tolera_erro_de_digitacao(ranqueador, digitado, correto):
+    vocab = ranqueador.indice.vocabulario
+    assert correto in {vocab[v] for _, v in ranqueador.expandir(digitado)}
+    _, ids = ranqueador.ranquear(0.0, [digitado], [], [])
+    assert ids and all(correto in LISTA[i]['tokens'] for i in ids)
+
+
+def test_palavra_existente_nao_vira_vizinha(ranqueador):
+    # 'medico' existe: não pode trazer 'medio' por erro de digitação
+    vocab = ranqueador.indice.vocabulario
+    assert 'medio' not in {vocab[v] for _, v in ranqueador.expandir('medico')}
+
+
+def test_expandir_prefixo_pesa_mais_que_parcial(ranqueador):
+    vocab = ranqueador.indice.vocabulario
+    pesos = {vocab[v]: p / ranqueador._idf(v) for p, v in ranqueador.expandir('enferm')}
+    assert pesos['enfermeiro'] > 0 and pesos['enfermeiro'] > pesos.get('tecnico', 0)
+
+
+# --- FILTROS EXATOS NA RELEVÂNCIA ---
+@pytest.fixture(scope='module', params=['lista', 'snapshot'])
+def catalogo(request):
+    return LISTA if request.param == 'lista' else catalogo_em_memoria(LISTA, 1700000000.0)
+
+
+@pytest.mark.parametrize('consulta', CONSULTAS)
+def test_relevancia_mantem_filtros_exatos(catalogo, consulta):
+    sal_min, chaves, ufs, excluir, niveis, bancas = consulta
+    # Só as palavras-chave ranqueiam: salário, UF, nível, banca e exclusões seguem o filtro linear
+    permitidos = set(links(linear(LISTA, sal_min, [], ufs, excluir, niveis, bancas)))
+    for ordem in ((), ('salario',), ('salario', 'prazo')):
+        achados = links(filtrar_concursos(catalogo, *consulta, ordem=ordem))
+        assert set(achados) <= permitidos
+        assert len(achados) == len(set(achados))
+        # Palavra vazia não ranqueia (na busca comum ela casaria com tudo)
+        palavras = [c for c in chaves if normalizar_texto(c)]
+        if not palavras: assert set(achados) == permitidos
+        else: assert set(links(linear(LISTA, sal_min, palavras, ufs, excluir, niveis, bancas))) <= set(achados)
+        total, pagina = paginar_concursos(catalogo, *consulta, inicio=10, limite=10, ordem=ordem)
+        assert total == len(achados) and links(pagina) == achados[10:20]
+
+
+# --- ORDEM ---
+def test_empate_mantem_ordem_da_raspagem():
+    lista = montar(['Prefeitura de Teste abre vagas para Enfermeiro R$ 5.000,00'] * 6
+                   + ['Câmara de Teste abre vagas para Motorista R$ 9.000,00'])
+    assert links(filtrar_concursos(lista, 0.0, ['enfermeiro'], [], [], ordem=())) == links(filtrar_concursos(
+        lista, 0.0, ['enfermeiro'], [], []))
+    assert len(links(filtrar_concursos(lista, 0.0, ['enfermeiro'], [], [], ordem=()))) == 6
+
+
+def test_nota_de_texto_vence_a_ordem_da_raspagem():
+    lista = montar(['Tribunal contrata Analista de Sistemas, Técnico, Motorista, Auxiliar, Vigia R$ 9.000,00',
+                    'Prefeitura contrata Analista R$ 2.000,00'])
+    assert links(filtrar_concursos(lista, 0.0, ['analista'], [], [])) == links(lista)
+    assert links(filtrar_concursos(lista, 0.0, ['analista'], [], [], ordem=())) == links(lista)[::-1]
+
+
+def test_boost_de_salario_muda_a_ordem():
+    lista = montar(['Tribunal contrata Analista e Motorista R$ 20.000,00', 'Prefeitura contrata Analista'])
+    assert links(filtrar_concursos(lista, 0.0, ['analista'], [], [], ordem=())) == links(lista)[::-1]
+    assert links(filtrar_concursos(lista, 0.0, ['analista'], [], [], ordem=('salario',))) == links(lista)
+
+
+def test_boost_de_prazo_muda_a_ordem():
+    hoje = date.today()
+    perto, longe = (hoje + timedelta(days=2)).strftime('%d/%m/%Y'), (hoje + timedelta(days=200)).strftime('%d/%m/%Y')
+    lista = montar([f'Tribunal contrata Analista R$ 9.000,00 até {longe}',
+                    f'Prefeitura contrata Analista R$ 2.000,00 até {perto}'], hoje)
+    assert links(filtrar_concursos(lista, 0.0, ['analista'], [], [], ordem=())) == links(lista)
+    assert links(filtrar_concursos(lista, 0.0, ['analista'], [], [], ordem=('prazo',))) == links(lista)[::-1]
+    # sem palavra-chave a ordem sai só dos boosts
+    assert links(filtrar_concursos(lista, 0.0, [], [], [], ordem=('prazo',))) == links(lista)[::-1]
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from benchmarks.servidor_fixture import iniciar_servidor
+from services import scraper
+from services.fontes import Fonte
+from services.incremental import EstadoRaspagem
+
+
+def anuncio(n, href, fim='20/12/2099'):
+    return (f'<div class="ca"><a href="{href}">Prefeitura de Teste {n}</a>'
+            f'<div class="cd">{n} vagas até R$ {n}.000,00 Analista Superior</div><span>{fim}</span></div>')
+
+
+def pagina(*anuncios): return '<html><body>' + ''.join(anuncios) + '</body></html>'
+
+
+class FonteTeste(Fonte):
+    nome = 'teste'
+
+
+@pytest.fixture
+def site(tmp_path):
+    diretorio = tmp_path / 'site'
+    (diretorio / 'concursos').mkdir(parents=True)
+    servidor, url = iniciar_servidor(str(diretorio))
+    yield diretorio, url
+    servidor.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def fonte_registrada(monkeypatch):
+    # Fonte stub precisa estar em FONTES (processar_pagina a procura pelo nome); sem pool de processos
+    monkeypatch.setitem(scraper.FONTES, FonteTeste.nome, None)
+    monkeypatch.setattr(scraper, 'PROCESSOS', 1)
+
+
+def raspar(fonte, estado):
+    scraper.FONTES[fonte.nome] = fonte
+    return scraper.raspar_incremental(estado, [fonte])
+
+
+def test_links_relativos_saem_absolutos():
+    html = pagina(anuncio(1, '/noticias/um'), anuncio(2, '//outro.gov.br/dois'), anuncio(3, 'https://x.gov.br/tres'))
+    links = [link for _, link in FonteTeste([]).blocos(html, 'https://site.com.br/concursos/sp/')]
+    assert links == ['https://site.com.br/noticias/um', 'https://outro.gov.br/dois', 'https://x.gov.br/tres']
+
+
+@pytest.mark.parametrize('texto, uf', [
+    ('Prefeitura de Itapeva abre concurso; inscrições se encerram em 10/12', 'Nacional/Outro'),
+    ('Câmara abre vagas de 10 a 20 de maio, para assistente', 'Nacional/Outro'),
+    ('Prefeitura de Itapeva - SP abre concurso; inscrições se encerram em 10/12', 'SP'),
+    ('Câmara de Palmas/TO: vagas de 10 a 20 de maio', 'TO'),
+    ('Prefeitura de Aracaju abre concurso em Sergipe; inscrições se encerram', 'SE'),
+])
+def test_extrair_uf_so_aceita_sigla_maiuscula(texto, uf):
+    assert scraper.extrair_uf(texto) == uf
+
+
+def test_raspagem_incremental_contra_servidor_local(site, tmp_path):
+    diretorio, url = site
+    (diretorio / 'concursos' / 'a.html').write_text(
+        pagina(anuncio(1, '/noticias/um'), anuncio(2, '/noticias/dois'), anuncio(3, 'javascript:void(0)')),
+        encoding='utf-8')
+    (diretorio / 'concursos' / 'b.html').write_text(
+        pagina(anuncio(4, '/noticias/dois'), anuncio(5, 'https://externo.gov.br/cinco')), encoding='utf-8')
+    fonte = FonteTeste([url + 'concursos/a.html', url + 'concursos/b.html'])
+    estado = EstadoRaspagem(str(tmp_path / 'raspagem.json'))
+
+    lista = raspar(fonte, estado)
+    # link que não é URL fica de fora, link repetido fica com a primeira página, ordem por salário
+    assert [item['link'] for item in lista] == ['https://externo.gov.br/cinco', url + 'noticias/dois', url + 'noticias/um']
+    assert lista[1]['texto'].startswith('Prefeitura de Teste 2')
+
+    # nada mudou: GET condicional, tudo 304
+    assert raspar(fonte, estado) is None
+
+    # uma página muda: só ela é reprocessada e a lista reflete a mudança
+    (diretorio / 'concursos' / 'b.html').write_text(pagina(anuncio(6, '/noticias/seis')), encoding='utf-8')
+    os.utime(diretorio / 'concursos' / 'b.html', (1, 2))
+    lista = raspar(fonte, estado)
+    assert [item['link'] for item in lista] == [url + 'noticias/seis', url + 'noticias/dois', url + 'noticias/um']
@@ -0,0 +1,37 @@
+import gzip
+
+from services.sitemap import Sitemaps
+
+DADOS = [{'texto': f'Prefeitura de Cidade {i} - SP'} for i in range(25)]
+
+
+def test_um_conjunto_por_versao_com_a_base_canonica():
+    sitemaps = Sitemaps('https://site.exemplo/', urls_por_arquivo=10)
+    conjunto = sitemaps.obter('v1', DADOS, 1700000000.0)
+    assert sitemaps.obter('v1', DADOS, 1700000000.0) is conjunto
+    assert len(conjunto.partes) == 3 and conjunto.total_urls == 25
+    xml = gzip.decompress(conjunto.partes[0]).decode('utf-8')
+    assert '<loc>https://site.exemplo/?q=Prefeitura%20de%20Cidade%200</loc>' in xml
+    assert b'<loc>https://site.exemplo/sitemap-termos-2.xml.gz</loc>' in conjunto.indice()
+    sitemaps.obter('v2', DADOS, 1700000001.0)
+    sitemaps.obter('v3', DADOS, 1700000002.0)
+    assert list(sitemaps._conjuntos) == ['v2', 'v3']
+
+
+def test_host_do_request_nao_muda_sitemap_nem_robots(app_modulo):
+    cliente = app_modulo.app.test_client()
+    respostas = {host: (cliente.get('/sitemap.xml', headers={'Host': host}),
+                        cliente.get('/robots.txt', headers={'Host': host}),
+                        cliente.get('/sitemap-termos-0.xml.gz', headers={'Host': host}))
+                 for host in ('concursos.exemplo.com.br', 'falso.invalid', 'localhost:5000')}
+    corpos = {host: tuple(r.data for r in rs) for host, rs in respostas.items()}
+    etags = {host: tuple(r.headers.get('ETag') for r in rs) for host, rs in respostas.items()}
+    assert len(set(corpos.values())) == 1 and len(set(etags.values())) == 1
+    sitemap, robots, termos = respostas['falso.invalid']
+    assert sitemap.status_code == 200 and b'falso.invalid' not in sitemap.data
+    assert b'<loc>https://concursos.exemplo.com.br/sitemap-termos-0.xml.gz</loc>' in sitemap.data
+    assert robots.data.decode() == 'User-agent: *\nAllow: /\nSitemap: https://concursos.exemplo.com.br/sitemap.xml\n'
+    assert b'https://concursos.exemplo.com.br/?q=' in gzip.decompress(termos.data)
+    assert len(app_modulo.sitemaps._conjuntos) == 1
+    # revalidação com o ETag do índice
+    assert cliente.get('/sitemap.xml', headers={'If-None-Match': sitemap.headers['ETag']}).status_code == 304
@@ -0,0 +1,91 @@
+import random
+from datetime import date
+
+import pytest
+
+from services.indice import IndiceBusca
+from services.scraper import enriquecer_blocos
+from services.snapshot import catalogo_em_memoria
+from services.sugestoes import Sugestoes, extrair_cargos, MAX_SUGESTOES
+
+ANUNCIOS = (
+    ['Prefeitura de Campinas - SP 10 vagas até R$ 3.000,00 Enfermeiro, Técnico em Enfermagem Médio / Superior '
+     '20/12/2099 Banca: Vunesp'] * 5
+    + ['Hospital Municipal - RJ 4 vagas até R$ 6.000,00 Enfermeiro Superior 20/12/2099 Banca: FGV'] * 3
+    + ['Câmara de Niterói - RJ 2 vagas até R$ 4.000,00 Engenheiro Civil Superior 20/12/2099 Banca: FGV']
+    + ['Polícia Militar - MG 100 vagas até R$ 5.000,00 Soldado Médio 20/12/2099 Banca: Cebraspe'] * 2
+)
+
+
+@pytest.fixture(scope='module', params=['lista', 'snapshot'])
+def sugestoes(request):
+    blocos = [(t, f"https://exemplo.gov.br/concurso/{i}") for i, t in enumerate(ANUNCIOS)]
+    lista = enriquecer_blocos(blocos, date(2026, 1, 1))[0]
+    dados = lista if request.param == 'lista' else catalogo_em_memoria(lista, 1700000000.0)
+    return Sugestoes(IndiceBusca(dados))
+
+
+def textos(itens): return [(s['texto'], s['tipo'], s['total']) for s in itens]
+
+
+def test_extrair_cargos():
+    texto = 'Prefeitura - SP 137 vagas até R$ 2.100,50 Motorista, Engenheiro Civil Médio / Superior 06/11/2025'
+    assert extrair_cargos(texto) == ['Motorista', 'Engenheiro Civil']
+    assert extrair_cargos('Edital sem lista de cargos') == [] and extrair_cargos(None) == []
+
+
+def test_topo_ordenado_pelo_total(sugestoes):
+    # o cargo escrito no anúncio toma o lugar da palavra de mesma chave
+    assert textos(sugestoes.sugerir('enf')) == [('Enfermeiro', 'cargo', 8), ('enfermagem', 'palavra', 5)]
+    totais = [s['total'] for s in sugestoes.sugerir('e')]
+    assert totais == sorted(totais, reverse=True)
+    assert ('Técnico em Enfermagem', 'cargo', 5) in textos(sugestoes.sugerir('tecnico em'))
+    assert len(sugestoes.sugerir('e', limite=2)) == 2
+    assert len(sugestoes.sugerir('e', limite=500)) <= MAX_SUGESTOES
+
+
+def test_topo_pronto_igual_ao_calculado():
+    # Mais de LIMIAR_FAIXA palavras com o mesmo começo: o topo sai do que montar_sugestoes guardou
+    sorteio, letras = random.Random(3), 'abcdefghij'
+    palavras = ['ca' + ''.join(sorteio.choice(letras) for _ in range(4)) for _ in range(300)]
+    blocos = [(f"Prefeitura {' '.join(sorteio.sample(palavras, 8))} 20/12/2099", f"https://exemplo.gov.br/{i}")
+              for i in range(200)]
+    lista = enriquecer_blocos(blocos, date(2026, 1, 1))[0]
+    for dados in (lista, catalogo_em_memoria(lista, 1700000000.0)):
+        s = Sugestoes(IndiceBusca(dados))
+        for prefixo in ('c', 'ca', 'cab', 'caa', 'cabc'):
+            faixa = [i for i, chave in enumerate(s.chaves) if chave.startswith(prefixo)]
+            esperado = sorted(faixa, key=lambda i: (-s.totais[i], i))[:MAX_SUGESTOES]
+            assert textos(s.sugerir(prefixo)) == [(s.textos[i], 'palavra', s.totais[i]) for i in esperado]
+        assert 'ca' in s.prefixos
+
+
+def test_prefixo_ignora_caixa_e_acento(sugestoes):
+    assert sugestoes.sugerir('TÉCN') == sugestoes.sugerir('tecn') == sugestoes.sugerir('  Tecn')
+    assert sugestoes.sugerir('Policia') == sugestoes.sugerir('polícia')
+    assert sugestoes.sugerir('policia')
+
+
+@pytest.mark.parametrize('prefixo', ['', '   ', 'xyzw', 'enfermeirox', '!!'])
+def test_prefixo_vazio_ou_desconhecido(sugestoes, prefixo):
+    assert sugestoes.sugerir(prefixo) == []
+
+
+def test_cargos_e_bancas_aparecem(sugestoes):
+    assert ('Engenheiro Civil', 'cargo', 1) in textos(sugestoes.sugerir('engenheiro'))
+    assert ('FGV', 'banca', 4) in textos(sugestoes.sugerir('fg'))
+    assert ('VUNESP', 'banca', 5) in textos(sugestoes.sugerir('vun'))
+    assert ('Soldado', 'cargo', 2) in textos(sugestoes.sugerir('sol'))
+
+
+def test_api_sugestoes_traz_versao_e_e_cacheavel(app_modulo):
+    cliente = app_modulo.app.test_client()
+    r = cliente.get('/api/sugestoes?prefix=Anal')
+    assert r.status_code == 200
+    corpo = r.get_json()
+    assert corpo['versao'] == app_modulo.CACHE_MEMORIA['versao']
+    assert corpo['sugestoes'] and corpo['sugestoes'][0]['texto'].lower().startswith('anal')
+    assert r.headers['ETag'] and r.headers['Cache-Control'] == app_modulo.CACHE_CONTROL_BUSCA
+    assert str(corpo['versao']) in r.headers['ETag']
+    assert cliente.get('/api/sugestoes?prefix=Anal', headers={'If-None-Match': r.headers['ETag']}).status_code == 304
+    assert cliente.get('/api/sugestoes?prefix=').get_json()['sugestoes'] == []